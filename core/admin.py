@@ -1,6 +1,10 @@
+from django import forms
 from django.contrib import admin, messages
 from django.contrib.admin.decorators import register
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.utils import timezone
 from .models import (
     Schema,
     SchemaRef,
@@ -9,6 +13,8 @@ from .models import (
     Profile,
     PermanentURL,
     APIKey,
+    Job,
+    PublishedSchemaConflictError,
 )
 from .middleware.rate_limit import get_profile_rate_limit_key
 
@@ -17,8 +23,34 @@ def format_date_only(obj, date_field):
     return date_field.strftime("%b. %d, %Y") if date_field else "-"
 
 
+def format_published_conflict(conflict_error):
+    return (
+        f"A published schema ({conflict_error.conflicting_schema_ref.schema}) "
+        f"is already using one of this schema's {conflict_error.reason} values."
+    )
+
+
+class SchemaAdminForm(forms.ModelForm):
+    def clean(self):
+        cleaned_data = super().clean()
+        # The instance isn't updated until after clean()
+        is_publishing = (
+            self.instance.pk is not None
+            and self.instance.published_at is None
+            and cleaned_data.get("published_at") is not None
+        )
+        if is_publishing:
+            # Publishing makes the SchemaRefs claim their URLs
+            try:
+                self.instance.check_for_published_conflicts(fetch=True)
+            except PublishedSchemaConflictError as e:
+                raise ValidationError(format_published_conflict(e))
+        return cleaned_data
+
+
 @register(Schema)
 class SchemaAdmin(admin.ModelAdmin):
+    form = SchemaAdminForm
     list_display = ["name", "formatted_is_published", "get_org", "formatted_created_at"]
     list_filter = ("created_at", "published_at")
     readonly_fields = ("is_published", "get_org")
@@ -41,8 +73,25 @@ class SchemaAdmin(admin.ModelAdmin):
         obj.save(is_admin_change=True)
 
 
+class SchemaRefAdminForm(forms.ModelForm):
+    def clean(self):
+        cleaned_data = super().clean()
+        schema = cleaned_data.get("schema")
+        url = cleaned_data.get("url")
+        if schema is not None and url and schema.published_at is not None:
+            # SchemaRefs of published schemas claim their URLs
+            try:
+                schema.check_for_published_conflicts(
+                    schema_refs=[SchemaRef(url=url)], fetch=True
+                )
+            except PublishedSchemaConflictError as e:
+                raise ValidationError(format_published_conflict(e))
+        return cleaned_data
+
+
 @register(SchemaRef)
 class SchemaRefAdmin(admin.ModelAdmin):
+    form = SchemaRefAdminForm
     list_display = ["name", "schema", "url"]
     search_fields = ["schema__name", "schema__created_by__profile__organization__name"]
 
@@ -87,3 +136,27 @@ class PermanentURLAdmin(admin.ModelAdmin):
 @register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
     list_display = ["prefix", "profile"]
+
+
+@admin.action(description="Retry failed jobs")
+def retry_jobs(modeladmin, request, queryset):
+    try:
+        retried_count = queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.QUEUED,
+            attempts=0,
+            run_after=timezone.now(),
+            finished_at=None,
+        )
+    except IntegrityError:
+        messages.error(request, "Some of these jobs are already queued again.")
+        return
+
+    messages.success(request, f"Queued {retried_count} jobs to run again.")
+
+
+@register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ["task", "queue", "status", "attempts", "run_after", "finished_at"]
+    list_filter = ["status", "queue", "task"]
+    search_fields = ["task", "dedupe_key"]
+    actions = [retry_jobs]
@@ -2,11 +2,11 @@ from django.http import JsonResponse
 
 
 class ApiResponse(JsonResponse):
-    def __init__(self, data):
+    def __init__(self, data, status_code=200):
         response_body = {
             "data": data,
         }
-        super().__init__(response_body)
+        super().__init__(response_body, status=status_code)
 
 
 class ApiErrorResponse(JsonResponse):
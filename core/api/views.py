@@ -8,9 +8,13 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.urls import reverse
 from jsonschema import ValidationError as JSONValidationError
 from core.models import SchemaRef, Schema
+from core.tasks import enqueue_manifest, get_manifest_job_status, get_manifest_jobs
 from core.api.responses import ApiResponse, ApiErrorResponse
+from core.pagination import paginate_schemas, InvalidCursorError
 from core.views import lookup_schema
 
+SEARCH_PAGE_SIZE = 30
+
 
 def require_manifest(function):
     @wraps(function)
@@ -32,6 +36,30 @@ def require_manifest(function):
     return _wrap_request
 
 
+def wants_async_response(request):
+    # RFC 7240, e.g. "Prefer: respond-async, wait=10"
+    preferences = {
+        preference.split(";")[0].split("=")[0].strip().lower()
+        for preference in request.headers.get("Prefer", "").split(",")
+    }
+    return "respond-async" in preferences
+
+
+def get_job_data(job):
+    return {
+        **get_manifest_job_status(job),
+        "url": reverse("api_jobs_detail", kwargs={"job_id": job.id}),
+    }
+
+
+def job_accepted_response(job):
+    data = get_job_data(job)
+    response = ApiResponse(data=data, status_code=202)
+    response["Location"] = data["url"]
+    response["Preference-Applied"] = "respond-async"
+    return response
+
+
 @require_GET
 def find(request):
     id_value = request.GET.get("id")
@@ -40,12 +68,42 @@ def find(request):
     return ApiResponse({"url": schema_ref.url})
 
 
+@require_GET
+def search(request):
+    searched_schemas = Schema.objects.public().search(request.GET.get("query"))
+    try:
+        schemas, next_cursor = paginate_schemas(
+            searched_schemas, SEARCH_PAGE_SIZE, request.GET.get("cursor")
+        )
+    except InvalidCursorError:
+        return ApiErrorResponse(
+            status_code=400,
+            message="Invalid cursor",
+            details="Omit the cursor to start from the first page",
+        )
+
+    return ApiResponse({
+        "schemas": [
+            {
+                "id": schema.id,
+                "name": schema.name,
+                "description": schema.description,
+                "url": reverse("schema_detail", kwargs={"schema_id": schema.id}),
+            }
+            for schema in schemas
+        ],
+        "next_cursor": next_cursor,
+    })
+
+
 @require_POST
 @require_manifest
 @transaction.atomic
 @csrf_exempt
 def schemas_create(request, manifest):
     schema = Schema(created_by=request.user)
+    if wants_async_response(request):
+        return job_accepted_response(enqueue_manifest(manifest, schema))
     try:
         schema.overwrite_from_manifest(manifest)
     except DjangoValidationError as e:
@@ -73,6 +131,8 @@ def schemas_update(request, manifest, schema):
             message="Forbbiden",
             details="You are not authorized to make changes to this schema",
         )
+    if wants_async_response(request):
+        return job_accepted_response(enqueue_manifest(manifest, schema))
     try:
         schema.overwrite_from_manifest(manifest)
     except DjangoValidationError as e:
@@ -86,3 +146,9 @@ def schemas_update(request, manifest, schema):
             "url": reverse("schema_detail", kwargs={"schema_id": schema.id}),
         }
     )
+
+
+@require_GET
+def jobs_detail(request, job_id):
+    job = get_object_or_404(get_manifest_jobs(request.user), id=job_id)
+    return ApiResponse(data=get_job_data(job))
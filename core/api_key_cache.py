@@ -0,0 +1,135 @@
+"""
+Verified API key cache.
+
+Checking an API key secret is deliberately slow, so once a raw key has been
+verified we remember which profile/user it belongs to. Entries are keyed by
+a keyed digest of the raw key (never the key itself) and live in two tiers:
+
+  1. A small in-process TTL cache, so repeat requests on the same worker
+     don't even need a round trip to Valkey.
+  2. The shared Django cache (Valkey in staging/production), so a key verified
+     on one worker is trusted by the others.
+
+Deleting a key (which rotating it does) invalidates its entries once the
+deletion commits. Entries also remember the id of the key they were verified
+against, and callers must check it's still the profile's key, so a rotated
+or deleted key isn't trusted even if a request that verified it before the
+rotation caches it again afterwards.
+"""
+
+import logging
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+logger = logging.getLogger("schemaindex")
+
+_KEY_SALT = "core.api_key_cache"
+
+_local_cache = TTLCache(
+    maxsize=settings.API_KEY_LOCAL_CACHE_SIZE, ttl=settings.API_KEY_LOCAL_CACHE_TTL
+)
+# TTLCache isn't thread-safe, and sync_to_async runs ORM work in a thread pool
+_local_cache_lock = threading.Lock()
+
+
+def _get_api_key_digest(raw_api_key):
+    return salted_hmac(_KEY_SALT, raw_api_key, algorithm="sha256").hexdigest()
+
+
+def _get_owner_cache_key(digest):
+    return f"api_key_auth:owner:v2:{digest}"
+
+
+def _get_profile_cache_key(profile_id):
+    return f"api_key_auth:profile:{profile_id}"
+
+
+def get_cached_api_key_owner(raw_api_key):
+    """
+    Returns a (profile_id, user_id, api_key_id) tuple if this raw key was
+    recently verified, or None otherwise.
+    """
+    digest = _get_api_key_digest(raw_api_key)
+
+    with _local_cache_lock:
+        owner = _local_cache.get(digest)
+    if owner is not None:
+        return owner
+
+    try:
+        owner = cache.get(_get_owner_cache_key(digest))
+    except Exception as exc:
+        logger.warning(
+            "api_key_cache_backend_fallback operation=get exception=%s message=%s",
+            exc.__class__.__name__,
+            exc,
+        )
+        return None
+    if owner is None:
+        return None
+
+    owner = tuple(owner)
+    with _local_cache_lock:
+        _local_cache[digest] = owner
+    return owner
+
+
+def set_cached_api_key_owner(raw_api_key, profile_id, user_id, api_key_id):
+    digest = _get_api_key_digest(raw_api_key)
+    owner = (profile_id, user_id, api_key_id)
+
+    with _local_cache_lock:
+        _local_cache[digest] = owner
+
+    try:
+        cache.set_many(
+            {
+                _get_owner_cache_key(digest): owner,
+                # Profiles only have a single key, so remembering its digest
+                # is enough to find the entry again when the key is rotated.
+                _get_profile_cache_key(profile_id): digest,
+            },
+            timeout=settings.API_KEY_CACHE_TTL,
+        )
+    except Exception as exc:
+        logger.warning(
+            "api_key_cache_backend_fallback operation=set exception=%s message=%s",
+            exc.__class__.__name__,
+            exc,
+        )
+
+
+def invalidate_cached_api_key_owner(profile_id):
+    """
+    Forgets any verified key belonging to the profile.
+    """
+    with _local_cache_lock:
+        stale_digests = [
+            digest
+            for digest, (cached_profile_id, *_) in _local_cache.items()
+            if cached_profile_id == profile_id
+        ]
+        for digest in stale_digests:
+            del _local_cache[digest]
+
+    profile_cache_key = _get_profile_cache_key(profile_id)
+    try:
+        digest = cache.get(profile_cache_key)
+        if digest is not None:
+            cache.delete(_get_owner_cache_key(digest))
+        cache.delete(profile_cache_key)
+    except Exception as exc:
+        logger.warning(
+            "api_key_cache_backend_fallback operation=delete exception=%s message=%s",
+            exc.__class__.__name__,
+            exc,
+        )
+
+
+def clear_local_api_key_cache():
+    with _local_cache_lock:
+        _local_cache.clear()
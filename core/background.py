@@ -0,0 +1,70 @@
+"""
+In-process background tasks.
+
+A small thread pool for work that shouldn't hold up a response, such as
+refreshing stale cached content. Tasks are best-effort: they're lost if the
+process exits, so only schedule work that will be retried naturally later.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger("schemaindex")
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending_task_keys = set()
+_pending_task_keys_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_TASK_WORKERS,
+                    thread_name_prefix="schemaindex-background",
+                )
+    return _executor
+
+
+def _run_task(task_key, function):
+    try:
+        function()
+    except Exception as exc:
+        logger.warning(
+            "background_task_failed task_key=%s exception=%s message=%s",
+            task_key,
+            exc.__class__.__name__,
+            exc,
+        )
+    finally:
+        with _pending_task_keys_lock:
+            _pending_task_keys.discard(task_key)
+        # Worker threads outlive requests, so clean up their connections
+        close_old_connections()
+
+
+def schedule_background_task(task_key, function):
+    """
+    Runs `function` on a background thread, unless a task with the same
+    key is already pending. Returns whether the task was scheduled.
+    """
+    with _pending_task_keys_lock:
+        if task_key in _pending_task_keys:
+            return False
+        _pending_task_keys.add(task_key)
+
+    try:
+        _get_executor().submit(_run_task, task_key, function)
+    except RuntimeError:
+        # The executor shuts down with the interpreter
+        with _pending_task_keys_lock:
+            _pending_task_keys.discard(task_key)
+        return False
+    return True
@@ -0,0 +1,137 @@
+"""
+Short-lived locks in the shared cache.
+
+Used to make sure only one worker does a piece of expensive work (like
+refetching remote content) at a time. Locks expire on their own, so a
+worker that dies while holding one can't block the others for long.
+
+If the cache backend is unavailable, locks fall back to being held
+per-process, which still stops threads in the same worker from piling on.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from django.core.cache import cache
+
+logger = logging.getLogger("schemaindex")
+
+_POLL_INTERVAL = 0.05
+
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+def _acquire_local_lock(lock_key):
+    with _local_locks_lock:
+        lock = _local_locks.setdefault(lock_key, threading.Lock())
+    return lock.acquire(blocking=False)
+
+
+def _release_local_lock(lock_key):
+    with _local_locks_lock:
+        lock = _local_locks.pop(lock_key, None)
+    if lock is not None:
+        lock.release()
+
+
+def _log_backend_fallback(lock_key, exc):
+    logger.warning(
+        "cache_lock_backend_fallback lock_key=%s exception=%s message=%s",
+        lock_key,
+        exc.__class__.__name__,
+        exc,
+    )
+
+
+@contextmanager
+def cache_lock(lock_key, timeout):
+    """
+    Tries to take the lock without blocking, and yields whether it did.
+    The lock is released on exit, or after `timeout` seconds at the latest.
+    """
+    is_local = False
+    try:
+        acquired = cache.add(lock_key, 1, timeout=timeout)
+    except Exception as exc:
+        _log_backend_fallback(lock_key, exc)
+        is_local = True
+        acquired = _acquire_local_lock(lock_key)
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            if is_local:
+                _release_local_lock(lock_key)
+            else:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    # It'll expire on its own
+                    pass
+
+
+def wait_for_value(get_value, timeout):
+    """
+    Polls `get_value()` (usually a cache lookup) until it returns
+    something other than None, or `timeout` seconds pass.
+    Returns the value, or None if it never showed up.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(_POLL_INTERVAL)
+        try:
+            value = get_value()
+        except Exception:
+            return None
+        if value is not None:
+            return value
+    return None
+
+
+@asynccontextmanager
+async def acache_lock(lock_key, timeout):
+    """
+    Async version of cache_lock().
+    """
+    is_local = False
+    try:
+        acquired = await cache.aadd(lock_key, 1, timeout=timeout)
+    except Exception as exc:
+        _log_backend_fallback(lock_key, exc)
+        is_local = True
+        acquired = _acquire_local_lock(lock_key)
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            if is_local:
+                _release_local_lock(lock_key)
+            else:
+                try:
+                    await cache.adelete(lock_key)
+                except Exception:
+                    # It'll expire on its own
+                    pass
+
+
+async def await_value(aget_value, timeout):
+    """
+    Async version of wait_for_value(), which
+    leaves the event loop free while it waits.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_POLL_INTERVAL)
+        try:
+            value = await aget_value()
+        except Exception:
+            return None
+        if value is not None:
+            return value
+    return None
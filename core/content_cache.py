@@ -0,0 +1,335 @@
+"""
+Shared cache for remote content.
+
+Entries are keyed by the URL content is fetched from, not by the item that
+points at it, so every item with the same URL (a README that's also listed
+as a definition, the same file used by several schemas, an item that was
+deleted and added again) shares one entry, and one fetch.
+
+Each entry is stored in two parts:
+  - a small "pointer" under the URL's key, holding the freshness and
+    revalidation metadata along with the SHA-256 of the body, and
+  - the body, under its hash, so identical bodies served from different
+    URLs are only stored once.
+
+Bodies count the pointers to them, and are deleted once the last one moves
+to another body or is deleted. Counts can drift when pointers are evicted
+or expire, so bodies also expire on their own, no earlier than the newest
+pointer to them.
+
+Bodies are stored as UTF-8 bytes behind a one-byte header naming their
+encoding, and compressed with zlib once they're over
+CONTENT_CACHE_COMPRESSION_THRESHOLD bytes. Schemas and RFCs compress several
+times over, and Valkey memory is what limits how much content we can cache.
+Bodies written as plain strings by older versions are still read as-is.
+
+Renderings of a body (like a README's sanitized HTML) can be cached with
+get_rendering(), next to the body they came from. They're keyed by the
+body's hash and a renderer name, so they never need invalidating, but
+they're deleted along with the body anyway.
+
+In front of all that, each process keeps recently read entries in a local
+tier (see core/local_cache.py), bounded by CONTENT_LOCAL_CACHE_MAX_BYTES.
+Writes evict the URL from every process's tier. Stale entries are always
+read from the shared cache, in case another process has refreshed them.
+
+Callers see a single dict with the body under "content", as they always have.
+"""
+
+import hashlib
+import logging
+import sys
+import time
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .local_cache import LocalCache
+
+logger = logging.getLogger("schemaindex")
+
+_RAW_BODY_HEADER = b"r"
+_ZLIB_BODY_HEADER = b"z"
+
+_local_tier = LocalCache(
+    "content",
+    max_bytes=settings.CONTENT_LOCAL_CACHE_MAX_BYTES,
+    ttl=settings.CONTENT_LOCAL_CACHE_TTL,
+    getsizeof=lambda entry: sys.getsizeof(entry["content"]),
+)
+# Renderings never change for a given key, so this tier is never invalidated
+_rendering_local_tier = LocalCache(
+    "content_rendering",
+    max_bytes=settings.CONTENT_LOCAL_CACHE_MAX_BYTES,
+    ttl=settings.CONTENT_LOCAL_CACHE_TTL,
+    getsizeof=sys.getsizeof,
+)
+
+
+def _log_fallback(cache_key, operation, exc):
+    # django_redis IGNORE_EXCEPTIONS only catches ConnectionInterrupted.
+    # Anything else (serialization issues, etc.) is logged here so the
+    # cache failure is visible without breaking the request.
+    logger.warning(
+        "content_cache_backend_fallback cache_key=%s "
+        "operation=%s exception=%s message=%s",
+        cache_key,
+        operation,
+        exc.__class__.__name__,
+        exc,
+    )
+
+
+def _get_entry_timeout():
+    # Stale entries are kept (and served) a while longer
+    # so they can be refreshed without anyone waiting on it
+    return settings.CONTENT_CACHE_TTL + settings.CONTENT_CACHE_STALE_TTL
+
+
+def get_url_cache_key(url):
+    url_digest = hashlib.sha256(url.encode()).hexdigest()
+    return f"content:url:{url_digest}"
+
+
+def _get_body_cache_key(body_hash):
+    return f"content:body:{body_hash}"
+
+
+def _get_body_refs_cache_key(body_hash):
+    return f"content:body:{body_hash}:refs"
+
+
+def _get_body_renderings_cache_key(body_hash):
+    return f"content:body:{body_hash}:renderings"
+
+
+def _get_rendering_cache_key(body_hash, renderer):
+    return f"content:body:{body_hash}:rendering:{renderer}"
+
+
+def _get_body_hash(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def encode_body(content):
+    body = content.encode()
+    if len(body) >= settings.CONTENT_CACHE_COMPRESSION_THRESHOLD:
+        compressed_body = zlib.compress(
+            body, level=settings.CONTENT_CACHE_COMPRESSION_LEVEL
+        )
+        # Some content (like minified JSON) barely compresses
+        if len(compressed_body) < len(body):
+            return _ZLIB_BODY_HEADER + compressed_body
+    return _RAW_BODY_HEADER + body
+
+
+def decode_body(value):
+    if isinstance(value, str):
+        # Written before bodies were encoded
+        return value
+    header, body = value[:1], value[1:]
+    if header == _ZLIB_BODY_HEADER:
+        body = zlib.decompress(body)
+    elif header != _RAW_BODY_HEADER:
+        raise ValueError(f"Unknown content body encoding {header!r}")
+    return body.decode()
+
+
+def _get_pointer(cache_key):
+    pointer = cache.get(cache_key)
+    # Anything else is an entry in an older format
+    if isinstance(pointer, dict) and "body_hash" in pointer:
+        return pointer
+    return None
+
+
+def _get_local_entry(url):
+    entry = _local_tier.get(url)
+    if entry is not None and time.time() < entry["fresh_until"]:
+        return entry
+    return None
+
+
+def _set_local_entry(url, entry):
+    if entry is not None and time.time() < entry["fresh_until"]:
+        _local_tier.set(url, entry)
+
+
+def get_entry(url):
+    """
+    Returns the cached entry for `url`, or None on a miss.
+    """
+    entry = _get_local_entry(url)
+    if entry is None:
+        entry = _get_shared_entry(url)
+        _set_local_entry(url, entry)
+    return entry
+
+
+async def aget_entry(url):
+    """
+    Async version of get_entry().
+    """
+    # Local hits don't need a trip to a thread
+    entry = _get_local_entry(url)
+    if entry is None:
+        entry = await _aget_shared_entry(url)
+        _set_local_entry(url, entry)
+    return entry
+
+
+def _get_shared_entry(url):
+    cache_key = get_url_cache_key(url)
+    try:
+        pointer = _get_pointer(cache_key)
+        if pointer is None:
+            return None
+        body = cache.get(_get_body_cache_key(pointer["body_hash"]))
+        if body is None:
+            # The body was evicted, so there's nothing to revalidate against
+            return None
+        content = decode_body(body)
+    except Exception as exc:
+        _log_fallback(cache_key, "get", exc)
+        return None
+
+    return {**pointer, "content": content}
+
+
+def _add_body_reference(body_hash, timeout):
+    refs_cache_key = _get_body_refs_cache_key(body_hash)
+    cache.add(refs_cache_key, 0, timeout=timeout)
+    cache.incr(refs_cache_key)
+
+
+def _remove_body_reference(body_hash):
+    refs_cache_key = _get_body_refs_cache_key(body_hash)
+    try:
+        refs = cache.decr(refs_cache_key)
+    except ValueError:
+        # The count is gone, so leave the body to expire on its own
+        return
+    if refs <= 0:
+        renderings_cache_key = _get_body_renderings_cache_key(body_hash)
+        cache.delete_many([
+            _get_body_cache_key(body_hash),
+            refs_cache_key,
+            renderings_cache_key,
+            *(cache.get(renderings_cache_key) or []),
+        ])
+
+
+def set_entry(url, entry):
+    """
+    Caches `entry` for `url`, sharing its body with any other
+    entry that has the same content.
+    """
+    cache_key = get_url_cache_key(url)
+    content = entry["content"]
+    body_hash = _get_body_hash(content)
+    pointer = {key: value for key, value in entry.items() if key != "content"}
+    pointer["body_hash"] = body_hash
+    timeout = _get_entry_timeout()
+
+    try:
+        previous_pointer = _get_pointer(cache_key)
+        previous_body_hash = previous_pointer and previous_pointer["body_hash"]
+
+        # Write (or extend) the body before anything points at it
+        cache.set(_get_body_cache_key(body_hash), encode_body(content), timeout=timeout)
+        if previous_body_hash != body_hash:
+            _add_body_reference(body_hash, timeout)
+        cache.touch(_get_body_refs_cache_key(body_hash), timeout=timeout)
+        cache.set(cache_key, pointer, timeout=timeout)
+
+        if previous_body_hash and previous_body_hash != body_hash:
+            _remove_body_reference(previous_body_hash)
+    except Exception as exc:
+        _log_fallback(cache_key, "set", exc)
+
+    _local_tier.invalidate(url)
+
+
+def delete_entry(url):
+    cache_key = get_url_cache_key(url)
+    try:
+        pointer = _get_pointer(cache_key)
+        cache.delete(cache_key)
+        if pointer is not None:
+            _remove_body_reference(pointer["body_hash"])
+    except Exception as exc:
+        _log_fallback(cache_key, "delete", exc)
+
+    _local_tier.invalidate(url)
+
+
+def get_rendering(content, renderer, render):
+    """
+    Returns `render(content)`, only calling it once per body and renderer.
+    `render` must return a string, and always the same one for the same
+    content, so `renderer` should change along with anything that affects
+    its output.
+    """
+    body_hash = _get_body_hash(content)
+    cache_key = _get_rendering_cache_key(body_hash, renderer)
+
+    rendering = _rendering_local_tier.get(cache_key)
+    if rendering is not None:
+        return rendering
+
+    try:
+        value = cache.get(cache_key)
+        if value is not None:
+            rendering = decode_body(value)
+    except Exception as exc:
+        _log_fallback(cache_key, "get_rendering", exc)
+
+    if rendering is None:
+        rendering = render(content)
+        timeout = _get_entry_timeout()
+        renderings_cache_key = _get_body_renderings_cache_key(body_hash)
+        try:
+            cache.set(cache_key, encode_body(rendering), timeout=timeout)
+            # Remembered so they can be deleted along with the body
+            rendering_cache_keys = cache.get(renderings_cache_key) or []
+            if cache_key not in rendering_cache_keys:
+                cache.set(
+                    renderings_cache_key,
+                    [*rendering_cache_keys, cache_key],
+                    timeout=timeout,
+                )
+        except Exception as exc:
+            _log_fallback(cache_key, "set_rendering", exc)
+
+    _rendering_local_tier.set(cache_key, rendering)
+    return rendering
+
+
+_aget_rendering = sync_to_async(get_rendering, thread_sensitive=False)
+
+
+async def aget_rendering(content, renderer, render):
+    """
+    Async version of get_rendering(). Rendering runs off the event loop.
+    """
+    rendering = _rendering_local_tier.get(
+        _get_rendering_cache_key(_get_body_hash(content), renderer)
+    )
+    if rendering is not None:
+        return rendering
+    return await _aget_rendering(content, renderer, render)
+
+
+def clear_local_content_cache():
+    _local_tier.clear()
+    _rendering_local_tier.clear()
+
+
+# Each of these is several cache calls, and django-redis has no native async
+# API (Django would run each call in a thread anyway), so async callers make
+# one trip to a thread instead. The cache clients are thread-safe, so there's
+# no need to funnel every call through a single thread.
+_aget_shared_entry = sync_to_async(_get_shared_entry, thread_sensitive=False)
+aset_entry = sync_to_async(set_entry, thread_sensitive=False)
@@ -3,7 +3,14 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 import requests
-from .models import DocumentationItem, SchemaRef, Schema, PermanentURL
+from . import http_client
+from .models import (
+    DocumentationItem,
+    SchemaRef,
+    Schema,
+    PermanentURL,
+    URLProviderInfo,
+)
 from .utils import (
     guess_specification_language_by_extension,
     is_trusted_content_host_url,
@@ -41,7 +48,9 @@ def clean_url_and_get_body(url):
         return ""
 
     try:
-        response = requests.get(url)
+        response = http_client.fetch(url)
+    except http_client.ResponseTooLargeError:
+        raise ValidationError("The provided URL's content is too large")
     except requests.exceptions.RequestException:
         raise ValidationError("The provided URL could not be reached")
 
@@ -83,20 +92,20 @@ class SchemaRefForm(ReferenceItemForm):
         # If the schema is unpublished, we don't care if the URL or $id are already in use
         if (
             self.schema_id is None
-            or not Schema.objects.public().filter(id=self.schema_id).exists()
+            or not Schema.objects.published().filter(id=self.schema_id).exists()
         ):
             return url
 
         # But if it's a published schema, we need to make sure the URL and $id aren't already in use
-        schema_refs = SchemaRef.objects.select_related("schema").filter(
-            schema__in=Schema.objects.public().exclude(id=self.schema_id)
+        schema_refs = SchemaRef.objects.filter(
+            schema__in=Schema.objects.published().exclude(id=self.schema_id)
         )
         # First check the URL
-        for schema_ref in schema_refs:
-            if schema_ref.url_provider_info.is_same_resource(url):
-                raise ValidationError(
-                    "The provided URL is already in use by another Schema"
-                )
+        canonical_url = URLProviderInfo.from_url(url).canonical_resource
+        if schema_refs.filter(canonical_url=canonical_url).exists():
+            raise ValidationError(
+                "The provided URL is already in use by another Schema"
+            )
 
         if matched_language != "json":
             return url
@@ -112,11 +121,10 @@ class SchemaRefForm(ReferenceItemForm):
         if id_value is None:
             return url
 
-        for schema_ref in schema_refs:
-            if schema_ref.id_value == id_value:
-                raise ValidationError(
-                    "A JSON schema with this resource's $id is already in use by another Schema"
-                )
+        if schema_refs.filter(id_value=id_value).exists():
+            raise ValidationError(
+                "A JSON schema with this resource's $id is already in use by another Schema"
+            )
 
         return url
 
@@ -0,0 +1,228 @@
+"""
+Shared HTTP client for fetching remote content.
+
+Every worker process keeps a single requests.Session, so repeated fetches
+from the same host (usually GitHub) reuse pooled connections instead of
+paying for a new TCP and TLS handshake each time.
+
+Async code (like the ASGI detail views) uses afetch() instead, which does
+the same over one pooled httpx.AsyncClient per event loop, so a worker can
+overlap many fetches without tying up a thread for each.
+
+Fetches are bounded in every direction:
+  - connect and read timeouts for each attempt,
+  - a Deadline shared by all attempts of a retried fetch,
+  - CONTENT_FETCH_MAX_BYTES for the body, which is streamed
+    so oversized responses are rejected without being read in full.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+import requests.adapters
+import requests.exceptions
+from django.conf import settings
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+# Async clients are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class ResponseTooLargeError(requests.exceptions.RequestException):
+    """
+    Exception raised when a response body exceeds CONTENT_FETCH_MAX_BYTES.
+    """
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    """
+    Exception raised when a fetch runs out of its overall time budget.
+    """
+
+
+class Deadline:
+    """
+    A time budget shared by every attempt of a fetch, including retries.
+    """
+
+    def __init__(self, seconds=None):
+        if seconds is None:
+            seconds = settings.CONTENT_FETCH_DEADLINE
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0)
+
+    def allows(self, seconds):
+        return self.remaining() > seconds
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=settings.CONTENT_FETCH_POOL_SIZE,
+                    pool_maxsize=settings.CONTENT_FETCH_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def fetch(url, deadline=None, headers=None):
+    """
+    GETs `url` with the shared session and returns the response
+    with its body already read. HTTP error statuses are not raised,
+    so callers should check the response.
+
+    Raises:
+        ResponseTooLargeError: If the body exceeds CONTENT_FETCH_MAX_BYTES.
+        DeadlineExceededError: If `deadline` runs out.
+        requests.exceptions.RequestException: For any other failure.
+    """
+    if deadline is None:
+        deadline = Deadline()
+    if not deadline.allows(0):
+        raise DeadlineExceededError(f"Deadline exceeded before fetching {url}")
+
+    timeout = (
+        min(settings.CONTENT_FETCH_CONNECT_TIMEOUT, deadline.remaining()),
+        min(settings.CONTENT_FETCH_READ_TIMEOUT, deadline.remaining()),
+    )
+    max_bytes = settings.CONTENT_FETCH_MAX_BYTES
+
+    with get_session().get(
+        url, headers=headers, timeout=timeout, stream=True
+    ) as response:
+        content_length = response.headers.get("Content-Length")
+        if (
+            content_length
+            and content_length.isdigit()
+            and int(content_length) > max_bytes
+        ):
+            raise ResponseTooLargeError(
+                f"{url} is {content_length} bytes, over the {max_bytes} byte limit"
+            )
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ResponseTooLargeError(f"{url} is over the {max_bytes} byte limit")
+            # Read timeouts only apply to each read, so a slow trickle
+            # of data could otherwise outlast the deadline.
+            if not deadline.allows(0):
+                raise DeadlineExceededError(f"Deadline exceeded while reading {url}")
+            chunks.append(chunk)
+
+        # Let requests decode the body as usual via response.text
+        response._content = b"".join(chunks)
+    return response
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.CONTENT_FETCH_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CONTENT_FETCH_POOL_SIZE,
+            ),
+            # Match requests, which follows redirects by default
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client():
+    """
+    Closes the event loop's shared httpx client, if it has one.
+    Call it before the loop is closed, e.g. at the end of asyncio.run().
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def afetch(url, deadline=None, headers=None):
+    """
+    Async version of fetch(), using the event loop's shared httpx client.
+    Returns an httpx.Response with its body already read. HTTP error
+    statuses are not raised, so callers should check the response.
+
+    Raises the same exceptions as fetch(), so callers can handle
+    both in one place. httpx errors are raised as their requests
+    equivalents.
+    """
+    if deadline is None:
+        deadline = Deadline()
+    if not deadline.allows(0):
+        raise DeadlineExceededError(f"Deadline exceeded before fetching {url}")
+
+    connect_timeout = min(settings.CONTENT_FETCH_CONNECT_TIMEOUT, deadline.remaining())
+    timeout = httpx.Timeout(
+        min(settings.CONTENT_FETCH_READ_TIMEOUT, deadline.remaining()),
+        connect=connect_timeout,
+        # Waiting for a free pooled connection counts as connecting
+        pool=connect_timeout,
+    )
+    max_bytes = settings.CONTENT_FETCH_MAX_BYTES
+
+    try:
+        # Unlike fetch(), the whole request can be cancelled
+        # once the deadline runs out, even mid-read
+        async with asyncio.timeout(deadline.remaining()):
+            async with get_async_client().stream(
+                "GET", url, headers=headers, timeout=timeout
+            ) as response:
+                content_length = response.headers.get("Content-Length")
+                if (
+                    content_length
+                    and content_length.isdigit()
+                    and int(content_length) > max_bytes
+                ):
+                    raise ResponseTooLargeError(
+                        f"{url} is {content_length} bytes, over the {max_bytes} byte limit"
+                    )
+
+                chunks = []
+                size = 0
+                async for chunk in response.aiter_bytes(chunk_size=_STREAM_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ResponseTooLargeError(
+                            f"{url} is over the {max_bytes} byte limit"
+                        )
+                    chunks.append(chunk)
+    except TimeoutError as e:
+        raise DeadlineExceededError(f"Deadline exceeded while fetching {url}") from e
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+    # A new response, since the streamed one can't be read again once closed.
+    # The chunks are already decoded, so drop the headers describing the encoding.
+    headers = response.headers.copy()
+    headers.pop("Content-Encoding", None)
+    headers.pop("Content-Length", None)
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=headers,
+        content=b"".join(chunks),
+        request=response.request,
+    )
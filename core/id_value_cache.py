@@ -0,0 +1,66 @@
+"""
+Cache of the $id values read from JSON Schema content.
+
+SchemaRefs save the $id of their own content, but checking a manifest for
+conflicts happens before anything is saved, and needs the $id of every
+definition in it. So whenever a $id is read from content, it's also cached
+under the URL the content was fetched from (like core/content_cache.py),
+and a whole manifest's worth can be read back with a single get_many().
+
+Content without a $id is cached too, so a miss always means "not read yet".
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("schemaindex")
+
+
+def _log_fallback(operation, exc):
+    logger.warning(
+        "id_value_cache_backend_fallback operation=%s exception=%s message=%s",
+        operation,
+        exc.__class__.__name__,
+        exc,
+    )
+
+
+def _get_cache_key(content_url):
+    url_digest = hashlib.sha256(content_url.encode()).hexdigest()
+    return f"id_value:url:{url_digest}"
+
+
+def get_id_values(content_urls):
+    """
+    Returns a dict of the cached $id (possibly None) of each content URL,
+    leaving out the ones that haven't been read.
+    """
+    content_urls_by_cache_key = {
+        _get_cache_key(content_url): content_url for content_url in content_urls
+    }
+    if not content_urls_by_cache_key:
+        return {}
+    try:
+        cached_values = cache.get_many(list(content_urls_by_cache_key))
+    except Exception as exc:
+        _log_fallback("get", exc)
+        return {}
+    return {
+        content_urls_by_cache_key[cache_key]: value["id_value"]
+        for cache_key, value in cached_values.items()
+    }
+
+
+def set_id_value(content_url, id_value):
+    try:
+        cache.set(
+            _get_cache_key(content_url),
+            {"id_value": id_value},
+            # As long as the content itself is kept
+            timeout=settings.CONTENT_CACHE_TTL + settings.CONTENT_CACHE_STALE_TTL,
+        )
+    except Exception as exc:
+        _log_fallback("set", exc)
@@ -0,0 +1,329 @@
+"""
+Background jobs, queued in Postgres.
+
+Slow side effects (remote fetches, emails) are queued as Job rows and run by
+`python3 manage.py run_jobs`, so requests don't have to wait on them. There's
+no broker: workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+number of them can poll the table without handing out a job twice. Jobs are
+queued in the caller's transaction, so they only run if it commits.
+
+Tasks are functions decorated with @task, which take JSON-serializable keyword
+arguments and return a JSON-serializable result (or None). A task that raises
+is retried with exponential backoff, up to its max_attempts, unless it raises
+PermanentError, which fails the job straight away. Tasks defined with
+@task(bind=True) are also passed their Job first, e.g. to record progress for
+a retry to pick up. While a job with
+a given dedupe_key is queued, queuing another one with the same key returns
+the queued one instead, so a burst of changes to one thing runs one job.
+
+Each queue in JOB_QUEUES runs at most that many jobs at once, across all
+workers. Workers hold a Postgres advisory lock on one of the queue's "slots"
+while they run a job, so the limit needs no coordination beyond the database.
+
+Jobs run at least once: if a worker dies mid-job, the job stays running until
+JOB_LEASE_TIMEOUT passes, and is then claimed again. Tasks should be idempotent.
+"""
+
+import hashlib
+import logging
+import random
+from datetime import timedelta
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger("schemaindex")
+
+DEFAULT_QUEUE = "default"
+
+# Retries are spread out by up to this fraction of their backoff,
+# so jobs that failed together don't all retry together
+_RETRY_JITTER = 0.25
+
+
+class PermanentError(Exception):
+    """
+    Raised by a task to fail its job without retrying it, e.g. when its
+    arguments are invalid. The message is recorded as the job's last_error.
+    """
+
+
+class Task:
+    def __init__(self, function, queue, max_attempts, bind):
+        update_wrapper(self, function)
+        self.function = function
+        self.name = f"{function.__module__}.{function.__qualname__}"
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.bind = bind
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def run(self, job):
+        if self.bind:
+            return self(job, **job.arguments)
+        return self(**job.arguments)
+
+    def enqueue(self, dedupe_key=None, delay=0, **kwargs):
+        """
+        Queues a run of this task with `kwargs`, after `delay` seconds.
+        Returns the Job, which is the one already queued if there's one
+        with the same `dedupe_key`.
+        """
+        job = Job(
+            queue=self.queue,
+            task=self.name,
+            arguments=kwargs,
+            dedupe_key=dedupe_key,
+            max_attempts=self.max_attempts or settings.JOB_MAX_ATTEMPTS,
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )
+        if dedupe_key is None:
+            job.save()
+            return job
+
+        try:
+            # A savepoint, so a duplicate doesn't break the caller's transaction
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            queued_job = Job.objects.filter(
+                dedupe_key=dedupe_key, status=Job.Status.QUEUED
+            ).first()
+            # It was claimed in the meantime, so it may have missed our changes
+            return queued_job or self.enqueue(dedupe_key, delay, **kwargs)
+
+    def enqueue_many(self, runs):
+        """
+        Queues a run of this task for each `(dedupe_key, kwargs)` in `runs`,
+        in a single query. Runs whose dedupe_key is already queued are skipped.
+        """
+        now = timezone.now()
+        Job.objects.bulk_create(
+            [
+                Job(
+                    queue=self.queue,
+                    task=self.name,
+                    arguments=kwargs,
+                    dedupe_key=dedupe_key,
+                    max_attempts=self.max_attempts or settings.JOB_MAX_ATTEMPTS,
+                    run_after=now,
+                )
+                for dedupe_key, kwargs in runs
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def task(queue=DEFAULT_QUEUE, max_attempts=None, bind=False):
+    """
+    Makes a function runnable as a background job, with `.enqueue(**kwargs)`.
+    It must be defined at the top level of a module, so workers can import it.
+    If `bind`, it's called with its Job as the first argument.
+    """
+
+    def decorator(function):
+        return Task(function, queue, max_attempts, bind)
+
+    return decorator
+
+
+def _get_retry_backoff(attempts):
+    backoff = min(
+        settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_BACKOFF,
+    )
+    return backoff * random.uniform(1, 1 + _RETRY_JITTER)
+
+
+def claim_job(queue):
+    """
+    Marks the next due job in `queue` as running and returns it,
+    or returns None if there's nothing to do.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(queue=queue)
+            .filter(
+                Q(status=Job.Status.QUEUED, run_after__lte=now)
+                # Left behind by a worker that died
+                | Q(
+                    status=Job.Status.RUNNING,
+                    started_at__lt=now - timedelta(seconds=settings.JOB_LEASE_TIMEOUT),
+                )
+            )
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=["status", "attempts", "started_at", "updated_at"])
+    return job
+
+
+def _record_success(job, result):
+    job.status = Job.Status.SUCCEEDED
+    job.result = result
+    job.last_error = ""
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=["status", "result", "last_error", "finished_at", "updated_at"]
+    )
+
+
+def _record_failure(job, exc):
+    if isinstance(exc, PermanentError):
+        job.last_error = str(exc)
+    else:
+        job.last_error = f"{exc.__class__.__name__}: {exc}"
+    if job.attempts < job.max_attempts and not isinstance(exc, PermanentError):
+        job.status = Job.Status.QUEUED
+        job.run_after = timezone.now() + timedelta(
+            seconds=_get_retry_backoff(job.attempts)
+        )
+        try:
+            with transaction.atomic():
+                job.save(
+                    update_fields=["status", "run_after", "last_error", "updated_at"]
+                )
+            return
+        except IntegrityError:
+            # A newer job with the same dedupe key is queued, and will
+            # do the same work, so there's no need to retry this one
+            pass
+
+    job.status = Job.Status.FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "last_error", "finished_at", "updated_at"])
+
+
+def run_job(job):
+    """
+    Runs a claimed job, recording its result or scheduling a retry.
+    """
+    try:
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("Ran out of attempts after its worker stopped")
+        task = import_string(job.task)
+        if not isinstance(task, Task):
+            raise TypeError(f"{job.task} isn't a task")
+        result = task.run(job)
+    except Exception as exc:
+        logger.warning(
+            "job_failed job_id=%s task=%s attempt=%s exception=%s message=%s",
+            job.id,
+            job.task,
+            job.attempts,
+            exc.__class__.__name__,
+            exc,
+        )
+        _record_failure(job, exc)
+    else:
+        _record_success(job, result)
+
+
+def run_pending_jobs(queues=None):
+    """
+    Runs due jobs on this thread until there are none left,
+    ignoring queue concurrency limits. Returns how many ran.
+    """
+    queues = queues or list(settings.JOB_QUEUES)
+    job_count = 0
+    while True:
+        jobs = [job for job in map(claim_job, queues) if job is not None]
+        if not jobs:
+            return job_count
+        for job in jobs:
+            run_job(job)
+        job_count += len(jobs)
+
+
+def _get_queue_lock_id(queue):
+    # Advisory lock keys are pairs of 32-bit ints: one for the queue,
+    # one for the slot
+    digest = hashlib.sha256(f"schemaindex:jobs:{queue}".encode()).digest()
+    return int.from_bytes(digest[:4], "big", signed=True)
+
+
+def _acquire_queue_slot(queue):
+    with connection.cursor() as cursor:
+        for slot in range(settings.JOB_QUEUES[queue]):
+            cursor.execute(
+                "SELECT pg_try_advisory_lock(%s, %s)", [_get_queue_lock_id(queue), slot]
+            )
+            if cursor.fetchone()[0]:
+                return slot
+    return None
+
+
+def _release_queue_slot(queue, slot):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_unlock(%s, %s)", [_get_queue_lock_id(queue), slot]
+        )
+
+
+def work(queue, stop_event, burst=False):
+    """
+    Runs jobs from `queue` until `stop_event` is set, or until
+    the queue is empty if `burst`. Meant to run on its own thread.
+    """
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                ran_job = _work_once(queue)
+            except Exception as exc:
+                # Most likely the database went away, so try again in a bit
+                logger.warning(
+                    "job_worker_error queue=%s exception=%s message=%s",
+                    queue,
+                    exc.__class__.__name__,
+                    exc,
+                )
+                connection.close()
+                ran_job = False
+            if not ran_job:
+                if burst:
+                    return
+                stop_event.wait(settings.JOB_POLL_INTERVAL)
+    finally:
+        connection.close()
+
+
+def _work_once(queue):
+    slot = _acquire_queue_slot(queue)
+    if slot is None:
+        # Other workers are using all of the queue's slots
+        return False
+    try:
+        job = claim_job(queue)
+        if job is not None:
+            run_job(job)
+    finally:
+        _release_queue_slot(queue, slot)
+    return job is not None
+
+
+def prune_jobs():
+    """
+    Deletes jobs that finished more than JOB_RETENTION seconds ago.
+    """
+    deleted_count, _ = Job.objects.filter(
+        finished_at__lt=timezone.now() - timedelta(seconds=settings.JOB_RETENTION)
+    ).delete()
+    return deleted_count
@@ -0,0 +1,141 @@
+"""
+In-process cache tiers, kept coherent across processes.
+
+A LocalCache sits in front of the shared Django cache for hot, read-mostly
+values, so repeat reads on the same worker skip the round trip to Valkey
+(and unpickling the value). Each tier is bounded by the total size of its
+values in bytes, and entries also expire after a short TTL.
+
+Writers call `invalidate()`, which evicts the key here and, when the shared
+cache is Valkey, publishes it so every other process evicts it too. Each
+process listens on a background thread. Messages can be missed (say, while
+reconnecting), which is what the TTL is for; tiers are also cleared
+whenever the listener (re)connects.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from cachetools import TTLCache
+
+logger = logging.getLogger("schemaindex")
+
+INVALIDATION_CHANNEL = "schemaindex:local_cache:invalidate"
+_RECONNECT_INTERVAL = 5
+
+_local_caches = {}
+_listener_thread = None
+_listener_lock = threading.Lock()
+
+
+def _log_fallback(operation, exc):
+    logger.warning(
+        "local_cache_backend_fallback operation=%s exception=%s message=%s",
+        operation,
+        exc.__class__.__name__,
+        exc,
+    )
+
+
+def _get_redis_connection():
+    # Broadcasting needs Valkey. Other backends (like locmem in development
+    # and tests) are per-process anyway, so local eviction is enough.
+    from django_redis import get_redis_connection
+
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+class LocalCache:
+    def __init__(self, name, max_bytes, ttl, getsizeof):
+        self.name = name
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=getsizeof)
+        # TTLCache isn't thread-safe, and sync_to_async runs work in a thread pool
+        self._lock = threading.Lock()
+        _local_caches[name] = self
+
+    def get(self, key):
+        _start_listener()
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # Bigger than the whole tier, so leave it in the shared cache
+                pass
+
+    def evict(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def invalidate(self, key):
+        """
+        Evicts `key` from this tier in every process.
+        """
+        self.evict(key)
+        try:
+            connection = _get_redis_connection()
+            if connection is not None:
+                connection.publish(INVALIDATION_CHANNEL, json.dumps([self.name, key]))
+        except Exception as exc:
+            _log_fallback("publish", exc)
+
+
+def _handle_message(message):
+    try:
+        name, key = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    local_cache = _local_caches.get(name)
+    if local_cache is not None:
+        local_cache.evict(key)
+
+
+def _listen():
+    while True:
+        pubsub = None
+        try:
+            connection = _get_redis_connection()
+            if connection is None:
+                return
+            pubsub = connection.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # We can't know what was invalidated while we weren't listening
+            for local_cache in _local_caches.values():
+                local_cache.clear()
+            while True:
+                # Polls, since the connection pool's socket timeout
+                # would break a blocking read on an idle channel
+                message = pubsub.get_message(timeout=1)
+                if message is not None:
+                    _handle_message(message)
+        except Exception as exc:
+            _log_fallback("listen", exc)
+            time.sleep(_RECONNECT_INTERVAL)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+
+def _start_listener():
+    global _listener_thread
+    if _listener_thread is not None:
+        return
+    with _listener_lock:
+        if _listener_thread is None:
+            # Started lazily, so it runs in each worker process after forking
+            _listener_thread = threading.Thread(
+                target=_listen, name="schemaindex-local-cache", daemon=True
+            )
+            _listener_thread.start()
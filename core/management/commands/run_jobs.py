@@ -0,0 +1,73 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import jobs
+
+# How often finished jobs are pruned, in seconds
+PRUNE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs until stopped. Run as many of these as needed: "
+        "queue concurrency limits hold across all of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Only run jobs from this queue (can be repeated)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once there are no jobs left to run",
+        )
+
+    def handle(self, *args, **options):
+        queues = options["queues"] or list(settings.JOB_QUEUES)
+        unknown_queues = set(queues) - set(settings.JOB_QUEUES)
+        if unknown_queues:
+            raise CommandError(f"Unknown queue(s): {', '.join(sorted(unknown_queues))}")
+
+        stop_event = threading.Event()
+        if not options["burst"]:
+            # Finish the jobs in progress before exiting
+            for signal_number in [signal.SIGINT, signal.SIGTERM]:
+                signal.signal(signal_number, lambda *args: stop_event.set())
+
+        # One thread per slot. Any more would only wait for a free slot.
+        threads = [
+            threading.Thread(
+                target=jobs.work,
+                args=(queue, stop_event, options["burst"]),
+                name=f"schemaindex-jobs-{queue}-{slot}",
+            )
+            for queue in queues
+            for slot in range(settings.JOB_QUEUES[queue])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(
+            f"Running jobs from {', '.join(queues)} with {len(threads)} thread(s)"
+        )
+
+        pruned_at = None
+        while any(thread.is_alive() for thread in threads):
+            if not options["burst"] and (
+                pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL
+            ):
+                pruned_at = time.monotonic()
+                pruned_count = jobs.prune_jobs()
+                if pruned_count:
+                    self.stdout.write(f"Pruned {pruned_count} finished job(s)")
+            for thread in threads:
+                thread.join(timeout=1)
+
+        self.stdout.write(self.style.SUCCESS("Stopped"))
@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import requests.exceptions
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from core.http_client import Deadline, ResponseTooLargeError, aclose_async_client
+from core.models import DocumentationItem, ReferenceItem, Schema, SchemaRef
+from core.tasks import send_content_failure_email
+from core.utils import is_trusted_content_host_url
+
+logger = logging.getLogger("schemaindex")
+
+ContentFetchOutcome = ReferenceItem.ContentFetchOutcome
+
+OUTCOME_FIELDS = [
+    "content_fetch_failing_since",
+    "content_fetched_at",
+    "content_fetch_outcome",
+    "content_fetch_duration",
+    "content_size",
+]
+
+
+def get_fetch_outcome(exception):
+    if exception is None:
+        return ContentFetchOutcome.SUCCESS
+    if isinstance(exception, requests.exceptions.HTTPError):
+        return ContentFetchOutcome.HTTP_ERROR
+    if isinstance(exception, ResponseTooLargeError):
+        return ContentFetchOutcome.TOO_LARGE
+    if isinstance(exception, requests.exceptions.Timeout):
+        return ContentFetchOutcome.TIMEOUT
+    return ContentFetchOutcome.UNREACHABLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh cached content for the reference items of published schemas, "
+        "so visitors don't wait on remote fetches. Meant to be run on a schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="How many items to fetch at once",
+        )
+        parser.add_argument(
+            "--per-host",
+            type=int,
+            default=4,
+            help="How many items to fetch at once from any one host",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=300,
+            help="Seconds after which no new fetches are started",
+        )
+
+    def handle(self, *args, **options):
+        # Only content we actually show: definitions and documentation.
+        # Least recently fetched first (across both models), so runs that go
+        # over the time budget still get to everything eventually.
+        reference_items = [
+            reference_item
+            for reference_item in heapq.merge(
+                *(
+                    model_class.objects
+                    .filter(schema__in=Schema.objects.public())
+                    .select_related("schema", "created_by")
+                    .order_by(F("content_fetched_at").asc(nulls_first=True), "id")
+                    for model_class in [SchemaRef, DocumentationItem]
+                ),
+                key=lambda reference_item: (
+                    reference_item.content_fetched_at is not None,
+                    reference_item.content_fetched_at,
+                ),
+            )
+            if is_trusted_content_host_url(reference_item._get_content_url())
+        ]
+
+        results = asyncio.run(
+            self._warm(
+                reference_items,
+                concurrency=options["concurrency"],
+                per_host=options["per_host"],
+                budget=Deadline(options["time_budget"]),
+            )
+        )
+
+        outcome_counts = {}
+        for reference_item, exception in results.items():
+            self._record_fetch_outcome(reference_item, exception)
+            outcome = reference_item.content_fetch_outcome
+            outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"{outcome} {reference_item.url} "
+                    f"duration={reference_item.content_fetch_duration.total_seconds():.2f}s "
+                    f"size={reference_item.content_size}"
+                )
+
+        for model_class in [SchemaRef, DocumentationItem]:
+            model_class.objects.bulk_update(
+                [
+                    reference_item
+                    for reference_item in results
+                    if isinstance(reference_item, model_class)
+                ],
+                OUTCOME_FIELDS,
+            )
+
+        skipped_count = len(reference_items) - len(results)
+        summary = ", ".join(
+            f"{outcome}={count}" for outcome, count in sorted(outcome_counts.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fetched {len(results)} item(s) ({summary or 'none'}), "
+                f"skipped {skipped_count} for lack of time"
+            )
+        )
+
+    async def _warm(self, reference_items, concurrency, per_host, budget):
+        semaphore = asyncio.Semaphore(concurrency)
+        host_semaphores = {}
+        results = {}
+
+        async def warm(reference_item):
+            host = urlparse(reference_item._get_content_url()).hostname
+            host_semaphore = host_semaphores.setdefault(
+                host, asyncio.Semaphore(per_host)
+            )
+            async with host_semaphore, semaphore:
+                # Leave the rest for the next run
+                if not budget.allows(0):
+                    return
+                started_at = time.monotonic()
+                try:
+                    entry = await reference_item.awarm_cached_content()
+                except requests.exceptions.RequestException as e:
+                    entry, exception = None, e
+                except Exception as e:
+                    # Record it as a failure rather than losing
+                    # every other item's outcome
+                    logger.warning(
+                        "content_warm_failed url=%s exception=%s message=%s",
+                        reference_item.url,
+                        e.__class__.__name__,
+                        e,
+                    )
+                    entry, exception = None, e
+                else:
+                    exception = None
+                reference_item.content_fetch_duration = timedelta(
+                    seconds=time.monotonic() - started_at
+                )
+                reference_item.content_size = (
+                    len(entry["content"].encode()) if entry is not None else None
+                )
+                results[reference_item] = exception
+
+        try:
+            await asyncio.gather(
+                *(warm(reference_item) for reference_item in reference_items)
+            )
+        finally:
+            await aclose_async_client()
+        return results
+
+    def _record_fetch_outcome(self, reference_item, exception):
+        reference_item.content_fetched_at = timezone.now()
+        reference_item.content_fetch_outcome = get_fetch_outcome(exception)
+
+        if exception is None:
+            reference_item.content_fetch_failing_since = None
+            return
+
+        # Only notify the user if it's an HTTPError
+        # and hasn't already been failing
+        is_http_error = isinstance(exception, requests.exceptions.HTTPError)
+        if is_http_error and reference_item.content_fetch_failing_since is None:
+            reference_item.content_fetch_failing_since = timezone.now()
+            send_content_failure_email.enqueue(
+                model_name=reference_item._meta.model_name,
+                reference_item_id=reference_item.id,
+            )
@@ -0,0 +1,132 @@
+"""
+Applies a manifest's documents to a schema in bulk.
+
+Saving each document's item one at a time costs a lookup, a save (with its
+own checks) and a summary refresh per document, so the number of queries
+grows with the manifest. Instead, the schema's existing items are loaded
+with one query per model and diffed against the manifest in memory, and the
+difference is written with at most one bulk_create, one bulk_update and one
+delete per model. Whatever save() would have done for each item (deriving
+fields, refreshing the schema's summary, queuing $id extraction) is done
+once for all of them.
+
+Items are matched to documents by model and URL. A document that changes
+type replaces its old item with one of the new type.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ReferenceItem, SchemaRef
+from .tasks import enqueue_id_value_extraction
+
+
+def _get_document_model_class(document_metadata):
+    model_class = ReferenceItem.get_manifest_document_type_model_map().get(
+        document_metadata.get("type")
+    )
+    if not model_class:
+        raise ValueError("Unsupported manifest document type")
+    return model_class
+
+
+def _apply_model_documents(schema, model_class, documents, created_by):
+    existing_items = {}
+    duplicate_items = []
+    for item in model_class.objects.filter(schema=schema).order_by("created_at", "id"):
+        if item.url in existing_items:
+            # Left over from before URLs were matched in bulk. Keep the oldest.
+            duplicate_items.append(item)
+        else:
+            existing_items[item.url] = item
+
+    new_items = []
+    changed_items = []
+    changed_field_names = set()
+    for document_url, document_metadata in documents.items():
+        fields = {
+            **model_class.get_manifest_document_fields(document_metadata),
+            "created_by": created_by,
+        }
+        item = existing_items.pop(document_url, None)
+        if item is None:
+            item = model_class(schema=schema, url=document_url, **fields)
+            item.set_derived_fields()
+            new_items.append(item)
+            continue
+
+        for field_name, value in fields.items():
+            setattr(item, field_name, value)
+        changed_fields = item.get_changed_fields()
+        if changed_fields:
+            changed_items.append(item)
+            changed_field_names.update(changed_fields)
+
+    # Whatever's left wasn't in the manifest
+    removed_item_ids = [
+        item.id for item in [*existing_items.values(), *duplicate_items]
+    ]
+    if removed_item_ids:
+        # The summary is refreshed once all the changes are made
+        model_class.objects.filter(id__in=removed_item_ids).delete(
+            refresh_summaries=False
+        )
+
+    model_class.objects.bulk_create(new_items)
+
+    if changed_items:
+        # bulk_update() skips auto_now
+        now = timezone.now()
+        for item in changed_items:
+            item.updated_at = now
+        model_class.objects.bulk_update(
+            changed_items, [*changed_field_names, "updated_at"]
+        )
+
+    return {
+        "created": len(new_items),
+        "updated": len(changed_items),
+        "deleted": len(removed_item_ids),
+        "items": [*new_items, *changed_items],
+    }
+
+
+@transaction.atomic
+def apply_manifest_documents(schema, documents, created_by):
+    """
+    Makes `schema`'s reference items match a manifest's `documents`, creating,
+    updating and deleting items as needed. `schema` must be saved.
+    Returns how many items were created, updated and deleted.
+
+    SchemaRefs are saved without claiming their URLs, so if `schema` is
+    published, call its _sync_published_url_claims() afterwards.
+    """
+    documents_by_model_class = {
+        model_class: {}
+        for model_class in ReferenceItem.get_manifest_document_type_model_map().values()
+    }
+    for document_url, document_metadata in documents.items():
+        model_class = _get_document_model_class(document_metadata)
+        documents_by_model_class[model_class][document_url] = document_metadata
+
+    changes = {"created": 0, "updated": 0, "deleted": 0}
+    new_or_changed_schema_refs = []
+    for model_class, model_documents in documents_by_model_class.items():
+        model_changes = _apply_model_documents(
+            schema, model_class, model_documents, created_by
+        )
+        for key in changes:
+            changes[key] += model_changes[key]
+        if model_class is SchemaRef:
+            new_or_changed_schema_refs = model_changes["items"]
+
+    if any(changes.values()):
+        schema.refresh_summary()
+
+    enqueue_id_value_extraction(
+        schema_ref
+        for schema_ref in new_or_changed_schema_refs
+        if schema_ref.needs_id_value_extraction
+    )
+
+    return changes
@@ -30,9 +30,11 @@ class MCPAPIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
             )
 
         # Safely wrap the synchronous ORM call
-        api_key_obj = await sync_to_async(APIKey.objects.get_from_key)(api_key_header)
+        profile = await sync_to_async(APIKey.objects.get_profile_from_key)(
+            api_key_header
+        )
 
-        if not api_key_obj:
+        if not profile:
             return JSONResponse(
                 status_code=401,
                 content={
@@ -41,12 +43,8 @@ class MCPAPIKeyAuthenticationMiddleware(BaseHTTPMiddleware):
                 },
             )
 
-        # Fetch profile and user safely in an async context
-        @sync_to_async
-        def get_profile_and_user(key_obj):
-            return key_obj.profile, key_obj.profile.user
-
-        profile, user = await get_profile_and_user(api_key_obj)
+        # The profile's user is select_related, so this doesn't hit the database
+        user = profile.user
 
         # Safely wrap the synchronous rate limiting logic
         allowed, reason = await sync_to_async(check_and_record_request)(profile)
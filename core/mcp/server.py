@@ -6,8 +6,10 @@ from django.urls import reverse
 from django.utils import timezone
 from mcp.server.fastmcp import FastMCP
 from core.models import Schema
+from core.pagination import paginate_schemas, InvalidCursorError
 from asgiref.sync import sync_to_async
 from core.mcp.context import current_user
+from core.tasks import enqueue_manifest, get_manifest_job_status, get_manifest_jobs
 
 mcp = FastMCP(
     "Schemas.Pub", stateless_http=True, json_response=True, streamable_http_path="/"
@@ -47,7 +49,9 @@ MAX_PAGE_SIZE = 10
 @mcp.tool()
 @sync_to_async
 def search_schemas(
-    query: str | None = None, scope: Literal["all", "user"] = "all", page: int = 1
+    query: str | None = None,
+    scope: Literal["all", "user"] = "all",
+    cursor: str | None = None,
 ):
     """
     Search for schemas.
@@ -55,7 +59,7 @@ def search_schemas(
     Args:
       query: A search query. Can be a list of keywords or an $id. Pass None or an empty string to list all schemas in scope.
       scope: 'user' to search only the user's own schemas (including private), or 'all' to search the entire registry. Defaults to 'all.'
-      page: Which page of search results to return. Defaults to 1.
+      cursor: The continuation token from a previous search to get its next page of results. Omit for the first page.
     """
 
     user = ensure_current_user()
@@ -74,34 +78,33 @@ def search_schemas(
     else:
         results = scope_results.search(query)
 
-    total_count = results.count()
-    if total_count == 0:
-        return "No results matched your query."
-
-    total_pages = (total_count + MAX_PAGE_SIZE - 1) // MAX_PAGE_SIZE
-    if page < 1 or page > total_pages:
+    try:
+        page, next_cursor = paginate_schemas(results, MAX_PAGE_SIZE, cursor)
+    except InvalidCursorError:
         raise ValueError(
-            f"Invalid page number for query. Please request a page between 1 and {total_pages}."
+            "Invalid cursor for query. Please omit the cursor to start from the first page."
         )
 
-    start = (page - 1) * MAX_PAGE_SIZE
-    end = start + MAX_PAGE_SIZE
-    paginated_results = results[start:end]
+    if not page:
+        if cursor:
+            return "No more results matched your query."
+        return "No results matched your query."
 
-    formatted_results = [format_schema(schema) for schema in paginated_results]
+    formatted_results = [format_schema(schema) for schema in page]
     formatted_page = "\n---\n".join(formatted_results)
 
-    response = f"Found {total_count} schema{'s' if total_count > 1 else ''} matching your query{':' if total_pages == 1 else '.'}"
-
-    if total_pages == 1:
+    if not cursor and not next_cursor:
+        response = f"Found {len(page)} schema{'s' if len(page) > 1 else ''} matching your query:"
         response += f"\n\n{formatted_page}"
         return response
 
-    response += f"\n\nThe results are truncated. Showing page {page} of {total_pages}:"
+    response = (
+        f"Showing {len(page)} schema{'s' if len(page) > 1 else ''} matching your query:"
+    )
     response += f"\n\n{formatted_page}"
 
-    if page < total_pages:
-        response += f'\n\nTo get the next page, use `search_schemas(query: {query!r}, scope: "{scope}", page: {page + 1})`'
+    if next_cursor:
+        response += f'\n\nThe results are truncated. To get the next page, use `search_schemas(query: {query!r}, scope: "{scope}", cursor: "{next_cursor}")`'
 
     return response
 
@@ -144,13 +147,15 @@ async def get_schema(schema_id: int):
     return json.dumps(manifest, indent=2)
 
 
-def _validate_manifest_and_update_schema(manifest, schema):
+def _validate_manifest_and_update_schema(manifest, schema, background=False):
     """
-    Shared synchronous helper to validate a manifest, apply it to a Schema instance,
-    and handle common validation exceptions.
+    Shared synchronous helper to validate a manifest, apply it to a Schema instance
+    (or queue a job to, if `background`), and handle common validation exceptions.
     """
     try:
         manifest_data = Schema.validate_manifest(manifest)
+        if background:
+            return get_manifest_job_status(enqueue_manifest(manifest_data, schema))
         schema.overwrite_from_manifest(manifest_data)
         return {
             "id": schema.id,
@@ -165,26 +170,35 @@ def _validate_manifest_and_update_schema(manifest, schema):
 
 
 @mcp.tool()
-async def create_schema(manifest: str):
+async def create_schema(manifest: str, background: bool = False):
     """
     Create a new schema from a manifest.
     The manifest should be a JSON string following the Schemas.Pub manifest schema available at schema://manifest.json
+
+    Args:
+      manifest: The manifest, as a JSON string.
+      background: If true, the manifest is only checked against the manifest schema, then applied in the background. Returns a job ID to pass to `get_manifest_job`. Use this for large manifests.
     """
     user = ensure_current_user()
 
     @sync_to_async
     def do_create():
         schema = Schema(created_by=user)
-        return _validate_manifest_and_update_schema(manifest, schema)
+        return _validate_manifest_and_update_schema(manifest, schema, background)
 
     return await do_create()
 
 
 @mcp.tool()
-async def update_schema(schema_id: int, manifest: str):
+async def update_schema(schema_id: int, manifest: str, background: bool = False):
     """
     Update an existing schema from a manifest.
     The manifest should be a JSON string following the Schemas.Pub manifest schema available at schema://manifest.json
+
+    Args:
+      schema_id: The ID of the schema to update.
+      manifest: The manifest, as a JSON string.
+      background: If true, the manifest is only checked against the manifest schema, then applied in the background. Returns a job ID to pass to `get_manifest_job`. Use this for large manifests.
     """
     user = ensure_current_user()
 
@@ -197,6 +211,24 @@ async def update_schema(schema_id: int, manifest: str):
         except Schema.DoesNotExist:
             raise ValueError(f"Schema with ID '{schema_id}' not found.")
 
-        return _validate_manifest_and_update_schema(manifest, schema)
+        return _validate_manifest_and_update_schema(manifest, schema, background)
 
     return await do_update()
+
+
+@mcp.tool()
+async def get_manifest_job(job_id: int):
+    """
+    Get the status of a manifest applied with `background: true`.
+    The status is "queued", "running", "succeeded" or "failed". Once it has succeeded, the result has the schema's "id" and "url" and how many documents were "created", "updated" and "deleted". If it failed, "error" says why.
+    """
+    user = ensure_current_user()
+
+    @sync_to_async
+    def fetch_from_db():
+        job = get_manifest_jobs(user).filter(id=job_id).first()
+        if job is None:
+            raise ValueError(f"Job with ID '{job_id}' not found.")
+        return get_manifest_job_status(job)
+
+    return await fetch_from_db()
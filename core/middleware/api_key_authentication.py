@@ -25,14 +25,13 @@ class APIKeyAuthenticationMiddleware:
                 details=f"Please include your API key with the {API_KEY_HEADER} header",
             )
 
-        api_key_obj = APIKey.objects.get_from_key(api_key_header)
-        if not api_key_obj:
+        profile = APIKey.objects.get_profile_from_key(api_key_header)
+        if not profile:
             return ApiErrorResponse(
                 status_code=401,
                 message="Invalid API key",
             )
 
-        profile = api_key_obj.profile
         # For convenience, attach the user to the request
         request.user = profile.user
 
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:38
+# Edited to backfill canonical URLs and published URL claims
+
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import migrations, models
+
+GITHUB_REPO_NETLOC = "github.com"
+GITHUB_RAW_NETLOC = "raw.githubusercontent.com"
+
+
+def get_canonical_url(url):
+    # A frozen copy of URLProviderInfo.canonical_resource as of this
+    # migration, so later changes to it can't change what this backfills
+    parsed_url = urlparse(url)
+    if parsed_url.netloc in (GITHUB_REPO_NETLOC, GITHUB_RAW_NETLOC):
+        path_parts = parsed_url.path.strip("/").split("/")
+        is_raw_url = parsed_url.netloc == GITHUB_RAW_NETLOC or (
+            len(path_parts) >= 3 and path_parts[2] == "raw"
+        )
+        if not is_raw_url:
+            return f"{GITHUB_REPO_NETLOC}{parsed_url.path}"
+        if len(path_parts) >= 4:
+            if path_parts[2] == "raw":
+                del path_parts[2]
+            if path_parts[2:4] == ["refs", "heads"]:
+                del path_parts[2:4]
+            if len(path_parts) >= 3:
+                user, repo, branch, *filepath = path_parts
+                return "/".join(
+                    [GITHUB_REPO_NETLOC, user, repo, "blob", branch, *filepath]
+                )
+    return f"{parsed_url.netloc.lower()}{parsed_url.path}"
+
+
+def backfill_canonical_urls(apps, schema_editor):
+    for model_name in ("SchemaRef", "DocumentationItem", "Implementation"):
+        model = apps.get_model("core", model_name)
+        reference_items = list(model.objects.only("id", "url"))
+        for reference_item in reference_items:
+            reference_item.canonical_url = get_canonical_url(reference_item.url)
+        model.objects.bulk_update(reference_items, ["canonical_url"], batch_size=500)
+
+    # The oldest published SchemaRef for each canonical URL holds the claim.
+    # Any duplicates that predate the constraint are left unclaimed.
+    SchemaRef = apps.get_model("core", "SchemaRef")
+    claimed_schema_ref_ids = {}
+    published_schema_refs = (
+        SchemaRef.objects.filter(schema__published_at__isnull=False)
+        .exclude(canonical_url="")
+        .order_by("created_at", "id")
+        .values_list("id", "canonical_url")
+    )
+    for schema_ref_id, canonical_url in published_schema_refs:
+        claimed_schema_ref_ids.setdefault(canonical_url, schema_ref_id)
+    SchemaRef.objects.filter(id__in=claimed_schema_ref_ids.values()).update(
+        claims_published_url=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_schema_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentationitem',
+            name='canonical_url',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='canonical_url',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='canonical_url',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='claims_published_url',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_canonical_urls, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='schemaref',
+            constraint=models.UniqueConstraint(condition=models.Q(('claims_published_url', True)), fields=('canonical_url',), name='unique_published_schemaref_canonical_url'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:39
+# Edited to backfill languages for existing SchemaRefs
+
+import posixpath
+from fnmatch import fnmatchcase
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of what core.utils.guess_specification_language_by_extension()
+# matched when this was written (SPECIFICATION_LANGUAGE_ALLOWLIST, narrowed to
+# the file name patterns Pygments 2.19 resolves to those languages), so the
+# backfill doesn't change along with the helper, the allowlist or Pygments.
+SPECIFICATION_LANGUAGE_FILENAME_PATTERNS = {
+    'bash': [
+        '*.bash', '*.ebuild', '*.eclass', '*.exheres-0', '*.exlib', '*.ksh', '*.sh',
+        '*.zsh', '.bash_*', '.bashrc', '.kshrc', '.zshrc', 'PKGBUILD', 'bash_*',
+        'bashrc', 'kshrc', 'zshrc',
+    ],
+    'c': ['*.c', '*.h', '*.idc', '*.x[bp]m'],
+    'cddl': ['*.cddl'],
+    'cpp': [
+        '*.C', '*.CPP', '*.H', '*.c++', '*.cc', '*.cp', '*.cpp', '*.cxx', '*.h++',
+        '*.hh', '*.hpp', '*.hxx', '*.tpp',
+    ],
+    'csharp': ['*.cs'],
+    'css': ['*.css'],
+    'diff': ['*.diff', '*.patch'],
+    'go': ['*.go'],
+    'graphql': ['*.graphql'],
+    'ini': ['*.cfg', '*.inf', '*.ini', '.editorconfig'],
+    'java': ['*.java'],
+    'javascript': ['*.cjs', '*.js', '*.jsm', '*.mjs'],
+    'json': ['*.json', '*.jsonl', '*.ndjson', 'Pipfile.lock'],
+    'kotlin': ['*.kt', '*.kts'],
+    'less': ['*.less'],
+    'lua': ['*.lua', '*.wlua'],
+    'makefile': ['*.mak', '*.mk', 'GNUmakefile', 'Makefile', 'makefile'],
+    'markdown': ['*.markdown', '*.md'],
+    'objectivec': ['*.m'],
+    'perl': ['*.perl'],
+    'php': ['*.php', '*.php[345]'],
+    'python': [
+        '*.bzl', '*.jy', '*.py', '*.pyi', '*.pyw', '*.sage', '*.tac', 'BUCK', 'BUILD',
+        'BUILD.bazel', 'SConscript', 'SConstruct', 'WORKSPACE',
+    ],
+    'r': ['*.R', '*.S', '.Renviron', '.Rhistory', '.Rprofile'],
+    'ruby': [
+        '*.duby', '*.gemspec', '*.rake', '*.rb', '*.rbw', '*.rbx', 'Gemfile',
+        'Rakefile', 'Vagrantfile',
+    ],
+    'rust': ['*.rs', '*.rs.in'],
+    'scss': ['*.scss'],
+    'swift': ['*.swift'],
+    'typescript': ['*.ts'],
+    'vbnet': ['*.bas', '*.vb'],
+    'xml': ['*.rss', '*.wsdl', '*.wsf', '*.xml', '*.xsd'],
+    'yaml': ['*.yaml', '*.yml'],
+}
+
+
+def guess_specification_language_by_extension(url):
+    filename = posixpath.basename(urlparse(url).path)
+    for language, patterns in SPECIFICATION_LANGUAGE_FILENAME_PATTERNS.items():
+        if any(fnmatchcase(filename, pattern) for pattern in patterns):
+            return language
+    return None
+
+
+def backfill_languages(apps, schema_editor):
+    SchemaRef = apps.get_model("core", "SchemaRef")
+    schema_refs = list(SchemaRef.objects.only("id", "url"))
+    for schema_ref in schema_refs:
+        schema_ref.language = guess_specification_language_by_extension(schema_ref.url)
+    SchemaRef.objects.bulk_update(schema_refs, ["language"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_schemaref_canonical_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schemaref',
+            name='language',
+            field=models.CharField(blank=True, editable=False, max_length=50, null=True),
+        ),
+        migrations.RunPython(backfill_languages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='documentationitem',
+            index=models.Index(fields=['schema', 'role'], name='core_docume_schema__d647a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schemaref',
+            index=models.Index(fields=['schema', 'language'], name='core_schema_schema__346427_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:44
+# Edited to enable the pg_trgm extension before creating the index
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_schemaref_language'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='schema',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='schema_name_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
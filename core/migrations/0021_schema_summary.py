@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:45
+# Edited to backfill the summary for existing schemas
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_schema_summaries(apps, schema_editor):
+    # Mirrors Schema.refresh_summary(), which isn't available on historical models
+    Schema = apps.get_model("core", "Schema")
+    SchemaRef = apps.get_model("core", "SchemaRef")
+    DocumentationItem = apps.get_model("core", "DocumentationItem")
+    Implementation = apps.get_model("core", "Implementation")
+
+    schemas = {schema.id: schema for schema in Schema.objects.all()}
+    for schema_id, language in SchemaRef.objects.values_list("schema_id", "language"):
+        schema = schemas[schema_id]
+        schema.schema_ref_count += 1
+        if language and language not in schema.languages:
+            schema.languages.append(language)
+    for implementation_counts in Implementation.objects.values("schema_id").annotate(
+        total=Count("id"), open_source=Count("id", filter=Q(is_open_source=True))
+    ):
+        schema = schemas[implementation_counts["schema_id"]]
+        schema.implementation_count = implementation_counts["total"]
+        schema.open_source_implementation_count = implementation_counts["open_source"]
+    for schema_id, role in (
+        DocumentationItem.objects.exclude(role__isnull=True)
+        .exclude(role="")
+        .values_list("schema_id", "role")
+        .distinct()
+    ):
+        schemas[schema_id].documentation_roles.append(role)
+
+    for schema in schemas.values():
+        schema.languages.sort()
+        schema.documentation_roles.sort()
+    Schema.objects.bulk_update(
+        schemas.values(),
+        [
+            "schema_ref_count",
+            "implementation_count",
+            "open_source_implementation_count",
+            "documentation_roles",
+            "languages",
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_schema_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schema',
+            name='documentation_roles',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='schema',
+            name='implementation_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='schema',
+            name='languages',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='schema',
+            name='open_source_implementation_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='schema',
+            name='schema_ref_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_schema_summaries, migrations.RunPython.noop),
+    ]
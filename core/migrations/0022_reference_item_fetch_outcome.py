@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_schema_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentationitem',
+            name='content_fetch_duration',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentationitem',
+            name='content_fetch_outcome',
+            field=models.CharField(blank=True, choices=[('success', 'Success'), ('http_error', 'HTTP error'), ('too_large', 'Too Large'), ('timeout', 'Timeout'), ('unreachable', 'Unreachable')], default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='documentationitem',
+            name='content_fetched_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentationitem',
+            name='content_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='content_fetch_duration',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='content_fetch_outcome',
+            field=models.CharField(blank=True, choices=[('success', 'Success'), ('http_error', 'HTTP error'), ('too_large', 'Too Large'), ('timeout', 'Timeout'), ('unreachable', 'Unreachable')], default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='content_fetched_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='implementation',
+            name='content_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='content_fetch_duration',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='content_fetch_outcome',
+            field=models.CharField(blank=True, choices=[('success', 'Success'), ('http_error', 'HTTP error'), ('too_large', 'Too Large'), ('timeout', 'Timeout'), ('unreachable', 'Unreachable')], default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='content_fetched_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='schemaref',
+            name='content_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
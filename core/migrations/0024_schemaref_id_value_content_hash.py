@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schemaref',
+            name='id_value_content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
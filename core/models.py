@@ -1,21 +1,30 @@
+import asyncio
+import copy
 import logging
+import math
+import random
+import re
 from itertools import chain
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import check_password
 from django.contrib.postgres.search import (
     SearchVector,
     SearchQuery,
     SearchRank,
     SearchVectorField,
+    TrigramSimilarity,
 )
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import GinIndex
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from urllib.parse import urlparse
@@ -23,9 +32,26 @@ import time
 import requests
 import requests.exceptions
 import secrets
+import hashlib
+import hmac
 import json
 from jsonschema import validate as validate_json_schema
 from django.core.mail import send_mail
+from asgiref.sync import sync_to_async
+from . import content_cache, http_client, id_value_cache
+from .background import schedule_background_task
+from .cache_lock import acache_lock, await_value, cache_lock, wait_for_value
+from .http_client import Deadline, DeadlineExceededError, ResponseTooLargeError
+from .search_cache import (
+    TOO_MANY_RESULTS,
+    get_cached_search_results,
+    bump_registry_generation,
+)
+from .api_key_cache import (
+    get_cached_api_key_owner,
+    set_cached_api_key_owner,
+    invalidate_cached_api_key_owner,
+)
 from .utils import (
     guess_specification_language_by_extension,
     guess_language_by_extension,
@@ -43,10 +69,116 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.RESTRICT)
 
+    # Fields that save() leaves alone on existing rows, since they're kept
+    # up to date some other way
+    save_excluded_fields = ()
+
     @classmethod
     def create(cls, created_by):
         return cls(created_by=created_by)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so saves can tell what changed without asking the database
+        instance._loaded_values = {
+            field_name: _copy_loaded_value(value)
+            for field_name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_loaded_values(fields)
+
+    def save(self, *args, **kwargs):
+        """
+        Only writes the fields that changed to existing rows, unless given
+        `update_fields`. Returns the fields written, or None if all of them were.
+        """
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding and update_fields is None:
+            update_fields = kwargs["update_fields"] = self._get_fields_to_update()
+        super().save(*args, **kwargs)
+        self._remember_loaded_values(update_fields)
+        return update_fields
+
+    def _get_tracked_fields(self):
+        deferred_fields = self.get_deferred_fields()
+        return [
+            field
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and not field.generated
+            and field.attname not in deferred_fields
+        ]
+
+    def _remember_loaded_values(self, field_names=None):
+        """
+        Records the current values of `field_names` (or of all loaded
+        fields) as what's in the database.
+        """
+        loaded_values = getattr(self, "_loaded_values", {})
+        for field in self._get_tracked_fields():
+            if field_names is None or {field.name, field.attname} & set(field_names):
+                loaded_values[field.attname] = _copy_loaded_value(
+                    getattr(self, field.attname)
+                )
+        self._loaded_values = loaded_values
+
+    def get_changed_fields(self):
+        """
+        Returns the names of the fields changed since this instance was
+        loaded or saved, or None if it wasn't loaded from the database.
+        """
+        loaded_values = getattr(self, "_loaded_values", None)
+        if loaded_values is None:
+            return None
+        return [
+            field.name
+            for field in self._get_tracked_fields()
+            if field.attname not in loaded_values
+            or getattr(self, field.attname) != loaded_values[field.attname]
+        ]
+
+    def get_original_value(self, field_name):
+        """
+        Returns the value `field_name` had when this instance was loaded.
+        """
+        attname = self._meta.get_field(field_name).attname
+        loaded_values = getattr(self, "_loaded_values", {})
+        if attname in loaded_values:
+            return loaded_values[attname]
+        # Not loaded with this instance, so we have to look it up
+        return (
+            self.__class__._base_manager
+            .filter(pk=self.pk)
+            .values_list(attname, flat=True)
+            .get()
+        )
+
+    def _get_fields_to_update(self):
+        changed_fields = self.get_changed_fields()
+        if changed_fields is None:
+            changed_fields = [field.name for field in self._get_tracked_fields()]
+        fields_to_update = [
+            field_name
+            for field_name in changed_fields
+            if field_name not in self.save_excluded_fields
+        ]
+        # An empty list skips the UPDATE altogether
+        if fields_to_update and "updated_at" not in fields_to_update:
+            fields_to_update.append("updated_at")
+        return fields_to_update
+
+
+def _copy_loaded_value(value):
+    # Lists and dicts (from ArrayField and JSONField) can be changed in place
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
 
 class PermanentURLManager(models.Manager):
     BASE_URL = f"https://{settings.PERMANENT_URL_HOST}/"
@@ -108,6 +240,9 @@ class SchemaQuerySet(models.QuerySet):
 
         When `query_text` is blank the queryset is returned unchanged,
         so the existing ordering (alphabetical on index) is preserved for plain browsing.
+
+        Rankings are cached across the whole registry and narrowed down
+        to this queryset afterwards, so they can be shared between scopes.
         """
         query_text = (query_text or "").strip()
         if not query_text:
@@ -115,17 +250,82 @@ class SchemaQuerySet(models.QuerySet):
         search_query = SearchQuery(
             query_text, config="english", search_type="websearch"
         )
+        # SearchRank is a Postgres real, which compares unequal to the same
+        # rank sent back as a double (in a pagination cursor), so rank in doubles
+        search_rank = Cast(
+            SearchRank(models.F("search_vector"), search_query), models.FloatField()
+        )
+
+        def rank_all_schemas():
+            ranked_schemas = list(
+                Schema.objects
+                .filter(search_vector=search_query)
+                .annotate(rank=search_rank)
+                .order_by("-rank", "name", "id")
+                .values_list("id", "rank")[: settings.SEARCH_CACHE_MAX_RESULTS + 1]
+            )
+            if len(ranked_schemas) > settings.SEARCH_CACHE_MAX_RESULTS:
+                return TOO_MANY_RESULTS
+            return ranked_schemas
+
+        ranked_schemas = get_cached_search_results(query_text, rank_all_schemas)
+        if ranked_schemas == TOO_MANY_RESULTS:
+            return (
+                self
+                .filter(search_vector=search_query)
+                .annotate(rank=search_rank)
+                .order_by("-rank", "name", "id")
+            )
+
+        rank = models.Case(
+            *[
+                models.When(id=id, then=models.Value(rank))
+                for id, rank in ranked_schemas
+            ],
+            output_field=models.FloatField(),
+        )
+        return (
+            self
+            .filter(id__in=[id for id, _ in ranked_schemas])
+            .annotate(rank=rank)
+            .order_by("-rank", "name", "id")
+        )
+
+    def suggest(self, prefix_text):
+        """
+        Match schemas for typeahead suggestions, best match first.
+
+        Unlike search(), the last word can be partial ("calend" matches
+        "Calendar"), and names similar to `prefix_text` match despite typos.
+        """
+        words = re.findall(r"[^\W_]+", prefix_text or "")
+        if not words:
+            return self.none()
+        prefix_query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            config="english",
+            search_type="raw",
+        )
         return (
             self
-            .filter(search_vector=search_query)
-            .annotate(rank=SearchRank(models.F("search_vector"), search_query))
-            .order_by("-rank", "name")
+            .filter(
+                Q(search_vector=prefix_query) | Q(name__trigram_similar=prefix_text)
+            )
+            .annotate(similarity=TrigramSimilarity("name", prefix_text))
+            .order_by("-similarity", "name", "id")
         )
 
     def public(self):
         """Returns only public schemas."""
         return self.filter(self._get_public_q())
 
+    def published(self):
+        """
+        Returns schemas that are public or scheduled to be. Their SchemaRefs
+        claim their URLs (see Schema._sync_published_url_claims).
+        """
+        return self.filter(published_at__isnull=False)
+
     def accessible_to(self, user):
         """Returns schemas that are either public OR created by the user."""
         q_filter = self._get_public_q()
@@ -164,28 +364,149 @@ class Schema(BaseModel):
         output_field=SearchVectorField(),
         db_persist=True,
     )
+    # Summary of the schema's reference items, kept up to date by
+    # refresh_summary() so listings don't need to query them per schema.
+    schema_ref_count = models.PositiveIntegerField(default=0, editable=False)
+    implementation_count = models.PositiveIntegerField(default=0, editable=False)
+    open_source_implementation_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    documentation_roles = ArrayField(
+        models.CharField(max_length=100), default=list, blank=True, editable=False
+    )
+    languages = ArrayField(
+        models.CharField(max_length=50), default=list, blank=True, editable=False
+    )
+
+    SUMMARY_FIELDS = (
+        "schema_ref_count",
+        "implementation_count",
+        "open_source_implementation_count",
+        "documentation_roles",
+        "languages",
+    )
+    # Don't let a stale instance overwrite the summary
+    save_excluded_fields = SUMMARY_FIELDS
 
     class Meta:
         indexes = [
             models.Index(fields=["published_at"]),
             GinIndex(fields=["search_vector"], name="schema_search_vec_gin"),
+            GinIndex(
+                fields=["name"], name="schema_name_trgm_gin", opclasses=["gin_trgm_ops"]
+            ),
         ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, is_admin_change=False, **kwargs):
-        # Validate published_at if the object already exists,
-        # unless an admin is making the change.
-        if self.id and not is_admin_change:
-            original = Schema.objects.get(id=self.id)
-
-            if original.published_at and original.published_at != self.published_at:
+        was_published = None
+        if not self._state.adding:
+            original_published_at = self.get_original_value("published_at")
+            was_published = original_published_at is not None
+
+            # Validate published_at if the object already exists,
+            # unless an admin is making the change.
+            if (
+                not is_admin_change
+                and original_published_at
+                and original_published_at != self.published_at
+            ):
                 raise ValidationError(
                     "A public schema cannot have its visibility changed except by an administrator."
                 )
 
-        super().save(*args, **kwargs)
+        update_fields = super().save(*args, **kwargs)
+        if update_fields == []:
+            # Nothing changed, so nothing was written
+            return update_fields
+        self._invalidate_search_results()
+
+        if was_published is not None and was_published != (
+            self.published_at is not None
+        ):
+            self._sync_published_url_claims()
+        return update_fields
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_search_results()
+        return result
+
+    def _invalidate_search_results(self):
+        bump_registry_generation()
+        # Bump again once committed, in case another request cached
+        # results from before this change while the transaction was open.
+        transaction.on_commit(bump_registry_generation)
+
+    def refresh_summary(self):
+        """
+        Recomputes the summary of this schema's reference items.
+        Call it in the same transaction as any change to them.
+        """
+        with transaction.atomic():
+            # Lock the row so concurrent changes can't interleave their counts.
+            # A "no key" lock, since inserting an item already holds a key share
+            # lock on it, which a full lock would deadlock with.
+            list(
+                Schema.objects
+                .select_for_update(no_key=True)
+                .filter(id=self.id)
+                .values("id")
+            )
+
+            schema_ref_languages = list(
+                self.schemaref_set.values_list("language", flat=True)
+            )
+            implementation_counts = self.implementation_set.aggregate(
+                total=Count("id"),
+                open_source=Count("id", filter=Q(is_open_source=True)),
+            )
+            documentation_roles = (
+                self.documentationitem_set
+                .exclude(role__isnull=True)
+                .exclude(role="")
+                .values_list("role", flat=True)
+                .distinct()
+            )
+            summary = {
+                "schema_ref_count": len(schema_ref_languages),
+                "implementation_count": implementation_counts["total"],
+                "open_source_implementation_count": implementation_counts[
+                    "open_source"
+                ],
+                "documentation_roles": sorted(documentation_roles),
+                "languages": sorted({
+                    language for language in schema_ref_languages if language
+                }),
+            }
+            Schema.objects.filter(id=self.id).update(**summary)
+
+        for field_name, value in summary.items():
+            setattr(self, field_name, value)
+        self._remember_loaded_values(summary.keys())
+
+    def _sync_published_url_claims(self):
+        """
+        Makes this schema's SchemaRefs claim (or release) their canonical URLs
+        to match its visibility. When a schema lists the same resource more
+        than once, only its oldest SchemaRef holds the claim.
+        """
+        schema_refs = self.schemaref_set.all()
+        schema_refs.update(claims_published_url=False)
+        if self.published_at is None:
+            return
+
+        claimed_schema_ref_ids = {}
+        for schema_ref_id, canonical_url in schema_refs.order_by(
+            "created_at", "id"
+        ).values_list("id", "canonical_url"):
+            if canonical_url:
+                claimed_schema_ref_ids.setdefault(canonical_url, schema_ref_id)
+        schema_refs.filter(id__in=claimed_schema_ref_ids.values()).update(
+            claims_published_url=True
+        )
 
     @classmethod
     def get_manifest_schema(cls):
@@ -227,15 +548,62 @@ class Schema(BaseModel):
 
     @property
     def has_open_source_implementation(self):
-        return self.open_source_implementation_set.exists()
+        return self.open_source_implementation_count > 0
+
+    @property
+    def has_rfc(self):
+        return DocumentationItem.DocumentationItemRole.RFC in self.documentation_roles
+
+    @property
+    def has_w3c(self):
+        return DocumentationItem.DocumentationItemRole.W3C in self.documentation_roles
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("_latest_reference_items", None)
+
+    def _get_prefetched_items(self, related_name):
+        """
+        Returns the reference items prefetched with prefetch_related(),
+        or None if they weren't prefetched.
+        """
+        return getattr(self, "_prefetched_objects_cache", {}).get(related_name)
+
+    def _memoize_latest_reference_item(self, key, get_latest_reference_item):
+        # Templates call these accessors several times per render
+        latest_reference_items = self.__dict__.setdefault("_latest_reference_items", {})
+        if key not in latest_reference_items:
+            latest_reference_items[key] = get_latest_reference_item()
+        return latest_reference_items[key]
 
     def _latest_documentation_item_of_type(self, role):
-        return (
-            self.documentationitem_set.filter(role=role).order_by("-created_at").first()
-        )
+        def get_latest_documentation_item():
+            documentation_items = self._get_prefetched_items("documentationitem_set")
+            if documentation_items is None:
+                return (
+                    self.documentationitem_set
+                    .filter(role=role)
+                    .order_by("-created_at")
+                    .first()
+                )
+            return max(
+                (item for item in documentation_items if item.role == role),
+                key=lambda item: item.created_at,
+                default=None,
+            )
+
+        return self._memoize_latest_reference_item(role, get_latest_documentation_item)
 
     def latest_reference(self):
-        return self.schemaref_set.order_by("-created_at").first()
+        def get_latest_schema_ref():
+            schema_refs = self._get_prefetched_items("schemaref_set")
+            if schema_refs is None:
+                return self.schemaref_set.order_by("-created_at").first()
+            return max(
+                schema_refs, key=lambda schema_ref: schema_ref.created_at, default=None
+            )
+
+        return self._memoize_latest_reference_item("definition", get_latest_schema_ref)
 
     def latest_readme(self):
         return self._latest_documentation_item_of_type(
@@ -258,38 +626,65 @@ class Schema(BaseModel):
         )
 
     def additional_documentation_items(self):
-        return self.documentationitem_set.exclude(
-            role__in=[
-                DocumentationItem.DocumentationItemRole.README,
-                DocumentationItem.DocumentationItemRole.License,
-            ]
-        )
+        excluded_roles = [
+            DocumentationItem.DocumentationItemRole.README,
+            DocumentationItem.DocumentationItemRole.License,
+        ]
+        documentation_items = self._get_prefetched_items("documentationitem_set")
+        if documentation_items is None:
+            return self.documentationitem_set.exclude(role__in=excluded_roles)
+        return [item for item in documentation_items if item.role not in excluded_roles]
 
-    def check_for_published_conflicts(self):
+    def check_for_published_conflicts(self, schema_refs=None, fetch=False):
         """
-        Checks public schemas for matching SchemaRef URLs or $id values.
+        Checks published schemas (including scheduled ones, which already
+        claim their URLs) for matching SchemaRef URLs or $id values.
+        Defaults to checking this schema's saved SchemaRefs, but callers
+        can pass (possibly unsaved) SchemaRefs to check them ahead of time.
+
+        $id values are read as in SchemaRef.read_id_values(), so the number
+        of queries doesn't grow with the number of SchemaRefs. Pass `fetch`
+        when publishing, or adding SchemaRefs to a published schema: fetching
+        is slow, but $id values are only kept up to date in the background
+        once they've been checked. Nothing is saved.
 
         Raises:
             PublishedSchemaConflictError: If a conflict is found.
         """
-        published_schema_refs = SchemaRef.objects.filter(
-            schema__in=Schema.objects.public()
-        ).exclude(
-            # We don't want to check against this Schema's own SchemaRefs
-            schema=self
+        if schema_refs is None:
+            schema_refs = self.schemaref_set.all()
+        schema_refs = list(schema_refs)
+        canonical_urls = {
+            schema_ref.url_provider_info.canonical_resource
+            for schema_ref in schema_refs
+        }
+        canonical_urls.discard("")
+        id_values = SchemaRef.read_id_values(schema_refs, fetch=fetch)
+
+        published_schema_refs = (
+            SchemaRef.objects
+            .select_related("schema")
+            .filter(schema__in=Schema.objects.published())
+            .order_by("id")
         )
+        if self.pk is not None:
+            # We don't want to check against this Schema's own SchemaRefs
+            published_schema_refs = published_schema_refs.exclude(schema=self)
+
         # Check for existing published SchemaRefs with the same URL or $id
-        for schema_ref in self.schemaref_set.all():
-            for published_schema_ref in published_schema_refs:
-                if published_schema_ref.url_provider_info.is_same_resource(
-                    schema_ref.url
-                ):
-                    raise PublishedSchemaConflictError(published_schema_ref, "URL")
-                if (
-                    schema_ref.id_value
-                    and schema_ref.id_value == published_schema_ref.id_value
-                ):
-                    raise PublishedSchemaConflictError(published_schema_ref, "$id")
+        conflicting_schema_ref = published_schema_refs.filter(
+            canonical_url__in=canonical_urls
+        ).first()
+        if conflicting_schema_ref:
+            raise PublishedSchemaConflictError(conflicting_schema_ref, "URL")
+
+        if not id_values:
+            return
+        conflicting_schema_ref = published_schema_refs.filter(
+            id_value__in=id_values
+        ).first()
+        if conflicting_schema_ref:
+            raise PublishedSchemaConflictError(conflicting_schema_ref, "$id")
 
     def to_manifest(self):
         manifest = {
@@ -315,6 +710,20 @@ class Schema(BaseModel):
 
         return manifest
 
+    def _raise_manifest_conflict_error(self, conflict_error):
+        conflict_url = reverse(
+            "schema_ref_detail",
+            kwargs={
+                "schema_id": conflict_error.conflicting_schema_ref.schema.id,
+                "schema_ref_id": conflict_error.conflicting_schema_ref.id,
+            },
+        )
+        raise ValidationError(
+            f"`public: true` was set, but a public schema ({conflict_url})"
+            + f"is already using one of the {conflict_error.reason} values "
+            + "used in this schema. Please contact a Schemas.Pub administrator."
+        )
+
     @transaction.atomic
     def overwrite_from_manifest(self, manifest):
         self.name = manifest["name"]
@@ -327,74 +736,79 @@ class Schema(BaseModel):
                 "Public schemas cannot be made private except by an admin. Please set `public: true` in your manifest."
             )
 
-        self.save()
-        urls = manifest["documents"].keys()
-
-        # Delete any ReferenceItems with URLs
-        # that aren't in the manifest
-        self.schemaref_set.exclude(url__in=urls).delete()
-        self.documentationitem_set.exclude(url__in=urls).delete()
-        self.implementation_set.exclude(url__in=urls).delete()
-
-        # Create or update reference items
-        for document_url, document_metadata in manifest["documents"].items():
-            ReferenceItem.update_or_create_from_manifest_document(
-                self, document_url, document_metadata, created_by=self.created_by
-            )
-
         if public:
-            if self.pk is None:
-                # Django requires a pk before we can use
-                # schema.check_for_published_conflicts()
-                self.save()
-            else:
-                # Existing schemas were using stale schemaref_set
-                # data without this
-                self.refresh_from_db()
-
+            # Check URLs and $id values before writing anything. SchemaRefs
+            # of published schemas claim their URLs in the database, so a
+            # conflicting write would otherwise fail with an IntegrityError.
+            # Definitions we already have are checked against their saved $id,
+            # so only new ones (or ones not read yet) may need fetching.
+            saved_schema_refs = {}
+            if self.pk is not None:
+                saved_schema_refs = {
+                    schema_ref.url: schema_ref
+                    for schema_ref in self.schemaref_set.all()
+                }
             try:
-                self.check_for_published_conflicts()
-            except PublishedSchemaConflictError as e:
-                conflict_url = reverse(
-                    "schema_ref_detail",
-                    kwargs={
-                        "schema_id": e.conflicting_schema_ref.schema.id,
-                        "schema_ref_id": e.conflicting_schema_ref.id,
-                    },
-                )
-                raise ValidationError(
-                    f"`public: true` was set, but a public schema ({conflict_url})"
-                    + f"is already using one of the {e.reason} values "
-                    + "used in this schema. Please contact a Schemas.Pub administrator."
+                self.check_for_published_conflicts(
+                    schema_refs=[
+                        saved_schema_refs.get(document_url)
+                        or SchemaRef(url=document_url)
+                        for document_url, document_metadata in manifest[
+                            "documents"
+                        ].items()
+                        if document_metadata.get("type") == "definition"
+                    ],
+                    fetch=True,
                 )
+            except PublishedSchemaConflictError as e:
+                self._raise_manifest_conflict_error(e)
+
+        from .manifests import apply_manifest_documents
+
+        self.save()
+        changes = apply_manifest_documents(
+            self, manifest["documents"], created_by=self.created_by
+        )
 
-        # We only update published_at when we initially publish
         if public and not self.published_at:
+            # We only update published_at when we initially publish.
+            # Saving the change makes the SchemaRefs claim their URLs.
             self.published_at = timezone.now()
+            self.save()
+        elif any(changes.values()):
+            if self.published_at:
+                self._sync_published_url_claims()
+            # Listings show the summary, which has changed
+            self._invalidate_search_results()
 
-        self.save()
+        return changes
 
 
-class ReferenceItemManager(models.Manager):
+class ReferenceItemQuerySet(models.QuerySet):
+    def delete(self, refresh_summaries=True):
+        """
+        Deletes the items, and refreshes their schemas' summaries as deleting
+        one item does. Callers that refresh them anyway can skip it.
+        """
+        if not refresh_summaries:
+            return super().delete()
+        with transaction.atomic():
+            schema_ids = set(self.values_list("schema_id", flat=True))
+            result = super().delete()
+            for schema in Schema.objects.filter(id__in=schema_ids):
+                schema.refresh_summary()
+        return result
+
+
+class ReferenceItemManager(models.Manager.from_queryset(ReferenceItemQuerySet)):
     def get_published_by_domain_and_path(self, url):
-        published_schema_refs = (
+        canonical_url = URLProviderInfo.from_url(url).canonical_resource
+        return (
             super()
             .get_queryset()
-            .select_related("schema")
             .exclude(schema__published_at__isnull=True)
+            .filter(canonical_url=canonical_url)
         )
-        matching_published_schema_ref_ids = [
-            schema_ref.id
-            for schema_ref in published_schema_refs
-            if schema_ref.url_provider_info.is_same_resource(url)
-        ]
-        # Custom manager methods like this typically return a QuerySet.
-        # In this case, we already retrieved these items from the db,
-        # so we *could* break convention and just return the actual objects.
-        # Instead, we're making an extra db request just to return a QuerySet
-        # of the matching objects, prefering developer ergonomics
-        # over max performance. For now, the performance hit should be negligible.
-        return super().get_queryset().filter(id__in=matching_published_schema_ref_ids)
 
 
 class URLProviderInfo:
@@ -414,13 +828,18 @@ class URLProviderInfo:
 
         return cls(url)
 
+    @property
+    def canonical_resource(self):
+        """
+        A normalized key for the resource this URL points to.
+        URLs that resolve to the same resource share a key,
+        so it can be stored and compared in the database.
+        """
+        parsed_url = urlparse(self.url)
+        return f"{parsed_url.netloc.lower()}{parsed_url.path}"
+
     def is_same_resource(self, url):
-        parsed_url_1 = urlparse(self.url)
-        parsed_url_2 = urlparse(url)
-        return (
-            parsed_url_1.netloc == parsed_url_2.netloc
-            and parsed_url_1.path == parsed_url_2.path
-        )
+        return self.canonical_resource == URLProviderInfo(url).canonical_resource
 
 
 class GitHubURLInfo(URLProviderInfo):
@@ -505,12 +924,24 @@ class GitHubURLInfo(URLProviderInfo):
         if path_parts[2] == "raw":
             del path_parts[2]
         # Permalinks don't have "/refs/heads"
-        if path_parts[2] == "refs" and path_parts[3] == "heads":
+        if path_parts[2:4] == ["refs", "heads"]:
             del path_parts[2:4]
+        # e.g. github.com/{user}/{repo}/raw/refs, which isn't a file
+        if len(path_parts) < 3:
+            return None
         user, repo, branch, *filepath = path_parts
         normal_path = "/".join([user, repo, "blob", branch] + filepath)
         return f"https://{self.REPO_NETLOC}/{normal_path}"
 
+    @property
+    def canonical_resource(self):
+        # Repo and raw URLs for the same file collapse to the repo URL
+        # (which drops the optional "refs/heads" from raw URLs).
+        url = self.repo_url or self.raw_url
+        if url is None:
+            return super().canonical_resource
+        return URLProviderInfo(url).canonical_resource
+
     def is_same_resource(self, url):
         # If the url isn't even known to be hosted by GitHub,
         # there's no point trying to compare it with more complicated logic.
@@ -535,10 +966,36 @@ class ReferenceItem(BaseModel):
     class Meta:
         abstract = True
 
+    class ContentFetchOutcome(models.TextChoices):
+        SUCCESS = "success"
+        HTTP_ERROR = "http_error", "HTTP error"
+        TOO_LARGE = "too_large"
+        TIMEOUT = "timeout"
+        UNREACHABLE = "unreachable"
+
     objects = ReferenceItemManager()
     url = models.URLField()
+    # See URLProviderInfo.canonical_resource
+    canonical_url = models.CharField(
+        max_length=300, blank=True, default="", editable=False, db_index=True
+    )
     name = models.CharField(max_length=300, blank=True, null=True)
     content_fetch_failing_since = models.DateTimeField(null=True, blank=True)
+    # Results of the last fetch by the warm_content_cache command
+    content_fetched_at = models.DateTimeField(null=True, blank=True, editable=False)
+    content_fetch_outcome = models.CharField(
+        max_length=20,
+        choices=ContentFetchOutcome,
+        blank=True,
+        default="",
+        editable=False,
+    )
+    content_fetch_duration = models.DurationField(null=True, blank=True, editable=False)
+    # In bytes, once decoded
+    content_size = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    # What Schema.refresh_summary() counts, across all subclasses
+    SUMMARIZED_FIELDS = {"schema", "language", "role", "is_open_source"}
 
     @classmethod
     def get_manifest_document_type_model_map(cls):
@@ -553,32 +1010,53 @@ class ReferenceItem(BaseModel):
         }
 
     @classmethod
-    def update_or_create_from_manifest_document(
-        cls, schema, document_url, document_metadata, created_by
-    ):
-        model_class = cls.get_manifest_document_type_model_map().get(
-            document_metadata.get("type")
-        )
-        if not model_class:
-            raise ValueError("Unsupported manifest document type")
-
-        return model_class.update_or_create_from_manifest_document(
-            schema, document_url, document_metadata, created_by
-        )
+    def get_manifest_document_fields(cls, document_metadata):
+        """
+        Maps a manifest document's metadata to this model's fields.
+        """
+        raise NotImplementedError
 
     def __str__(self):
         return self.url
 
     def save(self, *args, **kwargs):
-        # When the URL changes on an existing row, reset the failure
-        # timestamp AND evict the cached body.
-        if self.id:
-            original = self.__class__.objects.get(id=self.id)
-            if original.url != self.url:
-                self.content_fetch_failing_since = None
-                self.delete_cached_content()
+        # When the URL changes on an existing row, reset what we know
+        # about fetching it. Content is cached by URL, so the new URL's
+        # content is looked up (or fetched) separately anyway.
+        if not self._state.adding and self.get_original_value("url") != self.url:
+            self._reset_content_state()
 
-        super().save(*args, **kwargs)
+        self.set_derived_fields()
+
+        with transaction.atomic():
+            update_fields = super().save(*args, **kwargs)
+            # Only new items, and changes to what's summarized, affect it
+            if update_fields is None or set(update_fields) & self.SUMMARIZED_FIELDS:
+                self.schema.refresh_summary()
+        return update_fields
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.schema.refresh_summary()
+        return result
+
+    def set_derived_fields(self):
+        """
+        Sets the fields that are worked out from others, like the URL.
+        Called on save, and by anything that saves in bulk.
+        """
+        self.canonical_url = self.url_provider_info.canonical_resource
+
+    def _reset_content_state(self):
+        """
+        Forgets what we know about the content at the old URL.
+        """
+        self.content_fetch_failing_since = None
+        self.content_fetched_at = None
+        self.content_fetch_outcome = ""
+        self.content_fetch_duration = None
+        self.content_size = None
 
     def _get_content_url(self):
         # Resolve the URL to fetch content from
@@ -590,92 +1068,277 @@ class ReferenceItem(BaseModel):
         return self.url
 
     def _cache_key(self):
-        # Build a cache key from the model type and primary key.
-        # Includes class name because ReferenceItem is abstract —
-        # SchemaRef pk=1 and DocumentationItem pk=1 can coexist.
-        return f"content:{self.__class__.__name__.lower()}:{self.pk}"
+        # Shared by every item with the same content URL (see core/content_cache.py)
+        return content_cache.get_url_cache_key(self._get_content_url())
 
     def delete_cached_content(self):
-        cache.delete(self._cache_key())
+        content_cache.delete_entry(self._get_content_url())
+
+    @staticmethod
+    def _get_revalidation_headers(cached_entry):
+        # Revalidate an expired entry instead of downloading it again
+        # when the upstream server gave us validators for it
+        request_headers = {}
+        if cached_entry is not None:
+            if cached_entry.get("etag"):
+                request_headers["If-None-Match"] = cached_entry["etag"]
+            if cached_entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached_entry["last_modified"]
+        return request_headers
+
+    def _build_content_cache_entry_from_response(
+        self, response, cached_entry, fetch_duration
+    ):
+        # Works for both requests and httpx responses
+        if (
+            response.status_code == requests.codes.not_modified
+            and cached_entry is not None
+        ):
+            return self._build_content_cache_entry(
+                cached_entry["content"],
+                etag=response.headers.get("ETag") or cached_entry.get("etag"),
+                last_modified=response.headers.get("Last-Modified")
+                or cached_entry.get("last_modified"),
+                fetch_duration=fetch_duration,
+            )
+        return self._build_content_cache_entry(
+            response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fetch_duration=fetch_duration,
+        )
 
-    def _fetch_content(self):
-        # Fetch content from the remote URL with retry logic
+    @staticmethod
+    def _can_retry_content_fetch(exception, backoff, deadline):
+        # Retrying won't help with oversized responses or a spent deadline
+        return not isinstance(
+            exception, (ResponseTooLargeError, DeadlineExceededError)
+        ) and deadline.allows(backoff)
+
+    def _fetch_content(self, cached_entry=None):
+        # Fetch content from the remote URL with retry logic, returning a cache entry.
         # Failed fetches raise, so the caller (get_content) never caches a failure response
         content_url = self._get_content_url()
+        request_headers = self._get_revalidation_headers(cached_entry)
 
         # Retry logic with exponential backoff
         retries = 2
         # Initial backoff of 0.5s, then 1s, then 2s, etc (though currently limited to 2 retries)
         backoff_factor = 0.5
-        last_exception = None
+        # All attempts share one time budget, so retries can't hold a worker for long
+        deadline = Deadline()
+        started_at = time.monotonic()
 
         for i in range(retries + 1):  # +1 for the initial attempt
             try:
-                response = requests.get(content_url)
+                response = http_client.fetch(
+                    content_url, deadline=deadline, headers=request_headers
+                )
                 response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
+            except requests.exceptions.RequestException as e:
+                backoff = backoff_factor * (2**i)
+                if i < retries and self._can_retry_content_fetch(e, backoff, deadline):
+                    time.sleep(backoff)  # Exponential backoff
+                    continue
+                # All retries exhausted. Failures are tracked (and users notified)
+                # by the warm_content_cache command, not on the request path
+                raise
+
+            return self._build_content_cache_entry_from_response(
+                response, cached_entry, fetch_duration=time.monotonic() - started_at
+            )
 
-                if self.content_fetch_failing_since is not None:
-                    self.content_fetch_failing_since = None
-                    self.save()
+    async def _afetch_content(self, cached_entry=None):
+        # Async version of _fetch_content. Waiting on the network and
+        # the backoff leaves the event loop free to serve other requests.
+        content_url = self._get_content_url()
+        request_headers = self._get_revalidation_headers(cached_entry)
 
-                return response.text
+        retries = 2
+        backoff_factor = 0.5
+        deadline = Deadline()
+        started_at = time.monotonic()
+
+        for i in range(retries + 1):
+            try:
+                response = await http_client.afetch(
+                    content_url, deadline=deadline, headers=request_headers
+                )
+                if response.is_error:
+                    raise requests.exceptions.HTTPError(
+                        f"{response.status_code} Error for url: {content_url}"
+                    )
             except requests.exceptions.RequestException as e:
-                last_exception = e
-                if i < retries:
-                    time.sleep(backoff_factor * (2**i))  # Exponential backoff
-                else:
-                    # All retries exhausted, handle as a failure.
-
-                    # Only notify the user if it's an HTTPError
-                    # and hasn't already been failing
-                    is_http_error = isinstance(e, requests.exceptions.HTTPError)
-                    if is_http_error and self.content_fetch_failing_since is None:
-                        self.content_fetch_failing_since = timezone.now()
-                        self._send_failure_notification_email()
-                        self.save()
-
-                    raise last_exception  # Re-raise the last exception after all retries and email logic
+                backoff = backoff_factor * (2**i)
+                if i < retries and self._can_retry_content_fetch(e, backoff, deadline):
+                    await asyncio.sleep(backoff)
+                    continue
+                raise
+
+            return self._build_content_cache_entry_from_response(
+                response, cached_entry, fetch_duration=time.monotonic() - started_at
+            )
+
+    @staticmethod
+    def _build_content_cache_entry(
+        content, etag=None, last_modified=None, fetch_duration=0
+    ):
+        # Jitter the soft TTL so entries written together don't expire together
+        ttl = settings.CONTENT_CACHE_TTL * random.uniform(
+            1 - settings.CONTENT_CACHE_TTL_JITTER, 1
+        )
+        return {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetch_duration": fetch_duration,
+            "fresh_until": time.time() + ttl,
+        }
+
+    @staticmethod
+    def _is_content_cache_entry_stale(entry):
+        # Probabilistic early expiration: requests become more likely to
+        # refresh an entry the closer it is to going stale, and the longer
+        # it took to fetch, so refreshes are spread out instead of stampeding.
+        early_by = (
+            entry.get("fetch_duration", 0)
+            * settings.CONTENT_CACHE_EARLY_EXPIRATION_BETA
+            * -math.log(1 - random.random())
+        )
+        return time.time() + early_by >= entry["fresh_until"]
+
+    def _refresh_cached_content(self, cached_entry=None):
+        content_url = self._get_content_url()
+
+        # Only one worker refetches a given URL at a time. The rest serve
+        # what's cached, or wait a little while for the new content.
+        with cache_lock(
+            f"{self._cache_key()}:fetch_lock",
+            timeout=settings.CONTENT_FETCH_LOCK_TIMEOUT,
+        ) as acquired:
+            if not acquired:
+                if cached_entry is not None:
+                    return cached_entry["content"]
+                fetched_entry = wait_for_value(
+                    lambda: content_cache.get_entry(content_url),
+                    timeout=settings.CONTENT_FETCH_LOCK_WAIT,
+                )
+                if fetched_entry is not None:
+                    return fetched_entry["content"]
+                # Whoever holds the lock is taking too long, so fetch it ourselves
+
+            return self._fetch_and_cache_content(cached_entry)["content"]
+
+    async def _arefresh_cached_content(self, cached_entry=None):
+        content_url = self._get_content_url()
+
+        async with acache_lock(
+            f"{self._cache_key()}:fetch_lock",
+            timeout=settings.CONTENT_FETCH_LOCK_TIMEOUT,
+        ) as acquired:
+            if not acquired:
+                if cached_entry is not None:
+                    return cached_entry["content"]
+                fetched_entry = await await_value(
+                    lambda: content_cache.aget_entry(content_url),
+                    timeout=settings.CONTENT_FETCH_LOCK_WAIT,
+                )
+                if fetched_entry is not None:
+                    return fetched_entry["content"]
+
+            entry = await self._afetch_and_cache_content(cached_entry)
+            return entry["content"]
+
+    def _fetch_and_cache_content(self, cached_entry=None):
+        entry = self._fetch_content(cached_entry=cached_entry)
+        content_cache.set_entry(self._get_content_url(), entry)
+        if self._should_handle_fetched_content(entry["content"]):
+            self._handle_fetched_content(entry["content"])
+        return entry
+
+    async def _afetch_and_cache_content(self, cached_entry=None):
+        entry = await self._afetch_content(cached_entry=cached_entry)
+        await content_cache.aset_entry(self._get_content_url(), entry)
+        if self._should_handle_fetched_content(entry["content"]):
+            await sync_to_async(self._handle_fetched_content)(entry["content"])
+        return entry
+
+    def _should_handle_fetched_content(self, content):
+        return False
+
+    def _handle_fetched_content(self, content):
+        """
+        Called with freshly fetched content when _should_handle_fetched_content()
+        says so, for subclasses to keep anything they derive from it up to date.
+        """
+        pass
+
+    def _schedule_cached_content_refresh(self, cached_entry):
+        model_class = self.__class__
+        pk = self.pk
+
+        def refresh_cached_content():
+            # Use a fresh instance, since this runs on another thread
+            reference_item = model_class.objects.filter(pk=pk).first()
+            if reference_item is not None:
+                reference_item._refresh_cached_content(cached_entry=cached_entry)
+
+        schedule_background_task(self._cache_key(), refresh_cached_content)
 
     def get_content(self):
         if not is_trusted_content_host_url(self._get_content_url()):
             return ""
 
         # Fetch remote file content, using cache when available
-        cache_key = self._cache_key()
+        cached_entry = content_cache.get_entry(self._get_content_url())
 
-        try:
-            cached = cache.get(cache_key)
-        except Exception as exc:
-            logger.warning(
-                "content_cache_backend_fallback cache_key=%s "
-                "operation=get exception=%s message=%s",
-                cache_key,
-                exc.__class__.__name__,
-                exc,
-            )
-            cached = None
-        if cached is not None:
-            return cached
+        if cached_entry is None:
+            # Nothing to serve in the meantime, so we have to wait for it
+            return self._refresh_cached_content()
 
-        content = self._fetch_content()
+        if not self._is_content_cache_entry_stale(cached_entry):
+            return cached_entry["content"]
 
-        try:
-            cache.set(cache_key, content, timeout=settings.CONTENT_CACHE_TTL)
-        except Exception as exc:
-            # django_redis IGNORE_EXCEPTIONS only catches ConnectionInterrupted.
-            # Anything else (serialization issues, etc.) is logged here so the
-            # cache failure is visible without breaking the request.
-            logger.warning(
-                "content_cache_backend_fallback cache_key=%s "
-                "operation=set exception=%s message=%s",
-                cache_key,
-                exc.__class__.__name__,
-                exc,
-            )
+        if settings.CONTENT_REFRESH_IN_BACKGROUND:
+            self._schedule_cached_content_refresh(cached_entry)
+            return cached_entry["content"]
+
+        return self._refresh_cached_content(cached_entry=cached_entry)
+
+    async def aget_content(self):
+        """
+        Async version of get_content(), for async views.
+        """
+        if not is_trusted_content_host_url(self._get_content_url()):
+            return ""
+
+        cached_entry = await content_cache.aget_entry(self._get_content_url())
 
-        return content
+        if cached_entry is None:
+            return await self._arefresh_cached_content()
 
-    def _send_failure_notification_email(self):
+        if not self._is_content_cache_entry_stale(cached_entry):
+            return cached_entry["content"]
+
+        if settings.CONTENT_REFRESH_IN_BACKGROUND:
+            # Background refreshes run on the thread pool, not the event loop
+            self._schedule_cached_content_refresh(cached_entry)
+            return cached_entry["content"]
+
+        return await self._arefresh_cached_content(cached_entry=cached_entry)
+
+    async def awarm_cached_content(self):
+        """
+        Fetches content into the cache even if the cached copy is still
+        fresh, so visitors don't have to wait for it. Cached content is
+        revalidated rather than downloaded again when possible.
+        Returns the new cache entry, and raises if the fetch fails.
+        """
+        cached_entry = await content_cache.aget_entry(self._get_content_url())
+        return await self._afetch_and_cache_content(cached_entry)
+
+    def send_failure_notification_email(self):
+        # Sent by a background job (see core/tasks.py), which retries on failure
         recipient_email = self.created_by.email
         subject = "Schemas.Pub Content Failure"
         resource = f"{self.name}: {self.url}" if self.name else self.url
@@ -692,7 +1355,6 @@ class ReferenceItem(BaseModel):
             message,
             settings.DEFAULT_FROM_EMAIL,
             [recipient_email],
-            fail_silently=True,
         )
 
     def to_manifest_document_metadata(self):
@@ -707,36 +1369,191 @@ class SchemaRef(ReferenceItem):
     schema = models.ForeignKey(Schema, on_delete=models.CASCADE)
     permanent_urls = GenericRelation(PermanentURL, related_query_name="schemaref")
     id_value = models.URLField(blank=True, null=True)
+    # SHA-256 of the content id_value was read from
+    id_value_content_hash = models.CharField(
+        max_length=64, blank=True, null=True, editable=False
+    )
+    # Set while the schema is published, so the database can guarantee
+    # that a canonical URL belongs to at most one published schema.
+    # See Schema._sync_published_url_claims
+    claims_published_url = models.BooleanField(default=False, editable=False)
+    # Guessed from the URL's file extension on save,
+    # so listings can filter by language in SQL.
+    language = models.CharField(max_length=50, blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["schema", "language"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["canonical_url"],
+                condition=Q(claims_published_url=True),
+                name="unique_published_schemaref_canonical_url",
+            )
+        ]
 
     @classmethod
-    def update_or_create_from_manifest_document(
-        cls, schema, document_url, document_metadata, created_by
-    ):
-        return schema.schemaref_set.update_or_create(
-            url=document_url,
-            defaults={"name": document_metadata.get("name"), "created_by": created_by},
-        )
+    def get_manifest_document_fields(cls, document_metadata):
+        return {"name": document_metadata.get("name")}
 
-    @property
-    def language(self):
-        return guess_specification_language_by_extension(self.url)
+    def _should_claim_published_url(self):
+        canonical_url = self.url_provider_info.canonical_resource
+        if not canonical_url or self.schema.published_at is None:
+            return False
+        # Only one SchemaRef per schema holds the claim for a given resource
+        return (
+            not SchemaRef.objects
+            .filter(
+                schema_id=self.schema_id,
+                canonical_url=canonical_url,
+                claims_published_url=True,
+            )
+            .exclude(pk=self.pk)
+            .exists()
+        )
 
     def save(self, *args, **kwargs):
+        from .tasks import enqueue_id_value_extraction
+
+        self.claims_published_url = self._should_claim_published_url()
+        update_fields = super().save(*args, **kwargs)
+
+        # The $id is read from the content as it's fetched, rather than
+        # fetching it here, while the caller's transaction holds locks
+        if self.needs_id_value_extraction:
+            enqueue_id_value_extraction([self])
+        return update_fields
+
+    def set_derived_fields(self):
+        super().set_derived_fields()
+        self.language = guess_specification_language_by_extension(self.url)
         if self.language != "json":
             self.id_value = None
-            super().save(*args, **kwargs)
-            return
+            self.id_value_content_hash = None
+
+    @property
+    def needs_id_value_extraction(self):
+        return self.language == "json" and self.id_value_content_hash is None
+
+    def _reset_content_state(self):
+        super()._reset_content_state()
+        self.id_value = None
+        self.id_value_content_hash = None
 
-        # Try to parse out an $id for the id_value field
+    @staticmethod
+    def _parse_id_value(content):
         try:
-            content = self.get_content()
             parsed_data = json.loads(content)
-            if isinstance(parsed_data, dict):
-                self.id_value = parsed_data.get("$id")
-        except (json.JSONDecodeError, TypeError, requests.exceptions.RequestException):
-            self.id_value = None
+        except (json.JSONDecodeError, TypeError):
+            return None
+        if not isinstance(parsed_data, dict):
+            return None
+        id_value = parsed_data.get("$id")
+        return id_value if isinstance(id_value, str) else None
 
-        super().save(*args, **kwargs)
+    def _should_handle_fetched_content(self, content):
+        return self.language == "json" and self.id_value_content_hash != (
+            hashlib.sha256(content.encode()).hexdigest()
+        )
+
+    def _handle_fetched_content(self, content):
+        self.id_value = self._parse_id_value(content)
+        self.id_value_content_hash = hashlib.sha256(content.encode()).hexdigest()
+        id_value_cache.set_id_value(self._get_content_url(), self.id_value)
+        # Every SchemaRef for this resource (e.g. both the GitHub blob and raw
+        # URLs of a file) has the same content, so update them all, though
+        # only where it changed since their $id was last read
+        SchemaRef.objects.filter(
+            canonical_url=self.url_provider_info.canonical_resource
+        ).exclude(id_value_content_hash=self.id_value_content_hash).update(
+            id_value=self.id_value, id_value_content_hash=self.id_value_content_hash
+        )
+        if getattr(self, "_loaded_values", {}).get("url") == self.url:
+            # Our own row was updated too
+            self._remember_loaded_values(["id_value", "id_value_content_hash"])
+
+    def refresh_id_value(self):
+        """
+        Reads the $id from the current content, fetching it if it isn't
+        cached. $id values are otherwise kept up to date in the background,
+        so this is only for checks that can't wait, like publishing.
+        Raises a RequestException if the content can't be fetched.
+        """
+        self.language = guess_specification_language_by_extension(self.url)
+        if self.language != "json":
+            return
+        # Fetching new content updates the $id along the way,
+        # but content served from the cache may not have been read yet
+        content = self.get_content()
+        if self._should_handle_fetched_content(content):
+            self._handle_fetched_content(content)
+
+    def read_id_value(self):
+        """
+        Returns the $id of the content, fetching it if it isn't cached,
+        or None if it can't be fetched. Caches what it reads, but saves nothing.
+        """
+        if guess_specification_language_by_extension(self.url) != "json":
+            return None
+        content_url = self._get_content_url()
+        entry = content_cache.get_entry(content_url)
+        if entry is None:
+            if not is_trusted_content_host_url(content_url):
+                return None
+            try:
+                entry = self._fetch_content()
+            except requests.exceptions.RequestException:
+                return None
+            content_cache.set_entry(content_url, entry)
+        id_value = self._parse_id_value(entry["content"])
+        id_value_cache.set_id_value(content_url, id_value)
+        return id_value
+
+    @classmethod
+    def read_id_values(cls, schema_refs, fetch=False):
+        """
+        Returns the set of $id values of `schema_refs` (which may be unsaved),
+        without saving anything. They're read from the $id cache all at once,
+        then from SchemaRefs saved for the same resources in one query.
+        Any left over are only read (and fetched, one by one) if `fetch`.
+        """
+        schema_refs = [
+            schema_ref
+            for schema_ref in schema_refs
+            if guess_specification_language_by_extension(schema_ref.url) == "json"
+        ]
+        cached_id_values = id_value_cache.get_id_values({
+            schema_ref._get_content_url() for schema_ref in schema_refs
+        })
+
+        id_values = set()
+        unread_schema_refs = []
+        for schema_ref in schema_refs:
+            content_url = schema_ref._get_content_url()
+            if content_url in cached_id_values:
+                id_values.add(cached_id_values[content_url])
+            elif schema_ref.id_value_content_hash is not None:
+                id_values.add(schema_ref.id_value)
+            else:
+                unread_schema_refs.append(schema_ref)
+
+        if unread_schema_refs:
+            saved_id_values = dict(
+                cls.objects.filter(
+                    canonical_url__in={
+                        schema_ref.url_provider_info.canonical_resource
+                        for schema_ref in unread_schema_refs
+                    },
+                    id_value_content_hash__isnull=False,
+                ).values_list("canonical_url", "id_value")
+            )
+            for schema_ref in unread_schema_refs:
+                canonical_url = schema_ref.url_provider_info.canonical_resource
+                if canonical_url in saved_id_values:
+                    id_values.add(saved_id_values[canonical_url])
+                elif fetch:
+                    id_values.add(schema_ref.read_id_value())
+
+        return {id_value for id_value in id_values if id_value}
 
     def to_manifest_document_metadata(self):
         metadata = super().to_manifest_document_metadata()
@@ -764,20 +1581,17 @@ class DocumentationItem(ReferenceItem):
         max_length=100, choices=DocumentationItemFormat, blank=True, null=True
     )
 
+    class Meta:
+        indexes = [models.Index(fields=["schema", "role"])]
+
     @classmethod
-    def update_or_create_from_manifest_document(
-        cls, schema, document_url, document_metadata, created_by
-    ):
-        return schema.documentationitem_set.update_or_create(
-            url=document_url,
-            defaults={
-                "name": document_metadata["name"],
-                "description": document_metadata.get("description"),
-                "role": document_metadata.get("role"),
-                "format": document_metadata.get("format"),
-                "created_by": created_by,
-            },
-        )
+    def get_manifest_document_fields(cls, document_metadata):
+        return {
+            "name": document_metadata["name"],
+            "description": document_metadata.get("description"),
+            "role": document_metadata.get("role"),
+            "format": document_metadata.get("format"),
+        }
 
     def __str__(self):
         return self.name
@@ -803,16 +1617,8 @@ class Implementation(ReferenceItem):
     schema = models.ForeignKey(Schema, on_delete=models.CASCADE)
 
     @classmethod
-    def update_or_create_from_manifest_document(
-        cls, schema, document_url, document_metadata, created_by
-    ):
-        return schema.implementation_set.update_or_create(
-            url=document_url,
-            defaults={
-                "is_open_source": document_metadata.get("isOpenSource") or False,
-                "created_by": created_by,
-            },
-        )
+    def get_manifest_document_fields(cls, document_metadata):
+        return {"is_open_source": document_metadata.get("isOpenSource") or False}
 
     def to_manifest_document_metadata(self):
         metadata = super().to_manifest_document_metadata()
@@ -860,7 +1666,9 @@ class Profile(models.Model):
             new_secret = secrets.token_urlsafe(32)
 
             APIKey.objects.create(
-                profile=self, prefix=new_prefix, hashed_secret=make_password(new_secret)
+                profile=self,
+                prefix=new_prefix,
+                hashed_secret=APIKey.hash_secret(new_secret),
             )
 
         return f"{new_prefix}.{new_secret}"
@@ -873,15 +1681,39 @@ class APIKeyManager(models.Manager):
 
         prefix, secret = raw_api_key.split(".", 1)
         try:
-            api_key = self.select_related("profile").get(prefix=prefix)
+            api_key = self.select_related("profile__user").get(prefix=prefix)
         except self.model.DoesNotExist:
             return None
 
-        if check_password(secret, api_key.hashed_secret):
+        if api_key.check_secret(secret):
             return api_key
 
         return None
 
+    def get_profile_from_key(self, raw_api_key):
+        """
+        Returns the Profile (with its user) that owns the key, or None.
+        Keys verified recently are trusted without re-checking the secret.
+        """
+        cached_owner = get_cached_api_key_owner(raw_api_key)
+        if cached_owner is not None:
+            profile_id, _, api_key_id = cached_owner
+            # None if the key has been rotated or deleted since
+            return (
+                Profile.objects
+                .select_related("user")
+                .filter(id=profile_id, api_key__id=api_key_id)
+                .first()
+            )
+
+        api_key = self.get_from_key(raw_api_key)
+        if api_key is None:
+            return None
+
+        profile = api_key.profile
+        set_cached_api_key_owner(raw_api_key, profile.id, profile.user_id, api_key.id)
+        return profile
+
 
 # An API key consists of a plaintext prefix for querying,
 # and a hashed secret for actual authentication.
@@ -896,5 +1728,95 @@ class APIKey(models.Model):
     hashed_secret = models.CharField(max_length=128, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Secrets are random 256-bit tokens, so unlike passwords they don't need
+    # a slow, salted hasher. A peppered HMAC is enough and costs microseconds.
+    # Keys issued before this scheme existed are stored with make_password
+    # and are upgraded the next time they're used successfully.
+    HMAC_SHA256_ALGORITHM = "hmac_sha256"
+
     def __str__(self):
         return f"Key {self.prefix} for {self.profile}"
+
+    @classmethod
+    def hash_secret(cls, secret):
+        digest = hmac.new(
+            settings.API_KEY_PEPPER.encode(), secret.encode(), hashlib.sha256
+        ).hexdigest()
+        return f"{cls.HMAC_SHA256_ALGORITHM}${digest}"
+
+    def check_secret(self, secret):
+        if self.hashed_secret.startswith(f"{self.HMAC_SHA256_ALGORITHM}$"):
+            return hmac.compare_digest(
+                self.hash_secret(secret).encode(), self.hashed_secret.encode()
+            )
+
+        # Legacy password-hasher format
+        if not check_password(secret, self.hashed_secret):
+            return False
+        self.hashed_secret = self.hash_secret(secret)
+        self.save(update_fields=["hashed_secret"])
+        return True
+
+
+@receiver(post_delete, sender=APIKey)
+def invalidate_deleted_api_key(sender, instance, **kwargs):
+    # Also sent when the key is deleted along with its profile or user
+    profile_id = instance.profile_id
+    transaction.on_commit(lambda: invalidate_cached_api_key_owner(profile_id))
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by `manage.py run_jobs` (see core/jobs.py).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    queue = models.CharField(max_length=50)
+    # Dotted path to a function decorated with core.jobs.task
+    task = models.CharField(max_length=200)
+    arguments = models.JSONField(default=dict)
+    # At most one job per key is queued at a time
+    dedupe_key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # What workers scan when claiming jobs
+            models.Index(
+                fields=["queue", "run_after"],
+                condition=Q(status="queued"),
+                name="job_queued_idx",
+            ),
+            models.Index(
+                fields=["queue", "started_at"],
+                condition=Q(status="running"),
+                name="job_running_idx",
+            ),
+            models.Index(fields=["finished_at"], name="job_finished_at_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=Q(status="queued"),
+                name="unique_queued_job_dedupe_key",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
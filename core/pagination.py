@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) pagination for schema listings.
+
+Rather than counting results and skipping over earlier pages with OFFSET,
+each page picks up where the previous one left off using its last row's
+sort key. Ranked search results are ordered by (rank, name, id) and plain
+listings by (name, id), so every page is an index-friendly range scan and
+walking the whole registry costs linear time overall.
+
+Cursors are opaque, signed tokens so clients can't craft their own.
+"""
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "core.pagination"
+
+
+class InvalidCursorError(ValueError):
+    """
+    Exception raised when a continuation token can't be decoded
+    or doesn't match the listing it's used with.
+    """
+
+
+def _encode_cursor(sort_key):
+    return signing.dumps(sort_key, salt=CURSOR_SALT, compress=True)
+
+
+def _decode_cursor(cursor, expected_length):
+    try:
+        sort_key = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursorError("Invalid cursor")
+
+    if not isinstance(sort_key, list) or len(sort_key) != expected_length:
+        raise InvalidCursorError("Cursor does not match this listing")
+
+    return sort_key
+
+
+def paginate_schemas(queryset, page_size, cursor=None):
+    """
+    Returns a page of schemas from `queryset` and a cursor for the next page,
+    or None if this is the last page.
+
+    Querysets ranked by SchemaQuerySet.search() are paginated by relevance,
+    and anything else alphabetically.
+    """
+    is_ranked = "rank" in queryset.query.annotations
+
+    if is_ranked:
+        queryset = queryset.order_by("-rank", "name", "id")
+        if cursor:
+            rank, name, id = _decode_cursor(cursor, expected_length=3)
+            queryset = queryset.filter(
+                Q(rank__lt=rank)
+                | Q(rank=rank, name__gt=name)
+                | Q(rank=rank, name=name, id__gt=id)
+            )
+    else:
+        queryset = queryset.order_by("name", "id")
+        if cursor:
+            name, id = _decode_cursor(cursor, expected_length=2)
+            queryset = queryset.filter(Q(name__gt=name) | Q(name=name, id__gt=id))
+
+    # Fetch one extra row to find out whether there's another page
+    page = list(queryset[: page_size + 1])
+    if len(page) <= page_size:
+        return page, None
+
+    page = page[:page_size]
+    last_schema = page[-1]
+    next_sort_key = (
+        [last_schema.rank, last_schema.name, last_schema.id]
+        if is_ranked
+        else [last_schema.name, last_schema.id]
+    )
+    return page, _encode_cursor(next_sort_key)
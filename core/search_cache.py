@@ -0,0 +1,146 @@
+"""
+Full-text search result cache.
+
+Ranking schemas against a `websearch` query is the most expensive query we
+run, and the auto-submitting search box and MCP agents repeat the same ones
+constantly. The ranked (id, rank) pairs for a normalized query are cached in
+the shared Django cache and callers re-apply their own scope and filters on
+top, so a single entry serves every user.
+
+Rather than hunting down affected entries when a schema changes, every key
+includes a "registry generation" counter which is bumped on each change,
+orphaning all older entries at once to expire on their own.
+
+Concurrent misses for the same query wait for a single computation, both
+within a process and (via a short-lived lock in the cache) across processes.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("schemaindex")
+
+_GENERATION_CACHE_KEY = "search:generation"
+_LOCK_POLL_INTERVAL = 0.05
+
+# Marks queries that match too many schemas to be worth caching
+TOO_MANY_RESULTS = "too_many_results"
+
+_inflight_locks = {}
+_inflight_locks_lock = threading.Lock()
+
+
+def _log_fallback(operation, exc):
+    logger.warning(
+        "search_cache_backend_fallback operation=%s exception=%s message=%s",
+        operation,
+        exc.__class__.__name__,
+        exc,
+    )
+
+
+def normalize_search_query(query_text):
+    return " ".join((query_text or "").split())
+
+
+def get_registry_generation():
+    try:
+        # add() is a no-op if the counter already exists
+        cache.add(_GENERATION_CACHE_KEY, 1, timeout=None)
+        return cache.get(_GENERATION_CACHE_KEY, 1)
+    except Exception as exc:
+        _log_fallback("get_generation", exc)
+        return None
+
+
+def bump_registry_generation():
+    """
+    Invalidates every cached search result.
+    """
+    try:
+        cache.incr(_GENERATION_CACHE_KEY)
+    except ValueError:
+        # The counter expired or was evicted, which orphans old entries anyway
+        try:
+            cache.add(_GENERATION_CACHE_KEY, 1, timeout=None)
+        except Exception as exc:
+            _log_fallback("bump_generation", exc)
+    except Exception as exc:
+        _log_fallback("bump_generation", exc)
+
+
+def _get_result_cache_key(generation, normalized_query):
+    query_digest = hashlib.sha256(normalized_query.encode()).hexdigest()
+    return f"search:results:{generation}:{query_digest}"
+
+
+def _get_inflight_lock(cache_key):
+    with _inflight_locks_lock:
+        return _inflight_locks.setdefault(cache_key, threading.Lock())
+
+
+def _wait_for_other_process(cache_key):
+    deadline = time.monotonic() + settings.SEARCH_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(_LOCK_POLL_INTERVAL)
+        results = cache.get(cache_key)
+        if results is not None:
+            return results
+    return None
+
+
+def get_cached_search_results(query_text, compute_results):
+    """
+    Returns the cached results for `query_text`, calling `compute_results()`
+    to fill the cache on a miss. Results must be JSON/pickle serializable.
+    """
+    normalized_query = normalize_search_query(query_text)
+    generation = get_registry_generation()
+    if generation is None:
+        return compute_results()
+
+    cache_key = _get_result_cache_key(generation, normalized_query)
+    try:
+        results = cache.get(cache_key)
+    except Exception as exc:
+        _log_fallback("get", exc)
+        return compute_results()
+    if results is not None:
+        return results
+
+    try:
+        with _get_inflight_lock(cache_key):
+            return _compute_once(cache_key, compute_results)
+    finally:
+        with _inflight_locks_lock:
+            _inflight_locks.pop(cache_key, None)
+
+
+def _compute_once(cache_key, compute_results):
+    lock_cache_key = f"{cache_key}:lock"
+    try:
+        # Another thread may have filled the cache while we waited
+        results = cache.get(cache_key)
+        if results is not None:
+            return results
+
+        if not cache.add(lock_cache_key, 1, timeout=settings.SEARCH_CACHE_LOCK_TIMEOUT):
+            results = _wait_for_other_process(cache_key)
+            if results is not None:
+                return results
+    except Exception as exc:
+        _log_fallback("lock", exc)
+        return compute_results()
+
+    results = compute_results()
+    try:
+        cache.set(cache_key, results, timeout=settings.SEARCH_CACHE_TTL)
+        cache.delete(lock_cache_key)
+    except Exception as exc:
+        _log_fallback("set", exc)
+    return results
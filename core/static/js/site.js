@@ -230,6 +230,46 @@
         }
       });
 
+    Array.from(document.querySelectorAll('.js-typeahead-input'))
+      .filter(
+        /** @returns {input is HTMLInputElement} */
+        (input) => input instanceof HTMLInputElement && Boolean(input.list)
+      )
+      .forEach((input) => {
+        const suggestionsUrl = input.dataset.suggestionsUrl;
+        const datalist = input.list;
+        if (!suggestionsUrl || !datalist) {
+          return;
+        }
+        const handleInput = async () => {
+          const query = input.value.trim();
+          if (query.length < 2) {
+            datalist.replaceChildren();
+            return;
+          }
+          try {
+            const params = new URLSearchParams({ q: query });
+            const response = await fetch(`${suggestionsUrl}?${params}`);
+            if (!response.ok) {
+              return;
+            }
+            /** @type {{suggestions: {id: number, name: string}[]}} */
+            const { suggestions } = await response.json();
+            datalist.replaceChildren(
+              ...suggestions.map(({ name }) => {
+                const option = document.createElement('option');
+                option.value = name;
+                return option;
+              })
+            );
+            // eslint-disable-next-line no-unused-vars
+          } catch (err) {
+            // Suggestions are a nicety; the search itself still works
+          }
+        };
+        input.addEventListener('input', debounce(handleInput, 150));
+      });
+
     Array.from(document.querySelectorAll('.js-autosubmit-select'))
       .filter(
         /** @returns {input is (HTMLSelectElement & {form: HTMLFormElement})} */
@@ -0,0 +1,129 @@
+"""
+Background tasks (see core/jobs.py).
+"""
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .jobs import PermanentError, task
+from .models import Job, Schema, SchemaRef
+
+
+@task(queue="email")
+def send_content_failure_email(model_name, reference_item_id):
+    model_class = apps.get_model("core", model_name)
+    reference_item = (
+        model_class.objects
+        .select_related("schema", "created_by")
+        .filter(id=reference_item_id)
+        .first()
+    )
+    # It may have been deleted since
+    if reference_item is not None:
+        reference_item.send_failure_notification_email()
+
+
+@task(queue="content")
+def extract_schema_ref_id_value(schema_ref_id):
+    schema_ref = SchemaRef.objects.filter(id=schema_ref_id).first()
+    if schema_ref is not None:
+        # Raises (so the job is retried) if the content can't be fetched
+        schema_ref.refresh_id_value()
+
+
+def enqueue_id_value_extraction(schema_refs):
+    """
+    Queues $id extraction for `schema_refs` (which must be saved), in one query.
+    """
+    extract_schema_ref_id_value.enqueue_many(
+        (f"schema_ref_id_value:{schema_ref.id}", {"schema_ref_id": schema_ref.id})
+        for schema_ref in schema_refs
+    )
+
+
+@task(queue="manifests", bind=True)
+def apply_manifest(job, manifest, user_id, schema_id=None):
+    """
+    Applies a validated `manifest` to the schema with `schema_id`, or to a new
+    schema if there's no `schema_id`, on behalf of the user with `user_id`.
+
+    Updates to one schema are applied one at a time, in the order they were
+    queued: a manifest is dropped if a newer one has already been applied.
+    """
+    with transaction.atomic():
+        if schema_id is None:
+            schema = Schema(created_by_id=user_id)
+        else:
+            schema = (
+                Schema.objects
+                .select_for_update()
+                .filter(id=schema_id, created_by_id=user_id)
+                .first()
+            )
+            if schema is None:
+                raise PermanentError("The schema has been deleted")
+            if Job.objects.filter(
+                task=job.task,
+                arguments__schema_id=schema_id,
+                id__gt=job.id,
+                status=Job.Status.SUCCEEDED,
+            ).exists():
+                raise PermanentError(
+                    "A manifest sent later has already been applied to the schema"
+                )
+        try:
+            changes = schema.overwrite_from_manifest(manifest)
+        except ValidationError as e:
+            raise PermanentError(e.message) from e
+
+        result = {
+            "id": schema.id,
+            "url": reverse("schema_detail", kwargs={"schema_id": schema.id}),
+            **changes,
+        }
+        # Recorded along with the changes, so the next job to lock the schema
+        # knows this one was applied, and so running this job again (if its
+        # worker dies) updates the schema it created rather than another one
+        job.arguments = {**job.arguments, "schema_id": schema.id}
+        job.status = Job.Status.SUCCEEDED
+        job.result = result
+        job.last_error = ""
+        job.finished_at = timezone.now()
+        job.save(
+            update_fields=[
+                "arguments",
+                "status",
+                "result",
+                "last_error",
+                "finished_at",
+                "updated_at",
+            ]
+        )
+
+    return result
+
+
+def enqueue_manifest(manifest, schema):
+    """
+    Queues `manifest` to be applied to `schema`, which is created by
+    the job if it isn't saved yet. Returns the Job.
+    """
+    return apply_manifest.enqueue(
+        manifest=manifest, user_id=schema.created_by_id, schema_id=schema.id
+    )
+
+
+def get_manifest_jobs(user):
+    return Job.objects.filter(task=apply_manifest.name, arguments__user_id=user.id)
+
+
+def get_manifest_job_status(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "result": job.result,
+        "error": job.last_error if job.status == Job.Status.FAILED else None,
+    }
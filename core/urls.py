@@ -5,10 +5,12 @@ from core.api import views as api_views
 
 api_endpoints = [
     path("find", api_views.find, name="api_find"),
+    path("search", api_views.search, name="api_search"),
     path("schemas", api_views.schemas_create, name="api_schemas_create"),
     path(
         "schemas/<int:schema_id>", api_views.schemas_update, name="api_schemas_update"
     ),
+    path("jobs/<int:job_id>", api_views.jobs_detail, name="api_jobs_detail"),
 ]
 
 urlpatterns = [
@@ -18,6 +20,7 @@ urlpatterns = [
     path("docs/mcp", views.docs_mcp, name="docs_mcp"),
     path("terms-of-use", views.terms_of_use, name="terms_of_use"),
     path("privacy", views.privacy_policy, name="privacy_policy"),
+    path("schemas/suggestions", views.schema_suggestions, name="schema_suggestions"),
     path("schemas/<int:schema_id>", views.schema_detail, name="schema_detail"),
     path(
         "schemas/<int:schema_id>/definition/<int:schema_ref_id>",
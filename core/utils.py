@@ -1,14 +1,16 @@
 from urllib.parse import urlparse
-from pygments.lexers import get_lexer_for_filename
+from pygments import highlight
+from pygments.filter import Filter
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name, get_lexer_for_filename
+from pygments.token import Keyword, Name
 from pygments.util import ClassNotFound
 from django.conf import settings
 
 """
-This is currently just a list of languages supported
-by our syntax highlighter, Highlight.js, *without plaintext.*
-You can regenerate this list by loading up the site,
-opening a JS REPL in the browser's dev tools,
-and executing `hljs.listLanguanges()`.
+This is currently just a list of languages our syntax highlighting
+used to support (back when it was done in the browser by Highlight.js),
+*without plaintext.*
 
 CDDL is an IETF schema language so it is added.  We may eventually need some logic so that we
 can less tightly connect what file extension something is to what we tell the highlighter what to use.
@@ -80,6 +82,97 @@ def guess_specification_language_by_extension(url):
     return guess_language_by_extension(url, SPECIFICATION_LANGUAGE_ALLOWLIST)
 
 
+# https://json-schema.org/understanding-json-schema/keywords
+JSON_SCHEMA_KEYWORDS = [
+    "$anchor",
+    "$comment",
+    "$defs",
+    "$dynamicAnchor",
+    "$dynamicRef",
+    "$id",
+    "$ref",
+    "$schema",
+    "$vocabulary",
+    "additionalProperties",
+    "allOf",
+    "anyOf",
+    "const",
+    "contains",
+    "contentEncoding",
+    "contentMediaType",
+    "contentSchema",
+    "default",
+    "dependentRequired",
+    "dependentSchemas",
+    "deprecated",
+    "description",
+    "else",
+    "enum",
+    "examples",
+    "exclusiveMaximum",
+    "exclusiveMinimum",
+    "format",
+    "if",
+    "items",
+    "maxContains",
+    "maximum",
+    "maxItems",
+    "maxLength",
+    "maxProperties",
+    "minContains",
+    "minimum",
+    "minItems",
+    "minLength",
+    "minProperties",
+    "multipleOf",
+    "not",
+    "oneOf",
+    "pattern",
+    "patternProperties",
+    "prefixItems",
+    "properties",
+    "propertyNames",
+    "readOnly",
+    "required",
+    "then",
+    "title",
+    "type",
+    "unevaluatedItems",
+    "unevaluatedProperties",
+    "uniqueItems",
+    "writeOnly",
+]
+
+
+class JSONSchemaKeywordFilter(Filter):
+    """
+    Highlights object keys that are JSON Schema keywords
+    as keywords, rather than as any other key.
+    """
+
+    _keys = frozenset(f'"{keyword}"' for keyword in JSON_SCHEMA_KEYWORDS)
+
+    def filter(self, lexer, stream):
+        for token_type, value in stream:
+            if token_type is Name.Tag and value in self._keys:
+                token_type = Keyword
+            yield token_type, value
+
+
+def highlight_code(code, language):
+    """
+    Returns `code` as HTML, with its tokens wrapped in spans whose
+    classes are styled in static/css/syntax-highlighting.css.
+    `language` is a Pygments short name; raises ClassNotFound if
+    there's no such lexer.
+    """
+    # Keep the content exactly as it is, leading blank lines and all
+    lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False)
+    if language == "json":
+        lexer.add_filter(JSONSchemaKeywordFilter())
+    return highlight(code, lexer, HtmlFormatter(nowrap=True))
+
+
 def is_trusted_content_host_url(url):
     parsed_url = urlparse(url)
     hostname = parsed_url.hostname
@@ -1,7 +1,13 @@
+import hashlib
+import html
+import importlib.metadata
+import json
 import logging
+import re
 import uuid
 
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from django.contrib.auth.decorators import login_required
@@ -10,10 +16,15 @@ from django.core.exceptions import PermissionDenied
 from django.http import Http404, JsonResponse
 from django.conf import settings
 from django.urls import reverse
+from django.db.models import Exists, OuterRef
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_GET
 from functools import wraps
 import requests
 import cmarkgfm
 import bleach
+import pygments
+from pygments.util import ClassNotFound
 from .models import (
     Schema,
     SchemaRef,
@@ -23,9 +34,13 @@ from .models import (
     Implementation,
     PublishedSchemaConflictError,
 )
+from . import content_cache
+from .utils import JSON_SCHEMA_KEYWORDS, highlight_code
 from .forms import SchemaForm, PermanentURLForm
+from .pagination import paginate_schemas, InvalidCursorError
 
 MAX_SCHEMA_RESULT_COUNT = 30
+MAX_SCHEMA_SUGGESTION_COUNT = 8
 
 # Pulled these from https://github.com/yourcelf/bleach-allowlist.
 # These are the only tags/attributes we'll allow to be rendered from Markdown sources.
@@ -69,19 +84,69 @@ MARKDOWN_HTML_ATTRIBUTES = {
     "*": ["id"],
     "img": ["src", "alt", "title"],
     "a": ["href", "alt", "title"],
+    # The language of fenced code blocks
+    "pre": ["lang"],
 }
+# Names cached Markdown renderings. It changes along with the renderer,
+# the sanitizer, the allowlists or the highlighter, so stale HTML is never served.
+MARKDOWN_RENDERER = (
+    "markdown:"
+    + hashlib.sha256(
+        json.dumps([
+            importlib.metadata.version("cmarkgfm"),
+            bleach.__version__,
+            MARKDOWN_HTML_TAGS,
+            MARKDOWN_HTML_ATTRIBUTES,
+            pygments.__version__,
+            JSON_SCHEMA_KEYWORDS,
+        ]).encode()
+    ).hexdigest()[:16]
+)
+# How cmarkgfm renders fenced code blocks with a language, once sanitized
+FENCED_CODE_BLOCK_RE = re.compile(
+    r'<pre lang="([^"]*)"><code>(.*?)</code></pre>', re.DOTALL
+)
+
+# Same for cached syntax highlighting, which also depends on the language
+HIGHLIGHT_RENDERER = (
+    "highlight:"
+    + hashlib.sha256(
+        json.dumps([pygments.__version__, JSON_SCHEMA_KEYWORDS]).encode()
+    ).hexdigest()[:16]
+)
 
 # ---- Decorators ----
 
 
+def _get_schema_queryset(user):
+    return (
+        Schema.objects
+        .accessible_to(user)
+        .select_related("created_by__profile__organization")
+        .prefetch_related("schemaref_set")
+        .prefetch_related("documentationitem_set")
+        .prefetch_related("implementation_set")
+    )
+
+
 def lookup_schema(function):
+    # Async views get an async wrapper, so they stay async all the way down
+    if iscoroutinefunction(function):
+
+        @wraps(function)
+        async def _wrap_async_request(request, schema_id, *args, **kwargs):
+            schema = await aget_object_or_404(
+                _get_schema_queryset(await request.auser()), pk=schema_id
+            )
+
+            return await function(request, schema=schema, *args, **kwargs)
+
+        return _wrap_async_request
+
     @wraps(function)
     def _wrap_request(request, schema_id, *args, **kwargs):
         schema = get_object_or_404(
-            Schema.objects
-            .accessible_to(request.user)
-            .prefetch_related("schemaref_set")
-            .prefetch_related("documentationitem_set"),
+            _get_schema_queryset(request.user),
             pk=schema_id,
         )
 
@@ -107,59 +172,124 @@ def require_permanent_url_host(function):
 # ---- Helpers ----
 
 
-def render_markdown(markdown_source_text):
+def _highlight_fenced_code_block(match):
+    code = html.unescape(match.group(2))
+    if len(code.encode()) > settings.CONTENT_HIGHLIGHT_MAX_BYTES:
+        return match.group(0)
+    try:
+        highlighted_code = highlight_code(code, html.unescape(match.group(1)).lower())
+    except ClassNotFound:
+        return match.group(0)
+    return (
+        f'<pre lang="{match.group(1)}">'
+        f'<code class="highlight">{highlighted_code}</code></pre>'
+    )
+
+
+def _render_markdown(markdown_source_text):
     html_content = cmarkgfm.github_flavored_markdown_to_html(markdown_source_text)
     sanitized_html_content = bleach.clean(
         html_content, MARKDOWN_HTML_TAGS, MARKDOWN_HTML_ATTRIBUTES
     )
+    # Highlighted after sanitizing, which would strip the highlighter's
+    # classes. Pygments escapes everything but its own markup.
+    return FENCED_CODE_BLOCK_RE.sub(
+        _highlight_fenced_code_block, sanitized_html_content
+    )
+
+
+async def arender_markdown(markdown_source_text):
+    # Sanitizing long READMEs is slow, and the same Markdown always gives
+    # the same HTML, so it's only rendered once per content (and renderer)
+    sanitized_html_content = await content_cache.aget_rendering(
+        markdown_source_text, MARKDOWN_RENDERER, _render_markdown
+    )
     # WARNING: Be careful not to pass any untrusted HTML to mark_safe!
     return mark_safe(sanitized_html_content)
 
 
+async def ahighlight_code(code, language):
+    """
+    Returns `code` as syntax-highlighted HTML, or None if it's
+    in an unknown language or too long to highlight.
+    """
+    if not language or len(code.encode()) > settings.CONTENT_HIGHLIGHT_MAX_BYTES:
+        return None
+    try:
+        highlighted_html_content = await content_cache.aget_rendering(
+            code,
+            f"{HIGHLIGHT_RENDERER}:{language}",
+            lambda code: highlight_code(code, language),
+        )
+    except ClassNotFound:
+        return None
+    # Pygments escapes everything but its own markup
+    return mark_safe(highlighted_html_content)
+
+
 # ---- Views ----
 
 
 def index(request):
+    # EXISTS subqueries rather than joins, so schemas with several
+    # matching reference items aren't duplicated in the results.
     defined_schemas = (
         Schema.objects
         .public()
-        .prefetch_related("schemaref_set")
-        .exclude(schemaref__isnull=True)
-        .order_by("name")
+        # Badges and counts come from the schema's own summary fields
+        .select_related("created_by__profile__organization")
+        .filter(Exists(SchemaRef.objects.filter(schema=OuterRef("pk"))))
     )
 
     search_query = request.GET.get("search_query", None)
     specification_file_type = request.GET.get("specification_file_type", None)
     documentation_role = request.GET.get("documentation_role", None)
 
-    filtered_by_documentation_type = (
-        defined_schemas.filter(documentationitem__role=documentation_role)
-        if documentation_role
-        else defined_schemas
-    )
+    if documentation_role:
+        defined_schemas = defined_schemas.filter(
+            Exists(
+                DocumentationItem.objects.filter(
+                    schema=OuterRef("pk"), role=documentation_role
+                )
+            )
+        )
 
-    # Full-text ranked search. When the box is empty, .search() returns the
-    # queryset unchanged, preserving the alphabetical browse ordering above.
-    searched_schemas = filtered_by_documentation_type.search(search_query)
-
-    filtered_by_specification_file_type = (
-        [
-            schema
-            for schema in searched_schemas
-            if any(
-                schema_ref.language == specification_file_type
-                for schema_ref in schema.schemaref_set.all()
+    if specification_file_type:
+        defined_schemas = defined_schemas.filter(
+            Exists(
+                SchemaRef.objects.filter(
+                    schema=OuterRef("pk"), language=specification_file_type
+                )
             )
-        ]
-        if specification_file_type
-        else searched_schemas
-    )
+        )
+
+    # Full-text ranked search. When the box is empty, .search() returns the
+    # queryset unchanged and results are paginated alphabetically instead.
+    searched_schemas = defined_schemas.search(search_query)
+
+    cursor = request.GET.get("cursor", None)
+    try:
+        schemas, next_cursor = paginate_schemas(
+            searched_schemas, MAX_SCHEMA_RESULT_COUNT, cursor
+        )
+    except InvalidCursorError:
+        # Most likely a stale link, so start over from the first page
+        schemas, next_cursor = paginate_schemas(
+            searched_schemas, MAX_SCHEMA_RESULT_COUNT
+        )
+
+    next_page_query = None
+    if next_cursor:
+        next_page_params = request.GET.copy()
+        next_page_params["cursor"] = next_cursor
+        next_page_query = next_page_params.urlencode()
 
     return render(
         request,
         "core/index.html",
         {
-            "schemas": filtered_by_specification_file_type[:MAX_SCHEMA_RESULT_COUNT],
+            "schemas": schemas,
+            "next_page_query": next_page_query,
             "documentation_roles": [
                 DocumentationItem.DocumentationItemRole.RFC,
                 DocumentationItem.DocumentationItemRole.W3C,
@@ -168,18 +298,37 @@ def index(request):
     )
 
 
+@require_GET
+@cache_control(public=True, max_age=settings.SCHEMA_SUGGESTIONS_CACHE_TTL)
+def schema_suggestions(request):
+    # Only the names and IDs of public schemas, so responses are
+    # the same for everyone and can be cached by browsers and proxies.
+    query = request.GET.get("q", "")[:100]
+    suggested_schemas = Schema.objects.public().suggest(query)[
+        :MAX_SCHEMA_SUGGESTION_COUNT
+    ]
+    return JsonResponse({
+        "suggestions": [
+            {"id": schema_id, "name": name}
+            for schema_id, name in suggested_schemas.values_list("id", "name")
+        ]
+    })
+
+
 @lookup_schema
-def schema_detail(request, schema):
+async def schema_detail(request, schema):
+    # The schema's reference items are prefetched, so only fetching
+    # the README content waits on I/O here, without holding a thread
     latest_readme = schema.latest_readme()
     latest_readme_content = None
     if latest_readme:
         try:
-            response_text = latest_readme.get_content()
+            response_text = await latest_readme.aget_content()
             if (
                 latest_readme.format
                 == DocumentationItem.DocumentationItemFormat.Markdown
             ):
-                latest_readme_content = render_markdown(response_text)
+                latest_readme_content = await arender_markdown(response_text)
             elif (
                 latest_readme.format
                 == DocumentationItem.DocumentationItemFormat.PlainText
@@ -195,7 +344,8 @@ def schema_detail(request, schema):
                 exc_info=True,
             )
 
-    return render(
+    # Templates can query the database, which must happen off the event loop
+    return await sync_to_async(render)(
         request,
         "core/schemas/detail.html",
         {
@@ -208,21 +358,24 @@ def schema_detail(request, schema):
 
 
 @lookup_schema
-def schema_ref_detail(request, schema, schema_ref_id):
-    schema_ref = get_object_or_404(schema.schemaref_set.filter(id=schema_ref_id))
+async def schema_ref_detail(request, schema, schema_ref_id):
+    schema_ref = await aget_object_or_404(schema.schemaref_set.filter(id=schema_ref_id))
     try:
-        text_content = schema_ref.get_content()
+        text_content = await schema_ref.aget_content()
         if schema_ref.language == "markdown":
-            schema_ref.markdown = render_markdown(text_content)
+            schema_ref.markdown = await arender_markdown(text_content)
         else:
             schema_ref.content = escape(text_content)
+            schema_ref.highlighted_content = await ahighlight_code(
+                text_content, schema_ref.language
+            )
     except requests.exceptions.RequestException:
         logging.error(
             f"Failed to fetch content for schema_ref {schema_ref.id} (url={schema_ref.url})",
             exc_info=True,
         )
 
-    return render(
+    return await sync_to_async(render)(
         request,
         "core/schemas/detail_schema_ref.html",
         {
@@ -390,7 +543,7 @@ def manage_schema_publish(request, schema_id):
     conflicting_published_schema_ref = None
     conflict_reason = None
     try:
-        schema.check_for_published_conflicts()
+        schema.check_for_published_conflicts(fetch=schema.published_at is None)
     except PublishedSchemaConflictError as e:
         conflicting_published_schema_ref = e.conflicting_schema_ref
         conflict_reason = e.reason
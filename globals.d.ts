@@ -1,9 +1,7 @@
-import { HLJSApi } from 'highlight.js';
 import * as Lucide from 'lucide';
 
 declare global {
   interface Window {
-    hljs?: HLJSApi;
     lucide?: typeof Lucide;
   }
 }
@@ -171,6 +171,10 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        # httpx logs every request at INFO, unlike requests
+        "httpx": {
+            "level": "WARNING",
+        },
     },
 }
 
@@ -185,6 +189,63 @@ CACHES = {
 
 # Default: 1 hour
 CONTENT_CACHE_TTL = 60 * 60
+# After CONTENT_CACHE_TTL (the "soft" TTL), content is stale: it's still
+# served while being refreshed in the background, and revalidated with
+# If-None-Match/If-Modified-Since rather than downloaded again. It's only
+# dropped after a further CONTENT_CACHE_STALE_TTL (the "hard" TTL).
+CONTENT_CACHE_STALE_TTL = 60 * 60 * 24
+# Fraction by which soft TTLs are randomly shortened
+CONTENT_CACHE_TTL_JITTER = 0.1
+# Higher values refresh content earlier (see XFetch / probabilistic early expiration)
+CONTENT_CACHE_EARLY_EXPIRATION_BETA = 1.0
+CONTENT_REFRESH_IN_BACKGROUND = True
+# Cached content bodies at least this many bytes long are compressed
+# with zlib at this level (see core/content_cache.py)
+CONTENT_CACHE_COMPRESSION_THRESHOLD = 1024
+CONTENT_CACHE_COMPRESSION_LEVEL = 6
+# Each process also keeps up to this many bytes of recently read content
+# in memory, for at most CONTENT_LOCAL_CACHE_TTL seconds
+CONTENT_LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CONTENT_LOCAL_CACHE_TTL = 60
+# Definitions longer than this many bytes are shown without syntax
+# highlighting, which would take too long and make the page much heavier
+CONTENT_HIGHLIGHT_MAX_BYTES = 512 * 1024
+# Only one worker fetches a given item at a time. Others wait up to
+# CONTENT_FETCH_LOCK_WAIT seconds for its result before fetching it themselves.
+CONTENT_FETCH_LOCK_WAIT = 5
+BACKGROUND_TASK_WORKERS = 4
+
+# Background jobs (see core/jobs.py). Each queue runs at most this many jobs
+# at once, across all `run_jobs` workers.
+JOB_QUEUES = {
+    "default": 4,
+    "content": 8,
+    "email": 2,
+    "manifests": 4,
+}
+JOB_MAX_ATTEMPTS = 5
+# In seconds. Retries back off exponentially from JOB_RETRY_BACKOFF,
+# up to JOB_RETRY_MAX_BACKOFF.
+JOB_RETRY_BACKOFF = 10
+JOB_RETRY_MAX_BACKOFF = 60 * 60
+# Jobs running for longer than this are assumed to have lost their worker
+JOB_LEASE_TIMEOUT = 15 * 60
+JOB_POLL_INTERVAL = 1
+# Finished jobs are deleted after this long
+JOB_RETENTION = 60 * 60 * 24 * 7
+
+# Limits for fetching remote content (see core/http_client.py).
+# Timeouts are in seconds; CONTENT_FETCH_DEADLINE covers all retries.
+CONTENT_FETCH_CONNECT_TIMEOUT = 3.05
+CONTENT_FETCH_READ_TIMEOUT = 10
+CONTENT_FETCH_DEADLINE = 20
+CONTENT_FETCH_MAX_BYTES = 5 * 1024 * 1024
+CONTENT_FETCH_POOL_SIZE = 10
+# Async fetches share one connection pool per event loop. Beyond this many
+# connections, further fetches wait for a free one (within the deadline).
+CONTENT_FETCH_ASYNC_MAX_CONNECTIONS = 100
+# Outlasts the slowest possible fetch, in case its worker dies holding the lock
+CONTENT_FETCH_LOCK_TIMEOUT = CONTENT_FETCH_DEADLINE + 5
 
 # Media settings
 MEDIA_URL = "/media/"
@@ -192,6 +253,26 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 HOURLY_API_REQUEST_LIMIT = 500
 
+# Ranked full-text search results are cached until a schema changes.
+# Queries matching more than SEARCH_CACHE_MAX_RESULTS schemas aren't cached.
+SEARCH_CACHE_TTL = 60 * 10
+SEARCH_CACHE_MAX_RESULTS = 200
+SEARCH_CACHE_LOCK_TIMEOUT = 5
+
+# How long browsers and proxies may reuse typeahead suggestions
+SCHEMA_SUGGESTIONS_CACHE_TTL = 60
+
+# Verified API keys are cached so we don't re-run the slow password hasher
+# on every request. The per-process tier is kept short because other
+# processes can't evict it when a key is rotated.
+API_KEY_CACHE_TTL = 60 * 5
+API_KEY_LOCAL_CACHE_TTL = 30
+API_KEY_LOCAL_CACHE_SIZE = 1024
+
+# Server-side secret mixed into API key hashes.
+# This will be overridden in production/staging settings
+API_KEY_PEPPER = SECRET_KEY
+
 # Feature flags
 ENABLE_MCP_SERVER = False
 
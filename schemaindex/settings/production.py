@@ -22,6 +22,9 @@ GS_CREDENTIALS = service_account.Credentials.from_service_account_file(
 GS_BUCKET_NAME = "schemaindex-prod-storage"
 
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+# Changing the pepper invalidates every issued API key, so it can be
+# pinned independently of SECRET_KEY.
+API_KEY_PEPPER = os.environ.get("API_KEY_PEPPER", SECRET_KEY)
 
 VALKEY_URL = env.str("VALKEY_URL")
 
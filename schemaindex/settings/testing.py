@@ -4,3 +4,6 @@ PERMANENT_URL_HOST = "testserver"
 ALLOWED_HOSTS = [PERMANENT_URL_HOST]
 SITE_URL = f"http://{PERMANENT_URL_HOST}"
 TRUSTED_CONTENT_DOMAINS.append("example.com")
+
+# Refresh stale content inline so tests don't race background threads
+CONTENT_REFRESH_IN_BACKGROUND = False
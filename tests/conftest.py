@@ -1,9 +1,13 @@
+import httpx
 import pytest
 from django.core.cache import cache
 from django.test import Client
 from django.db import connection
 import requests_mock as requests_mock_lib
 from factories import ProfileFactory
+from core.api_key_cache import clear_local_api_key_cache
+from core.content_cache import clear_local_content_cache
+from unittest.mock import patch
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -37,8 +41,12 @@ def clear_cache():
     Prevents cached values from leaking between tests.
     """
     cache.clear()
+    clear_local_api_key_cache()
+    clear_local_content_cache()
     yield
     cache.clear()
+    clear_local_api_key_cache()
+    clear_local_content_cache()
 
 
 @pytest.fixture(autouse=True)
@@ -55,6 +63,47 @@ def fallback_get_request_mock(requests_mock):
     return requests_mock
 
 
+class AsyncHTTPMock:
+    """
+    Canned responses for async (httpx) fetches,
+    along the lines of requests_mock for requests.
+    """
+
+    ANY = object()
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+    def get(self, url, text="", status_code=200, headers=None, exc=None):
+        self.routes[url] = (text, status_code, headers or {}, exc)
+
+    def handle_request(self, request):
+        self.requests.append(request)
+        route = self.routes.get(str(request.url)) or self.routes.get(self.ANY)
+        if route is None:
+            raise httpx.ConnectError(f"No mocked response for {request.url}")
+        text, status_code, headers, exc = route
+        if exc is not None:
+            raise exc(f"Mocked failure for {request.url}", request=request)
+        return httpx.Response(status_code, headers=headers, text=text)
+
+
+@pytest.fixture(autouse=True)
+def async_http_mock():
+    """
+    Route async fetches to canned responses, with a catch-all
+    fallback like fallback_get_request_mock's.
+    """
+    mock = AsyncHTTPMock()
+    mock.get(AsyncHTTPMock.ANY, text='{"message": "Default fallback response"}')
+    with patch(
+        "core.http_client.get_async_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(mock.handle_request)),
+    ):
+        yield mock
+
+
 @pytest.fixture
 def api_client(db):
     profile = ProfileFactory.create()
@@ -8,7 +8,9 @@ from datetime import timedelta
 import requests_mock
 import json
 from factories import ProfileFactory, SchemaRefFactory, SchemaFactory, UserFactory
-from core.models import Schema
+from core import jobs
+from core.models import Job, Schema
+from core.tasks import apply_manifest, enqueue_manifest
 from utils import assert_schema_matches_manifest
 
 
@@ -32,6 +34,7 @@ def test_api_key_allows_valid_api_key(api_client):
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         schema_ref = SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
         schema_ref.refresh_from_db()
         response = api_client.get(f"/api/find?id={id_value}")
         assert response.status_code == 200
@@ -46,6 +49,7 @@ def test_api_key_enforces_rate_limit(api_client):
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
         for _ in range(2):
             response = api_client.get(f"/api/find?id={id_value}")
             assert response.status_code == 200
@@ -66,6 +70,7 @@ def test_api_key_enforces_rate_limit_on_profile():
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
         for _ in range(2):
             raw_api_key = profile.set_new_api_key()
             response = client.get(
@@ -87,6 +92,7 @@ def test_find_returns_matching_schema_ref_url(api_client):
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
         response = api_client.get(
             f"/api/find?id={id_value}",
         )
@@ -106,6 +112,7 @@ def test_find_returns_404s_for_matching_private_schemas(api_client):
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         SchemaRefFactory.create(url=url, schema=private_schema)
+        jobs.run_pending_jobs()
         response = api_client.get(
             f"/api/find?id={id_value}",
         )
@@ -120,6 +127,7 @@ def test_find_ignores_case(api_client):
     with requests_mock.Mocker() as m:
         m.get(url, text=content)
         SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
         response = api_client.get(
             f"/api/find?id={id_value.upper()}",
         )
@@ -130,6 +138,32 @@ def test_find_ignores_case(api_client):
         assert url == url
 
 
+@pytest.mark.django_db
+@patch("core.api.views.SEARCH_PAGE_SIZE", 2)
+def test_search_pages_through_published_schemas(api_client):
+    for name in ["Charlie", "Alpha", "Bravo"]:
+        SchemaFactory.create(name=name)
+    SchemaFactory.create(name="Private", published_at=None)
+
+    response = api_client.get("/api/search")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [schema["name"] for schema in data["schemas"]] == ["Alpha", "Bravo"]
+    assert data["next_cursor"]
+
+    response = api_client.get(f"/api/search?cursor={data['next_cursor']}")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [schema["name"] for schema in data["schemas"]] == ["Charlie"]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_search_rejects_invalid_cursors(api_client):
+    response = api_client.get("/api/search?cursor=not-a-real-cursor")
+    assert response.status_code == 400
+
+
 @pytest.mark.django_db
 @override_settings(HOURLY_API_REQUEST_LIMIT=1)
 def test_rate_limit_is_isolated_per_profile():
@@ -146,6 +180,7 @@ def test_rate_limit_is_isolated_per_profile():
     with requests_mock.Mocker() as m:
         m.get(mock_url, text=mock_content)
         SchemaRefFactory.create(url=mock_url)
+        jobs.run_pending_jobs()
 
         # Profile A burns its quota.
         assert (
@@ -181,6 +216,7 @@ def test_api_fails_open_when_rate_limiter_unavailable(api_client, caplog):
     with requests_mock.Mocker() as m:
         m.get(mock_url, text=mock_content)
         SchemaRefFactory.create(url=mock_url)
+        jobs.run_pending_jobs()
 
         fail_open = (True, "valkey_unavailable")
         with (
@@ -258,6 +294,92 @@ def test_create_schema_with_reference_items(api_client):
     assert_schema_matches_manifest(schema, manifest)
 
 
+@pytest.mark.django_db
+def test_create_applies_manifest_in_background_when_preferred(api_client):
+    manifest = {
+        "name": "Tock schema",
+        "documents": {
+            "https://example.com/definition.json": {"type": "definition"},
+            "https://example.com/readme.md": {
+                "type": "documentation",
+                "name": "README.md",
+                "role": "readme",
+                "format": "markdown",
+            },
+        },
+    }
+    response = api_client.post(
+        "/api/schemas",
+        data=json.dumps(manifest),
+        content_type="application/json",
+        headers={"Prefer": "respond-async"},
+    )
+
+    assert response.status_code == 202
+    assert response["Preference-Applied"] == "respond-async"
+    data = response.json()["data"]
+    assert data["status"] == "queued"
+    assert response["Location"] == data["url"]
+    assert not Schema.objects.exists()
+
+    jobs.run_pending_jobs()
+
+    response = api_client.get(data["url"])
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "succeeded"
+    assert data["error"] is None
+    assert data["result"]["created"] == 2
+    schema = Schema.objects.get(id=data["result"]["id"])
+    assert schema.created_by == api_client.user
+    assert_schema_matches_manifest(schema, manifest)
+
+
+@pytest.mark.django_db
+def test_background_create_is_not_repeated_when_run_again(api_client):
+    manifest = {
+        "name": "Test schema",
+        "documents": {"https://example.com/definition.json": {"type": "definition"}},
+    }
+    api_client.post(
+        "/api/schemas",
+        data=json.dumps(manifest),
+        content_type="application/json",
+        headers={"Prefer": "respond-async"},
+    )
+    jobs.run_pending_jobs()
+
+    # As if its worker died before recording the result
+    job = Job.objects.get()
+    jobs.run_job(job)
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    schema = Schema.objects.get()
+    assert job.arguments["schema_id"] == schema.id
+    assert job.result["id"] == schema.id
+
+
+@pytest.mark.django_db
+def test_background_manifest_result_is_saved_with_its_changes(api_client):
+    schema = SchemaFactory.create(created_by=api_client.user, published_at=None)
+    manifest = {
+        "name": "Test schema",
+        "documents": {"https://example.com/definition.json": {"type": "definition"}},
+    }
+    job = enqueue_manifest(manifest, schema)
+
+    # As if its worker died right after the task
+    job = jobs.claim_job(job.queue)
+    apply_manifest(job, **job.arguments)
+
+    data = api_client.get(f"/api/jobs/{job.id}").json()["data"]
+    assert data["status"] == "succeeded"
+    assert data["result"]["id"] == schema.id
+    job.refresh_from_db()
+    assert job.finished_at is not None
+
+
 def test_create_rejects_non_json_payloads(api_client):
     response = api_client.post(
         "/api/schemas", data="not json", content_type="application/json"
@@ -362,6 +484,66 @@ def test_update_schema(api_client):
     assert_schema_matches_manifest(schema, manifest)
 
 
+@pytest.mark.django_db
+def test_update_reports_background_validation_errors(api_client):
+    schema = SchemaFactory.create(created_by=api_client.user)
+    manifest = {
+        "name": "Test schema",
+        "documents": {"https://example.com/definition.json": {"type": "definition"}},
+    }
+    response = api_client.put(
+        f"/api/schemas/{schema.id}",
+        data=json.dumps(manifest),
+        content_type="application/json",
+        headers={"Prefer": "respond-async"},
+    )
+    assert response.status_code == 202
+
+    jobs.run_pending_jobs()
+
+    data = api_client.get(response["Location"]).json()["data"]
+    assert data["status"] == "failed"
+    assert data["result"] is None
+    assert "cannot be made private" in data["error"]
+
+
+@pytest.mark.django_db
+def test_background_updates_are_applied_in_the_order_they_were_sent(api_client):
+    schema = SchemaFactory.create(created_by=api_client.user, published_at=None)
+    documents = {"https://example.com/definition.json": {"type": "definition"}}
+    first_job = enqueue_manifest({"name": "First", "documents": documents}, schema)
+    second_job = enqueue_manifest({"name": "Second", "documents": documents}, schema)
+
+    # The first is retried after the second has been applied
+    Job.objects.filter(id=first_job.id).update(
+        run_after=timezone.now() + timedelta(hours=1)
+    )
+    jobs.run_pending_jobs()
+    Job.objects.filter(id=first_job.id).update(run_after=timezone.now())
+    jobs.run_pending_jobs()
+
+    first_job.refresh_from_db()
+    second_job.refresh_from_db()
+    assert second_job.status == Job.Status.SUCCEEDED
+    assert first_job.status == Job.Status.FAILED
+    assert "sent later" in first_job.last_error
+    schema.refresh_from_db()
+    assert schema.name == "Second"
+
+
+@pytest.mark.django_db
+def test_jobs_404s_jobs_created_by_other_user(api_client):
+    schema = SchemaFactory.create(created_by=UserFactory.create())
+    manifest = {
+        "name": "Mock schema",
+        "documents": {"https://example.com/definition.json": {"type": "definition"}},
+    }
+    job = enqueue_manifest(manifest, schema)
+
+    response = api_client.get(f"/api/jobs/{job.id}")
+    assert response.status_code == 404
+
+
 @pytest.mark.django_db
 def test_update_404s_invalid_ids(api_client):
     response = api_client.put(
@@ -0,0 +1,169 @@
+import httpx
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from io import StringIO
+from unittest.mock import patch
+from core import content_cache, jobs
+from core.models import DocumentationItem, ReferenceItem, SchemaRef
+from factories import DocumentationItemFactory, SchemaFactory, SchemaRefFactory
+
+
+def warm_content_cache(**options):
+    stdout = StringIO()
+    call_command("warm_content_cache", stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_warm_content_cache_fetches_published_content(async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    readme = DocumentationItemFactory.create(
+        schema=schema_ref.schema,
+        role=DocumentationItem.DocumentationItemRole.README,
+        url="https://example.com/readme",
+    )
+    private_schema_ref = SchemaRefFactory.create(
+        schema=SchemaFactory(published_at=None), url="https://example.com/private"
+    )
+    async_http_mock.get(schema_ref.url, text="definition")
+    async_http_mock.get(readme.url, text="readme")
+
+    output = warm_content_cache()
+
+    assert "Fetched 2 item(s) (success=2)" in output
+    assert content_cache.get_entry(schema_ref.url)["content"] == "definition"
+    assert content_cache.get_entry(readme.url)["content"] == "readme"
+    assert content_cache.get_entry(private_schema_ref.url) is None
+
+    schema_ref.refresh_from_db()
+    assert schema_ref.content_fetch_outcome == ReferenceItem.ContentFetchOutcome.SUCCESS
+    assert schema_ref.content_fetched_at is not None
+    assert schema_ref.content_fetch_duration is not None
+    assert schema_ref.content_size == len("definition")
+
+
+@pytest.mark.django_db
+def test_warm_content_cache_refreshes_fresh_content(async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    content_cache.set_entry(
+        schema_ref.url,
+        schema_ref._build_content_cache_entry("old content", etag='"v1"'),
+    )
+    async_http_mock.get(schema_ref.url, text="new content")
+
+    warm_content_cache()
+
+    assert async_http_mock.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert schema_ref.get_content() == "new content"
+
+
+@pytest.mark.django_db
+@patch("core.models.asyncio.sleep")
+def test_warm_content_cache_failure_sends_email_and_sets_timestamp(
+    mock_sleep, async_http_mock
+):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    async_http_mock.get(schema_ref.url, status_code=500)
+
+    warm_content_cache()
+
+    schema_ref.refresh_from_db()
+    assert (
+        schema_ref.content_fetch_outcome == ReferenceItem.ContentFetchOutcome.HTTP_ERROR
+    )
+    assert schema_ref.content_fetch_failing_since is not None
+    # The email is sent by a background job
+    assert len(mail.outbox) == 0
+    jobs.run_pending_jobs()
+    assert len(mail.outbox) == 1
+    assert "Content Failure" in mail.outbox[0].subject
+
+
+@pytest.mark.django_db
+@patch("core.models.asyncio.sleep")
+def test_warm_content_cache_subsequent_failure_no_email_or_timestamp_change(
+    mock_sleep, async_http_mock
+):
+    mock_failure_time = timezone.now() - timezone.timedelta(hours=1)
+    schema_ref = SchemaRefFactory.create(
+        content_fetch_failing_since=mock_failure_time,
+        url="https://example.com/definition",
+    )
+    async_http_mock.get(schema_ref.url, status_code=500)
+
+    warm_content_cache()
+    jobs.run_pending_jobs()
+
+    schema_ref.refresh_from_db()
+    assert schema_ref.content_fetch_failing_since == mock_failure_time
+    assert len(mail.outbox) == 0
+
+
+@pytest.mark.django_db
+@patch("core.models.asyncio.sleep")
+def test_warm_content_cache_no_email_on_non_http_error(mock_sleep, async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    async_http_mock.get(schema_ref.url, exc=httpx.ConnectError)
+
+    warm_content_cache()
+    jobs.run_pending_jobs()
+
+    schema_ref.refresh_from_db()
+    assert (
+        schema_ref.content_fetch_outcome
+        == ReferenceItem.ContentFetchOutcome.UNREACHABLE
+    )
+    assert schema_ref.content_fetch_failing_since is None
+    assert len(mail.outbox) == 0
+
+
+@pytest.mark.django_db
+def test_warm_content_cache_records_unexpected_errors_as_failures(async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    readme = DocumentationItemFactory.create(
+        schema=schema_ref.schema, url="https://example.com/readme"
+    )
+    async_http_mock.get(readme.url, text="readme")
+
+    with patch.object(
+        SchemaRef, "awarm_cached_content", side_effect=ValueError("Bad content")
+    ):
+        output = warm_content_cache()
+
+    assert "Fetched 2 item(s) (success=1, unreachable=1)" in output
+    schema_ref.refresh_from_db()
+    assert (
+        schema_ref.content_fetch_outcome
+        == ReferenceItem.ContentFetchOutcome.UNREACHABLE
+    )
+    readme.refresh_from_db()
+    assert readme.content_fetch_outcome == ReferenceItem.ContentFetchOutcome.SUCCESS
+
+
+@pytest.mark.django_db
+def test_warm_content_cache_success_after_failure_clears_timestamp(async_http_mock):
+    schema_ref = SchemaRefFactory.create(
+        content_fetch_failing_since=timezone.now() - timezone.timedelta(hours=1),
+        url="https://example.com/definition",
+    )
+    async_http_mock.get(schema_ref.url, text="some content")
+
+    warm_content_cache()
+
+    schema_ref.refresh_from_db()
+    assert schema_ref.content_fetch_failing_since is None
+
+
+@pytest.mark.django_db
+def test_warm_content_cache_stops_starting_fetches_after_time_budget(
+    async_http_mock,
+):
+    for i in range(3):
+        SchemaRefFactory.create(url=f"https://example.com/definition-{i}")
+
+    output = warm_content_cache(time_budget=0)
+
+    assert "Fetched 0 item(s) (none), skipped 3" in output
+    assert async_http_mock.requests == []
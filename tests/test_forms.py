@@ -1,7 +1,12 @@
 import pytest
 import requests_mock
 from urllib.parse import urlparse, urlunparse
-from core.forms import SchemaForm, PermanentURLForm
+from django.core.exceptions import ValidationError
+from django.forms import modelform_factory
+from django.test import override_settings
+from core.admin import SchemaAdminForm, SchemaRefAdminForm
+from core.forms import SchemaForm, PermanentURLForm, clean_url_and_get_body
+from core.models import Schema, SchemaRef
 from tests.factories import (
     SchemaFactory,
     SchemaRefFactory,
@@ -157,6 +162,15 @@ def test_clean_url(spec_url, expect_success):
         assert expect_success == form.is_valid()
 
 
+@override_settings(CONTENT_FETCH_MAX_BYTES=10)
+def test_clean_url_and_get_body_rejects_oversized_content():
+    url = "http://example.com/schema.json"
+    with requests_mock.Mocker() as m:
+        m.get(url, text="{" + " " * 100 + "}")
+        with pytest.raises(ValidationError, match="too large"):
+            clean_url_and_get_body(url)
+
+
 @pytest.mark.django_db
 def test_schema_management_form_requires_one_schema_ref():
     with requests_mock.Mocker() as m:
@@ -252,3 +266,35 @@ def test_user_max_permanent_url_limit():
     assert not form.is_valid()
     error = form.non_field_errors()[0]
     assert error == "You have reached the limit of 100 permanent URLs for your account."
+
+
+@pytest.mark.django_db
+def test_schema_admin_form_prevents_publishing_conflicting_urls():
+    url = "https://example.com/definition.xml"
+    SchemaRefFactory(url=url)
+    schema = SchemaFactory(published_at=None)
+    SchemaRefFactory(schema=schema, url=url)
+    form_class = modelform_factory(
+        Schema, form=SchemaAdminForm, fields=["name", "published_at"]
+    )
+    form = form_class(
+        instance=schema,
+        data={"name": schema.name, "published_at": "2026-01-01 00:00:00"},
+    )
+    assert not form.is_valid()
+    assert "is already using one of this schema's URL values" in str(form.errors)
+
+
+@pytest.mark.django_db
+def test_schema_ref_admin_form_prevents_conflicting_urls_in_published_schemas():
+    url = "https://example.com/definition.xml"
+    SchemaRefFactory(url=url)
+    schema_ref = SchemaRefFactory(url="https://example.com/other.xml")
+    form_class = modelform_factory(
+        SchemaRef, form=SchemaRefAdminForm, fields=["schema", "url"]
+    )
+    form = form_class(
+        instance=schema_ref, data={"schema": schema_ref.schema_id, "url": url}
+    )
+    assert not form.is_valid()
+    assert "is already using one of this schema's URL values" in str(form.errors)
@@ -0,0 +1,147 @@
+import pytest
+from datetime import timedelta
+from django.test import override_settings
+from django.utils import timezone
+from core import jobs
+from core.models import Job
+
+
+@jobs.task()
+def add(a, b):
+    return a + b
+
+
+@jobs.task(max_attempts=2)
+def fail():
+    raise ValueError("Nope")
+
+
+@pytest.mark.django_db
+def test_enqueued_job_runs_and_records_its_result():
+    job = add.enqueue(a=1, b=2)
+    assert job.status == Job.Status.QUEUED
+    assert job.queue == jobs.DEFAULT_QUEUE
+
+    assert jobs.run_pending_jobs() == 1
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert job.result == 3
+    assert job.attempts == 1
+    assert job.finished_at is not None
+
+
+@pytest.mark.django_db
+def test_delayed_job_does_not_run_early():
+    job = add.enqueue(delay=60, a=1, b=2)
+
+    assert jobs.run_pending_jobs() == 0
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.QUEUED
+
+
+@pytest.mark.django_db
+@override_settings(JOB_RETRY_BACKOFF=10)
+def test_failed_job_is_retried_with_backoff_then_fails():
+    job = fail.enqueue()
+
+    jobs.run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.QUEUED
+    assert job.attempts == 1
+    assert job.last_error == "ValueError: Nope"
+    assert job.run_after >= timezone.now() + timedelta(seconds=9)
+
+    Job.objects.filter(id=job.id).update(run_after=timezone.now())
+    jobs.run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.attempts == 2
+    assert job.finished_at is not None
+
+
+@jobs.task()
+def reject():
+    raise jobs.PermanentError("Bad arguments")
+
+
+@pytest.mark.django_db
+def test_permanent_error_fails_job_without_retrying():
+    job = reject.enqueue()
+
+    jobs.run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.attempts == 1
+    assert job.last_error == "Bad arguments"
+
+
+@jobs.task(bind=True)
+def get_own_id(job):
+    return job.id
+
+
+@pytest.mark.django_db
+def test_bound_task_is_passed_its_job():
+    job = get_own_id.enqueue()
+
+    jobs.run_pending_jobs()
+
+    job.refresh_from_db()
+    assert job.result == job.id
+
+
+@pytest.mark.django_db
+def test_enqueue_with_queued_dedupe_key_returns_queued_job():
+    job = add.enqueue(dedupe_key="add", a=1, b=2)
+
+    assert add.enqueue(dedupe_key="add", a=1, b=2) == job
+    assert Job.objects.count() == 1
+
+    jobs.run_pending_jobs()
+
+    # Finished jobs don't count
+    assert add.enqueue(dedupe_key="add", a=1, b=2) != job
+    assert Job.objects.count() == 2
+
+
+@pytest.mark.django_db
+@override_settings(JOB_LEASE_TIMEOUT=60)
+def test_job_left_running_is_claimed_again_after_lease_timeout():
+    job = add.enqueue(a=1, b=2)
+    claimed_job = jobs.claim_job(job.queue)
+    assert claimed_job == job
+    # Its worker died, so nothing else happened to it
+    assert jobs.claim_job(job.queue) is None
+
+    Job.objects.filter(id=job.id).update(
+        started_at=timezone.now() - timedelta(seconds=61)
+    )
+    assert jobs.run_pending_jobs() == 1
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.SUCCEEDED
+    assert job.attempts == 2
+
+
+@pytest.mark.django_db
+@override_settings(JOB_RETENTION=60)
+def test_prune_jobs_deletes_old_finished_jobs():
+    old_job = add.enqueue(a=1, b=2)
+    jobs.run_pending_jobs()
+    Job.objects.filter(id=old_job.id).update(
+        finished_at=timezone.now() - timedelta(seconds=61)
+    )
+    new_job = add.enqueue(a=1, b=2)
+    jobs.run_pending_jobs()
+    queued_job = add.enqueue(a=1, b=2)
+
+    assert jobs.prune_jobs() == 1
+    assert set(Job.objects.values_list("id", flat=True)) == {
+        new_job.id,
+        queued_job.id,
+    }
@@ -1,5 +1,6 @@
 import pytest
 import json
+import re
 import requests_mock
 from mcp.shared.memory import create_connected_server_and_client_session
 from asgiref.sync import sync_to_async
@@ -10,6 +11,7 @@ from core.mcp.server import mcp, MAX_PAGE_SIZE
 from core.mcp.api_key_authentication import MCPAPIKeyAuthenticationMiddleware
 from factories import SchemaFactory, ProfileFactory, UserFactory, SchemaRefFactory
 from utils import assert_schema_matches_manifest
+from core import jobs
 from core.models import Schema
 
 
@@ -201,6 +203,51 @@ async def test_create_schema_success(client_session, current_user_mock):
     await sync_to_async(assert_schema_matches_manifest)(schema, manifest)
 
 
+@pytest.mark.anyio
+async def test_create_schema_in_background(client_session, current_user_mock):
+    user = await sync_to_async(UserFactory.create)()
+    current_user_mock.get.return_value = user
+
+    manifest = {
+        "name": "Test Schema",
+        "documents": {
+            "https://example.com/mcp-definition.json": {"type": "definition"},
+        },
+    }
+
+    result = await client_session.call_tool(
+        "create_schema",
+        arguments={"manifest": json.dumps(manifest), "background": True},
+    )
+
+    parsed_result = json.loads(result.content[0].text)
+    assert parsed_result["status"] == "queued"
+    assert not await sync_to_async(Schema.objects.exists)()
+
+    await sync_to_async(jobs.run_pending_jobs)()
+
+    result = await client_session.call_tool(
+        "get_manifest_job", arguments={"job_id": parsed_result["job_id"]}
+    )
+
+    parsed_result = json.loads(result.content[0].text)
+    assert parsed_result["status"] == "succeeded"
+    schema = await sync_to_async(Schema.objects.get)(id=parsed_result["result"]["id"])
+    await sync_to_async(assert_schema_matches_manifest)(schema, manifest)
+
+
+@pytest.mark.anyio
+async def test_get_manifest_job_not_found(error_client_session, current_user_mock):
+    user = await sync_to_async(UserFactory.create)()
+    current_user_mock.get.return_value = user
+
+    result = await error_client_session.call_tool(
+        "get_manifest_job", arguments={"job_id": 99999}
+    )
+    assert result.isError
+    assert "Job with ID '99999' not found." in result.content[0].text
+
+
 @pytest.mark.anyio
 async def test_create_schema_unauthenticated(error_client_session, current_user_mock):
     # Mock the current_user to be None or unauthenticated
@@ -519,6 +566,7 @@ async def test_search_schemas_id_value_query_filtering(
     with requests_mock.Mocker() as m:
         m.get(mock_url, text=mock_content)
         await sync_to_async(SchemaRefFactory.create)(url=mock_url, schema=schema)
+        await sync_to_async(jobs.run_pending_jobs)()
 
     await sync_to_async(SchemaFactory.create)(
         created_by=user, name="Beta", description="Another item entirely"
@@ -533,6 +581,11 @@ async def test_search_schemas_id_value_query_filtering(
     assert "Beta" not in text
 
 
+def _get_next_cursor(text):
+    match = re.search(r'cursor: "([^"]+)"', text)
+    return match.group(1) if match else None
+
+
 @pytest.mark.anyio
 async def test_search_schemas_pagination(client_session, current_user_mock):
     user = await sync_to_async(UserFactory.create)()
@@ -541,29 +594,31 @@ async def test_search_schemas_pagination(client_session, current_user_mock):
     # Trigger pagination
     for i in range(MAX_PAGE_SIZE + 1):
         await sync_to_async(SchemaFactory.create)(
-            created_by=user, name=f"Pagination Schema {i}"
+            created_by=user, name=f"Pagination Schema {i:02}"
         )
 
     # Fetch page 1
-    result_page_1 = await client_session.call_tool(
-        "search_schemas", arguments={"page": 1}
-    )
+    result_page_1 = await client_session.call_tool("search_schemas", arguments={})
     text_1 = result_page_1.content[0].text
 
-    assert f"Found {MAX_PAGE_SIZE + 1} schemas matching your query." in text_1
-    assert "The results are truncated. Showing page 1 of 2:" in text_1
+    assert f"Showing {MAX_PAGE_SIZE} schemas matching your query:" in text_1
     assert (
-        'To get the next page, use `search_schemas(query: None, scope: "all", page: 2)`'
+        'The results are truncated. To get the next page, use `search_schemas(query: None, scope: "all", cursor: "'
         in text_1
     )
+    assert "Pagination Schema 00" in text_1
+    assert f"Pagination Schema {MAX_PAGE_SIZE}" not in text_1
 
     # Fetch page 2
     result_page_2 = await client_session.call_tool(
-        "search_schemas", arguments={"page": 2}
+        "search_schemas", arguments={"cursor": _get_next_cursor(text_1)}
     )
     text_2 = result_page_2.content[0].text
 
-    assert "Showing page 2 of 2:" in text_2
+    assert "Showing 1 schema matching your query:" in text_2
+    assert f"Pagination Schema {MAX_PAGE_SIZE}" in text_2
+    assert "Pagination Schema 00" not in text_2
+    assert _get_next_cursor(text_2) is None
 
 
 @pytest.mark.anyio
@@ -579,40 +634,43 @@ async def test_search_schemas_pagination_with_query(client_session, current_user
 
     # Fetch page 1
     result_page_1 = await client_session.call_tool(
-        "search_schemas", arguments={"query": "alpha", "page": 1}
+        "search_schemas", arguments={"query": "alpha"}
     )
     text_1 = result_page_1.content[0].text
 
-    assert f"Found {MAX_PAGE_SIZE + 1} schemas matching your query." in text_1
-    assert "The results are truncated. Showing page 1 of 2:" in text_1
+    assert f"Showing {MAX_PAGE_SIZE} schemas matching your query:" in text_1
     assert (
-        "To get the next page, use `search_schemas(query: 'alpha', scope: \"all\", page: 2)`"
+        'The results are truncated. To get the next page, use `search_schemas(query: \'alpha\', scope: "all", cursor: "'
         in text_1
     )
 
     # Fetch page 2
     result_page_2 = await client_session.call_tool(
-        "search_schemas", arguments={"query": "alpha", "page": 2}
+        "search_schemas",
+        arguments={"query": "alpha", "cursor": _get_next_cursor(text_1)},
     )
     text_2 = result_page_2.content[0].text
 
-    assert "Showing page 2 of 2:" in text_2
+    assert "Showing 1 schema matching your query:" in text_2
+
+    page_1_ids = set(re.findall(r"ID: (\d+)", text_1))
+    page_2_ids = set(re.findall(r"ID: (\d+)", text_2))
+    assert len(page_1_ids | page_2_ids) == MAX_PAGE_SIZE + 1
 
 
 @pytest.mark.anyio
-async def test_search_schemas_invalid_page(error_client_session, current_user_mock):
+async def test_search_schemas_invalid_cursor(error_client_session, current_user_mock):
     user = await sync_to_async(UserFactory.create)()
     current_user_mock.get.return_value = user
 
-    # Create 1 schema so there is only 1 page
     await sync_to_async(SchemaFactory.create)(created_by=user)
 
     result = await error_client_session.call_tool(
-        "search_schemas", arguments={"page": 5}
+        "search_schemas", arguments={"cursor": "not-a-real-cursor"}
     )
 
     assert result.isError
     assert (
-        "Invalid page number for query. Please request a page between 1 and 1."
+        "Invalid cursor for query. Please omit the cursor to start from the first page."
         in result.content[0].text
     )
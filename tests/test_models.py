@@ -1,15 +1,32 @@
+import json
 import logging
+import time
+from datetime import timedelta
 
 import pytest
 import requests_mock
-from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from unittest.mock import Mock, patch
 from django.core.cache import cache
 from django.utils import timezone
 from django.core import mail
 from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
 from django.test import override_settings
-from core.models import Schema, SchemaRef, APIKey
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from core import content_cache, jobs, local_cache
+from core.api_key_cache import set_cached_api_key_owner
+from core.http_client import ResponseTooLargeError
+from core.models import (
+    Schema,
+    SchemaRef,
+    DocumentationItem,
+    APIKey,
+    PublishedSchemaConflictError,
+    URLProviderInfo,
+)
 from factories import (
     UserFactory,
     SchemaRefFactory,
@@ -84,6 +101,62 @@ def test_reference_item_github_url_info_converts_raw_url_to_repo(repo_url, raw_u
     assert schema_ref.url_provider_info.repo_url == repo_url
 
 
+@pytest.mark.parametrize(
+    "url_1, url_2",
+    [
+        [
+            "https://github.com/userorg/reponame/blob/branch/path/to/file.json",
+            "https://raw.githubusercontent.com/userorg/reponame/refs/heads/branch/path/to/file.json",
+        ],
+        [
+            "https://github.com/userorg/reponame/blob/branch/path/to/file.json",
+            "https://github.com/userorg/reponame/raw/refs/heads/branch/path/to/file.json",
+        ],
+        [
+            "http://example.com/definition.json",
+            "https://EXAMPLE.com/definition.json?query=true",
+        ],
+    ],
+)
+def test_url_provider_info_canonical_resource_matches_same_resource(url_1, url_2):
+    url_provider_info = URLProviderInfo.from_url(url_1)
+    assert url_provider_info.is_same_resource(url_2)
+    assert (
+        url_provider_info.canonical_resource
+        == URLProviderInfo.from_url(url_2).canonical_resource
+    )
+
+
+@pytest.mark.parametrize(
+    "url, canonical_url",
+    [
+        [
+            "https://github.com/userorg/reponame/raw/refs/heads",
+            "github.com/userorg/reponame/raw/refs/heads",
+        ],
+        [
+            "https://raw.githubusercontent.com/userorg/reponame",
+            "raw.githubusercontent.com/userorg/reponame",
+        ],
+        [
+            "https://github.com/userorg/reponame/raw/refs",
+            "github.com/userorg/reponame/blob/refs",
+        ],
+    ],
+)
+def test_url_provider_info_canonical_resource_handles_partial_github_urls(
+    url, canonical_url
+):
+    assert URLProviderInfo.from_url(url).canonical_resource == canonical_url
+
+
+def test_url_provider_info_canonical_resource_differs_for_other_resources():
+    assert (
+        URLProviderInfo.from_url("https://example.com/a.json").canonical_resource
+        != URLProviderInfo.from_url("https://example.com/b.json").canonical_resource
+    )
+
+
 @pytest.mark.django_db
 def test_reference_item_content_is_fetched_from_raw_url_if_available():
     schema_ref = SchemaRefFactory(
@@ -112,7 +185,9 @@ def test_reference_item_get_content_success(mock_sleep):
 
 @pytest.mark.django_db
 @patch("core.models.time.sleep", return_value=None)
-def test_reference_item_get_content_failure_sends_email_and_sets_timestamp(mock_sleep):
+def test_reference_item_get_content_failure_leaves_tracking_to_warm_command(
+    mock_sleep,
+):
     schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
     with requests_mock.Mocker() as m:
         m.get(schema_ref.url, status_code=500)
@@ -120,59 +195,64 @@ def test_reference_item_get_content_failure_sends_email_and_sets_timestamp(mock_
             schema_ref.get_content()
 
         schema_ref.refresh_from_db()
-        assert schema_ref.content_fetch_failing_since is not None
-        assert len(mail.outbox) == 1
-        assert "Content Failure" in mail.outbox[0].subject
+        assert schema_ref.content_fetch_failing_since is None
+        assert len(mail.outbox) == 0
 
 
 @pytest.mark.django_db
 @patch("core.models.time.sleep", return_value=None)
-def test_reference_item_get_content_subsequent_failure_no_email_or_timestamp_change(
-    mock_sleep,
-):
-    mock_failure_time = timezone.now() - timezone.timedelta(hours=1)
-    schema_ref = SchemaRefFactory.create(
-        content_fetch_failing_since=mock_failure_time,
-        url="https://example.com/definition",
-    )
+def test_reference_item_get_content_retries_on_unreachable(mock_sleep):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
     with requests_mock.Mocker() as m:
-        m.get(schema_ref.url, status_code=500)
+        m.get(schema_ref.url, exc=requests.exceptions.HTTPError)
         with pytest.raises(requests.exceptions.HTTPError):
             schema_ref.get_content()
 
-        schema_ref.refresh_from_db()
-        assert schema_ref.content_fetch_failing_since == mock_failure_time
-        assert len(mail.outbox) == 0
+        # 3 attempts total (initial + 2 retries)
+        assert m.call_count == 3
+        assert mock_sleep.call_count == 2
 
 
 @pytest.mark.django_db
 @patch("core.models.time.sleep", return_value=None)
-def test_reference_item_get_content_success_after_failure_clears_timestamp(mock_sleep):
-    schema_ref = SchemaRefFactory.create(
-        content_fetch_failing_since=timezone.now() - timezone.timedelta(hours=1),
-        url="https://example.com/definition",
-    )
-    mock_content = "some content"
+def test_reference_item_get_content_sets_timeouts(mock_sleep):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
     with requests_mock.Mocker() as m:
-        m.get(schema_ref.url, text=mock_content)
-        content = schema_ref.get_content()
-        assert content == mock_content
-        schema_ref.refresh_from_db()
-        assert schema_ref.content_fetch_failing_since is None
+        m.get(schema_ref.url, text="some content")
+        schema_ref.get_content()
+        connect_timeout, read_timeout = m.last_request.timeout
+        assert 0 < connect_timeout <= settings.CONTENT_FETCH_CONNECT_TIMEOUT
+        assert 0 < read_timeout <= settings.CONTENT_FETCH_READ_TIMEOUT
 
 
 @pytest.mark.django_db
+@override_settings(CONTENT_FETCH_MAX_BYTES=10)
 @patch("core.models.time.sleep", return_value=None)
-def test_reference_item_get_content_retries_on_unreachable(mock_sleep):
+def test_reference_item_get_content_does_not_retry_oversized_content(mock_sleep):
     schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
     with requests_mock.Mocker() as m:
-        m.get(schema_ref.url, exc=requests.exceptions.HTTPError)
-        with pytest.raises(requests.exceptions.HTTPError):
+        m.get(schema_ref.url, text="x" * 100)
+        with pytest.raises(ResponseTooLargeError):
             schema_ref.get_content()
 
-        # 3 attempts total (initial + 2 retries)
-        assert m.call_count == 3
-        assert mock_sleep.call_count == 2
+        assert m.call_count == 1
+        assert mock_sleep.call_count == 0
+        assert len(mail.outbox) == 0
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_FETCH_DEADLINE=0.8)
+@patch("core.models.time.sleep", return_value=None)
+def test_reference_item_get_content_stops_retrying_at_deadline(mock_sleep):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    with requests_mock.Mocker() as m:
+        m.get(schema_ref.url, exc=requests.exceptions.ConnectionError)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            schema_ref.get_content()
+
+        # The second backoff (1s) wouldn't fit in the deadline
+        assert m.call_count == 2
+        assert mock_sleep.call_count == 1
 
 
 @pytest.mark.django_db
@@ -234,6 +314,109 @@ def test_reference_item_get_content_returns_cached_on_second_call():
         assert m.call_count == 1  # Still 1 - no second request made
 
 
+@pytest.mark.django_db
+@override_settings(CONTENT_CACHE_TTL=0)
+def test_reference_item_get_content_revalidates_expired_content():
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    with requests_mock.Mocker() as m:
+        m.get(
+            schema_ref.url,
+            [
+                {
+                    "text": "cached schema content",
+                    "headers": {
+                        "ETag": '"v1"',
+                        "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+                    },
+                },
+                {"status_code": 304},
+            ],
+        )
+
+        assert schema_ref.get_content() == "cached schema content"
+        assert schema_ref.get_content() == "cached schema content"
+
+        assert m.call_count == 2
+        assert m.last_request.headers["If-None-Match"] == '"v1"'
+        assert (
+            m.last_request.headers["If-Modified-Since"]
+            == "Wed, 21 Oct 2015 07:28:00 GMT"
+        )
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_CACHE_TTL=0)
+def test_reference_item_get_content_replaces_changed_content():
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    with requests_mock.Mocker() as m:
+        m.get(
+            schema_ref.url,
+            [
+                {"text": "old content", "headers": {"ETag": '"v1"'}},
+                {"text": "new content", "headers": {"ETag": '"v2"'}},
+            ],
+        )
+
+        assert schema_ref.get_content() == "old content"
+        assert schema_ref.get_content() == "new content"
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_CACHE_TTL=0, CONTENT_REFRESH_IN_BACKGROUND=True)
+@patch("core.models.schedule_background_task")
+def test_reference_item_get_content_serves_stale_content_while_refreshing(
+    mock_schedule_background_task,
+):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    with requests_mock.Mocker() as m:
+        m.get(schema_ref.url, [{"text": "old content"}, {"text": "new content"}])
+
+        assert schema_ref.get_content() == "old content"
+        assert schema_ref.get_content() == "old content"
+        assert m.call_count == 1
+
+        # Run the scheduled refresh
+        task_key, refresh_cached_content = mock_schedule_background_task.call_args[0]
+        assert task_key == schema_ref._cache_key()
+        refresh_cached_content()
+
+    assert schema_ref.get_content() == "new content"
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_CACHE_TTL=0)
+def test_reference_item_get_content_serves_stale_content_while_locked():
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    with requests_mock.Mocker() as m:
+        m.get(schema_ref.url, [{"text": "old content"}, {"text": "new content"}])
+        assert schema_ref.get_content() == "old content"
+
+        # Another worker is already refetching it
+        cache.add(f"{schema_ref._cache_key()}:fetch_lock", 1)
+        assert schema_ref.get_content() == "old content"
+        assert m.call_count == 1
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_FETCH_LOCK_WAIT=0.1)
+def test_reference_item_get_content_fetches_after_waiting_on_lock():
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    cache.add(f"{schema_ref._cache_key()}:fetch_lock", 1)
+    with requests_mock.Mocker() as m:
+        m.get(schema_ref.url, text="content")
+        assert schema_ref.get_content() == "content"
+        assert m.call_count == 1
+
+
+def test_content_cache_entries_expire_early_by_chance():
+    entry = {"fetch_duration": 1, "fresh_until": time.time() + 10}
+    with patch("core.models.random.random", return_value=0):
+        assert not SchemaRef._is_content_cache_entry_stale(entry)
+    # -log(1 - 0.99999999) * 1s is well over the 10s left
+    with patch("core.models.random.random", return_value=0.99999999):
+        assert SchemaRef._is_content_cache_entry_stale(entry)
+
+
 @pytest.mark.django_db
 def test_reference_item_url_change_invalidates_cached_content():
     old_url = "https://example.com/old"
@@ -253,18 +436,152 @@ def test_reference_item_url_change_invalidates_cached_content():
 
 
 @pytest.mark.django_db
-def test_reference_item_cache_key_is_class_scoped():
-    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
-    doc_item = DocumentationItemFactory.create(url="https://example.com/readme.md")
+def test_reference_items_with_the_same_url_share_cached_content():
+    url = "https://example.com/definition.md"
+    schema_ref = SchemaRefFactory.create(url=url)
+    doc_item = DocumentationItemFactory.create(url=url)
+    other_schema_ref = SchemaRefFactory.create(url="https://example.com/other.md")
+
+    assert schema_ref._cache_key() == doc_item._cache_key()
+    assert schema_ref._cache_key() != other_schema_ref._cache_key()
+    with requests_mock.Mocker() as m:
+        m.get(url, text="shared content")
+        assert schema_ref.get_content() == "shared content"
+        assert doc_item.get_content() == "shared content"
+        assert m.call_count == 1
+
+
+def test_content_cache_stores_identical_bodies_once():
+    entry = SchemaRef._build_content_cache_entry("same content")
+    content_cache.set_entry("https://example.com/a", entry)
+    content_cache.set_entry("https://example.com/b", entry)
+
+    body_keys = [key for key in cache._cache if ":content:body:" in key]
+    # The body and its reference count
+    assert len(body_keys) == 2
+    assert content_cache.get_entry("https://example.com/a")["content"] == "same content"
+    assert content_cache.get_entry("https://example.com/b")["content"] == "same content"
+
+
+def test_content_cache_deletes_bodies_nothing_points_to():
+    content_cache.set_entry(
+        "https://example.com/a", SchemaRef._build_content_cache_entry("old content")
+    )
+    content_cache.set_entry(
+        "https://example.com/b", SchemaRef._build_content_cache_entry("old content")
+    )
+
+    content_cache.set_entry(
+        "https://example.com/a", SchemaRef._build_content_cache_entry("new content")
+    )
+    # Still used by b
+    assert content_cache.get_entry("https://example.com/b")["content"] == "old content"
+
+    content_cache.delete_entry("https://example.com/b")
+    body_values = [
+        value for key, value in cache._cache.items() if ":content:body:" in key
+    ]
+    assert len(body_values) == 2
+    assert content_cache.get_entry("https://example.com/a")["content"] == "new content"
+
+
+@pytest.mark.parametrize(
+    "content", ["", "small", '{"type": "object"}' * 1000, "ünïcødé " * 1000]
+)
+def test_content_cache_bodies_round_trip(content):
+    assert content_cache.decode_body(content_cache.encode_body(content)) == content
+
+
+@override_settings(CONTENT_CACHE_COMPRESSION_THRESHOLD=100)
+def test_content_cache_compresses_large_bodies():
+    content = '{"type": "object"}' * 1000
+    content_cache.set_entry(
+        "https://example.com/a", SchemaRef._build_content_cache_entry(content)
+    )
+
+    [body] = [
+        cache.get(key.removeprefix(":1:"))
+        for key in cache._cache
+        if ":content:body:" in key and not key.endswith(":refs")
+    ]
+    assert len(body) < len(content) / 10
+    assert content_cache.get_entry("https://example.com/a")["content"] == content
+
+
+def test_content_cache_reads_unencoded_bodies():
+    content_cache.set_entry(
+        "https://example.com/a", SchemaRef._build_content_cache_entry("content")
+    )
+    [body_key] = [
+        key.removeprefix(":1:")
+        for key in cache._cache
+        if ":content:body:" in key and not key.endswith(":refs")
+    ]
+    # As written before bodies were encoded
+    cache.set(body_key, "content")
+
+    assert content_cache.get_entry("https://example.com/a")["content"] == "content"
+
+
+def test_content_cache_serves_fresh_entries_from_local_memory():
+    url = "https://example.com/a"
+    content_cache.set_entry(url, SchemaRef._build_content_cache_entry("content"))
+    assert content_cache.get_entry(url)["content"] == "content"
+
+    with patch.object(cache, "get") as mock_get:
+        assert content_cache.get_entry(url)["content"] == "content"
+        assert async_to_sync(content_cache.aget_entry)(url)["content"] == "content"
+        mock_get.assert_not_called()
+
+
+def test_content_cache_writes_invalidate_local_entries_everywhere():
+    url = "https://example.com/a"
+    content_cache.set_entry(url, SchemaRef._build_content_cache_entry("old content"))
+    content_cache.get_entry(url)
+
+    with patch("core.local_cache._get_redis_connection") as mock_get_connection:
+        content_cache.set_entry(
+            url, SchemaRef._build_content_cache_entry("new content")
+        )
+
+    mock_get_connection.return_value.publish.assert_called_once_with(
+        local_cache.INVALIDATION_CHANNEL, json.dumps(["content", url])
+    )
+    assert content_cache.get_entry(url)["content"] == "new content"
+
+
+def test_content_cache_evicts_local_entries_invalidated_elsewhere():
+    url = "https://example.com/a"
+    content_cache.set_entry(url, SchemaRef._build_content_cache_entry("content"))
+    content_cache.get_entry(url)
+
+    local_cache._handle_message({"data": json.dumps(["content", url]).encode()})
+
+    with patch.object(cache, "get", return_value=None):
+        assert content_cache.get_entry(url) is None
+
+
+def test_content_cache_renders_each_body_once():
+    render = Mock(side_effect=str.upper)
+
+    assert content_cache.get_rendering("content", "upper:1", render) == "CONTENT"
+    content_cache.clear_local_content_cache()
+    assert content_cache.get_rendering("content", "upper:1", render) == "CONTENT"
+    assert render.call_count == 1
 
-    # Force the same pk to make the collision risk explicit. Even if
-    # both rows share pk=N, the cache keys must differ.
-    schema_ref.pk = 1
-    doc_item.pk = 1
+    # A new renderer (or version of one) renders it again
+    assert content_cache.get_rendering("content", "upper:2", render) == "CONTENT"
+    assert render.call_count == 2
 
-    assert schema_ref._cache_key() != doc_item._cache_key()
-    assert "schemaref" in schema_ref._cache_key()
-    assert "documentationitem" in doc_item._cache_key()
+
+def test_content_cache_deletes_renderings_with_their_body():
+    url = "https://example.com/a"
+    content_cache.set_entry(url, SchemaRef._build_content_cache_entry("content"))
+    content_cache.get_rendering("content", "upper", str.upper)
+
+    content_cache.delete_entry(url)
+
+    assert not [key for key in cache._cache if ":content:body:" in key]
 
 
 @pytest.mark.django_db
@@ -308,6 +625,63 @@ def test_reference_item_get_content_logs_backend_fallback_when_cache_set_raises(
     )
 
 
+@pytest.mark.django_db
+def test_reference_item_aget_content_caches_content(async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    async_http_mock.get(schema_ref.url, text="remote content")
+
+    assert async_to_sync(schema_ref.aget_content)() == "remote content"
+    assert async_to_sync(schema_ref.aget_content)() == "remote content"
+    assert schema_ref.get_content() == "remote content"
+
+    assert len(async_http_mock.requests) == 1
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_CACHE_TTL=0)
+def test_reference_item_aget_content_revalidates_expired_content(async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    content_cache.set_entry(
+        schema_ref.url,
+        schema_ref._build_content_cache_entry("cached content", etag='"v1"'),
+    )
+    async_http_mock.get(schema_ref.url, status_code=304)
+
+    assert async_to_sync(schema_ref.aget_content)() == "cached content"
+
+    assert async_http_mock.requests[-1].headers["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.django_db
+@patch("core.models.asyncio.sleep")
+def test_reference_item_aget_content_retries_on_failure(mock_sleep, async_http_mock):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    async_http_mock.get(schema_ref.url, status_code=500)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        async_to_sync(schema_ref.aget_content)()
+
+    # 3 attempts total (initial + 2 retries)
+    assert len(async_http_mock.requests) == 3
+    assert mock_sleep.call_count == 2
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_FETCH_MAX_BYTES=10)
+@patch("core.models.asyncio.sleep")
+def test_reference_item_aget_content_does_not_retry_oversized_content(
+    mock_sleep, async_http_mock
+):
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition")
+    async_http_mock.get(schema_ref.url, text="x" * 100)
+
+    with pytest.raises(ResponseTooLargeError):
+        async_to_sync(schema_ref.aget_content)()
+
+    assert len(async_http_mock.requests) == 1
+    assert mock_sleep.call_count == 0
+
+
 @pytest.mark.django_db
 def test_api_key_creation():
     profile = ProfileFactory.create()
@@ -342,28 +716,189 @@ def test_api_key_lookup():
 
 
 @pytest.mark.django_db
-def test_schema_ref_parses_id_value_from_content_on_save():
+def test_api_key_secrets_are_stored_with_hmac():
+    profile = ProfileFactory.create()
+    raw_api_key = profile.set_new_api_key()
+    profile.api_key.refresh_from_db()
+    assert profile.api_key.hashed_secret.startswith("hmac_sha256$")
+    assert APIKey.objects.get_from_key(raw_api_key) == profile.api_key
+    assert APIKey.objects.get_from_key(raw_api_key + "x") is None
+
+
+@pytest.mark.django_db
+def test_api_key_legacy_hash_is_upgraded_on_use():
+    mock_prefix = "1234abcd"
+    mock_secret = "mock-secret"
+    inserted_key = APIKeyFactory.create(
+        hashed_secret=make_password(mock_secret), prefix=mock_prefix
+    )
+    assert APIKey.objects.get_from_key(f"{mock_prefix}.{mock_secret}") == inserted_key
+    inserted_key.refresh_from_db()
+    assert inserted_key.hashed_secret == APIKey.hash_secret(mock_secret)
+    # The upgraded hash must still authenticate
+    assert APIKey.objects.get_from_key(f"{mock_prefix}.{mock_secret}") == inserted_key
+
+
+@pytest.mark.django_db
+def test_api_key_profile_lookup_skips_secret_check_once_verified():
+    profile = ProfileFactory.create()
+    raw_api_key = profile.set_new_api_key()
+    assert APIKey.objects.get_profile_from_key(raw_api_key) == profile
+    with patch.object(APIKey, "check_secret") as mocked_check_secret:
+        assert APIKey.objects.get_profile_from_key(raw_api_key) == profile
+        mocked_check_secret.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_api_key_profile_lookup_rejects_rotated_key():
+    profile = ProfileFactory.create()
+    old_raw_api_key = profile.set_new_api_key()
+    assert APIKey.objects.get_profile_from_key(old_raw_api_key) == profile
+    new_raw_api_key = profile.set_new_api_key()
+    assert APIKey.objects.get_profile_from_key(old_raw_api_key) is None
+    assert APIKey.objects.get_profile_from_key(new_raw_api_key) == profile
+
+
+@pytest.mark.django_db
+def test_api_key_profile_lookup_rejects_deleted_key(django_capture_on_commit_callbacks):
+    profile = ProfileFactory.create()
+    raw_api_key = profile.set_new_api_key()
+    assert APIKey.objects.get_profile_from_key(raw_api_key) == profile
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.api_key.delete()
+    assert APIKey.objects.get_profile_from_key(raw_api_key) is None
+
+
+@pytest.mark.django_db
+def test_api_key_profile_lookup_rejects_rotated_key_cached_after_rotation():
+    profile = ProfileFactory.create()
+    old_raw_api_key = profile.set_new_api_key()
+    old_api_key = APIKey.objects.get(profile=profile)
+    profile.set_new_api_key()
+    # A request that verified the old key before the rotation caches it late
+    set_cached_api_key_owner(
+        old_raw_api_key, profile.id, profile.user_id, old_api_key.id
+    )
+    assert APIKey.objects.get_profile_from_key(old_raw_api_key) is None
+
+
+@pytest.mark.django_db
+def test_schema_ref_parses_id_value_from_content_in_background():
     mock_url = "https://example.com/schema.json"
     mock_id_value = "https://example.com/mockid"
     mock_content = f'{{"$id":"{mock_id_value}"}}'
     with requests_mock.Mocker() as m:
         m.get(mock_url, text=mock_content)
         schema_ref = SchemaRefFactory.create(url=mock_url)
+        # Saving doesn't fetch anything
+        assert m.call_count == 0
+        jobs.run_pending_jobs()
         schema_ref.refresh_from_db()
         assert schema_ref.id_value == mock_id_value
 
 
 @pytest.mark.django_db
-def test_schema_ref_reparses_new_id_value_from_content_on_save():
+def test_schema_ref_reparses_id_value_when_new_content_is_fetched():
     mock_url = "https://example.com/schema.json"
     new_mock_id_value = "https://example.com/new_id"
     with requests_mock.Mocker() as m:
         m.get(mock_url, text='{"$id":"https://example.com/old_id"}')
         schema_ref = SchemaRefFactory.create(url=mock_url)
+        other_schema_ref = SchemaRefFactory.create(
+            url=mock_url, schema=SchemaFactory(published_at=None)
+        )
+        jobs.run_pending_jobs()
         m.get(mock_url, text=f'{{"$id": "{new_mock_id_value}"}}')
+        schema_ref.refresh_from_db()
+        schema_ref._fetch_and_cache_content()
+        # Every SchemaRef with the URL is updated
+        other_schema_ref.refresh_from_db()
+        assert other_schema_ref.id_value == new_mock_id_value
+
+
+@pytest.mark.django_db
+def test_schema_ref_id_value_is_updated_for_every_url_of_the_resource():
+    blob_url = "https://github.com/userorg/reponame/blob/main/schema.json"
+    raw_url = (
+        "https://raw.githubusercontent.com/userorg/reponame/refs/heads/main/schema.json"
+    )
+    id_value = "https://example.com/id"
+    with requests_mock.Mocker() as m:
+        m.get(raw_url, text=f'{{"$id":"{id_value}"}}')
+        raw_schema_ref = SchemaRefFactory.create(url=raw_url)
+        blob_schema_ref = SchemaRefFactory.create(
+            url=blob_url, schema=SchemaFactory(published_at=None)
+        )
+        raw_schema_ref._fetch_and_cache_content()
+    blob_schema_ref.refresh_from_db()
+    assert blob_schema_ref.id_value == id_value
+
+
+@pytest.mark.django_db
+def test_published_conflict_check_reads_cached_id_values_without_saving():
+    url = "https://example.com/schema.json"
+    id_value = "https://example.com/id"
+    with requests_mock.Mocker() as m:
+        m.get(url, text=f'{{"$id":"{id_value}"}}')
+        SchemaRefFactory.create(url=url)
+        jobs.run_pending_jobs()
+        schema = SchemaFactory.create(published_at=None)
+        other_url = "https://example.com/other.json"
+        m.get(other_url, text=f'{{"$id":"{id_value}"}}')
+
+        # Without `fetch`, uncached content isn't fetched
+        schema.check_for_published_conflicts(schema_refs=[SchemaRef(url=other_url)])
+        assert m.call_count == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            with pytest.raises(PublishedSchemaConflictError) as e:
+                schema.check_for_published_conflicts(
+                    schema_refs=[SchemaRef(url=other_url)], fetch=True
+                )
+        assert e.value.reason == "$id"
+        assert all(query["sql"].startswith("SELECT") for query in queries)
+
+
+@pytest.mark.django_db
+def test_published_conflict_check_falls_back_to_saved_id_values():
+    id_value = "https://example.com/id"
+    with requests_mock.Mocker() as m:
+        m.get("https://example.com/draft.json", text=f'{{"$id":"{id_value}"}}')
+        m.get("https://example.com/published.json", text=f'{{"$id":"{id_value}"}}')
+        SchemaRefFactory.create(
+            url="https://example.com/draft.json",
+            schema=SchemaFactory.create(published_at=None),
+        )
+        SchemaRefFactory.create(url="https://example.com/published.json")
+        jobs.run_pending_jobs()
+    cache.clear()
+    content_cache.clear_local_content_cache()
+
+    schema = SchemaFactory.create(published_at=None)
+    with pytest.raises(PublishedSchemaConflictError) as e:
+        schema.check_for_published_conflicts(
+            schema_refs=[SchemaRef(url="https://example.com/draft.json")]
+        )
+    assert e.value.reason == "$id"
+
+
+@pytest.mark.django_db
+def test_schema_ref_clears_id_value_when_url_changes():
+    with requests_mock.Mocker() as m:
+        m.get(
+            "https://example.com/schema.json", text='{"$id":"https://example.com/id"}'
+        )
+        m.get("https://example.com/other.json", text="{}")
+        schema_ref = SchemaRefFactory.create(url="https://example.com/schema.json")
+        jobs.run_pending_jobs()
+        schema_ref.refresh_from_db()
+        schema_ref.url = "https://example.com/other.json"
         schema_ref.save()
+        assert schema_ref.id_value is None
+        jobs.run_pending_jobs()
         schema_ref.refresh_from_db()
-        assert schema_ref.id_value == new_mock_id_value
+        assert schema_ref.id_value is None
+        assert schema_ref.id_value_content_hash is not None
 
 
 @pytest.mark.django_db
@@ -394,6 +929,59 @@ def test_implementation_serializes_as_manifest_document_metadata():
     assert document["isOpenSource"] == implementation.is_open_source
 
 
+@pytest.mark.django_db
+def test_schema_ref_stores_canonical_url_on_save():
+    schema_ref = SchemaRefFactory.create(
+        url="https://raw.githubusercontent.com/userorg/reponame/refs/heads/branch/file.json"
+    )
+    schema_ref.refresh_from_db()
+    assert (
+        schema_ref.canonical_url == "github.com/userorg/reponame/blob/branch/file.json"
+    )
+
+
+@pytest.mark.django_db
+def test_schema_ref_stores_language_on_save():
+    schema_ref = SchemaRefFactory.create(url="https://example.com/definition.xml")
+    schema_ref.url = "https://example.com/definition.json"
+    schema_ref.save()
+    schema_ref.refresh_from_db()
+    assert schema_ref.language == "json"
+
+
+@pytest.mark.django_db
+def test_published_schema_refs_cannot_share_canonical_url():
+    url = "https://example.com/definition.xml"
+    SchemaRefFactory.create(url=url)
+    with pytest.raises(IntegrityError), transaction.atomic():
+        SchemaRefFactory.create(url=url.replace("https", "http"))
+    # Private schemas don't claim their URLs
+    SchemaRefFactory.create(url=url, schema=SchemaFactory.create(published_at=None))
+
+
+@pytest.mark.django_db
+def test_scheduled_schemas_count_as_published_for_conflicts():
+    url = "https://example.com/definition.json"
+    scheduled_schema = SchemaFactory.create(
+        published_at=timezone.now() + timedelta(days=1)
+    )
+    SchemaRefFactory.create(schema=scheduled_schema, url=url)
+    schema = SchemaFactory.create(published_at=None)
+    with pytest.raises(PublishedSchemaConflictError):
+        schema.check_for_published_conflicts(schema_refs=[SchemaRef(url=url)])
+
+
+@pytest.mark.django_db
+def test_publishing_schema_claims_its_urls():
+    schema = SchemaFactory.create(published_at=None)
+    schema_ref = SchemaRefFactory.create(schema=schema)
+    assert not schema_ref.claims_published_url
+    schema.published_at = timezone.now()
+    schema.save()
+    schema_ref.refresh_from_db()
+    assert schema_ref.claims_published_url
+
+
 @pytest.mark.django_db
 def test_schema_serializes_as_manifest():
     schema = SchemaFactory()
@@ -404,6 +992,107 @@ def test_schema_serializes_as_manifest():
     assert_schema_matches_manifest(schema, manifest)
 
 
+def build_manifest(document_count, public=False, base_url="https://example.com"):
+    documents = {}
+    for i in range(document_count):
+        documents[f"{base_url}/definition-{i}.json"] = {
+            "type": "definition",
+            "name": f"Definition {i}",
+        }
+        documents[f"{base_url}/readme-{i}.md"] = {
+            "type": "documentation",
+            "name": f"README {i}",
+            "role": "readme",
+            "format": "markdown",
+        }
+        documents[f"{base_url}/implementation-{i}"] = {
+            "type": "implementation",
+            "isOpenSource": True,
+        }
+    return {"name": "Test schema", "public": public, "documents": documents}
+
+
+@pytest.mark.django_db
+def test_schema_overwrite_from_manifest_applies_documents():
+    schema = SchemaFactory(published_at=None)
+    schema.overwrite_from_manifest(build_manifest(2))
+    assert_schema_matches_manifest(schema, build_manifest(2))
+
+    manifest = build_manifest(3)
+    del manifest["documents"]["https://example.com/definition-0.json"]
+    manifest["documents"]["https://example.com/readme-1.md"]["name"] = "New name"
+    changes = schema.overwrite_from_manifest(manifest)
+
+    assert changes == {"created": 3, "updated": 1, "deleted": 1}
+    assert_schema_matches_manifest(schema, manifest)
+    schema.refresh_from_db()
+    assert schema.schema_ref_count == 2
+    assert schema.implementation_count == 3
+
+
+@pytest.mark.django_db
+def test_schema_overwrite_from_manifest_replaces_documents_that_change_type():
+    schema = SchemaFactory(published_at=None)
+    url = "https://example.com/document.md"
+    schema.overwrite_from_manifest({
+        "name": "Test schema",
+        "documents": {url: {"type": "definition"}},
+    })
+    manifest = {
+        "name": "Test schema",
+        "documents": {url: {"type": "documentation", "name": "Document"}},
+    }
+    schema.overwrite_from_manifest(manifest)
+
+    assert not schema.schemaref_set.exists()
+    assert schema.documentationitem_set.get().url == url
+    assert_schema_matches_manifest(schema, manifest)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("public", [False, True])
+def test_schema_overwrite_from_manifest_runs_the_same_queries_for_any_size(public):
+    def count_queries(document_count):
+        schema = SchemaFactory(published_at=None)
+        # Published schemas can't share URLs
+        base_url = f"https://example.com/{document_count}"
+        with CaptureQueriesContext(connection) as create_queries:
+            schema.overwrite_from_manifest(
+                build_manifest(document_count, public=public, base_url=base_url)
+            )
+        manifest = build_manifest(document_count, public=public, base_url=base_url)
+        for document_metadata in manifest["documents"].values():
+            if document_metadata["type"] == "definition":
+                document_metadata["name"] += " (updated)"
+        with CaptureQueriesContext(connection) as update_queries:
+            schema.overwrite_from_manifest(manifest)
+        return len(create_queries), len(update_queries)
+
+    assert count_queries(2) == count_queries(10)
+
+
+@pytest.mark.django_db
+def test_published_schema_overwrite_from_manifest_checks_new_definitions_id():
+    id_value = "https://example.com/id"
+    with requests_mock.Mocker() as m:
+        m.get("https://example.com/taken.json", text=f'{{"$id":"{id_value}"}}')
+        m.get("https://example.com/new.json", text=f'{{"$id":"{id_value}"}}')
+        SchemaRefFactory.create(url="https://example.com/taken.json")
+        jobs.run_pending_jobs()
+        cache.clear()
+        content_cache.clear_local_content_cache()
+
+        schema = SchemaFactory.create()
+        documents = {"https://example.com/new.json": {"type": "definition"}}
+        with pytest.raises(ValidationError, match=r"\$id"):
+            schema.overwrite_from_manifest({
+                "name": "Test schema",
+                "public": True,
+                "documents": documents,
+            })
+    assert not schema.schemaref_set.exists()
+
+
 @pytest.mark.django_db
 def test_schema_published_at_cannot_be_unset():
     schema = SchemaFactory.create()
@@ -449,6 +1138,51 @@ def test_schema_published_at_can_be_changed_by_admins():
     assert schema.published_at == published_at_value
 
 
+@pytest.mark.django_db
+def test_schema_save_without_changes_runs_no_queries():
+    schema = Schema.objects.get(id=SchemaFactory.create().id)
+    with CaptureQueriesContext(connection) as queries:
+        schema.save()
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_schema_save_only_writes_changed_fields():
+    schema = Schema.objects.get(id=SchemaFactory.create().id)
+    schema.name = "New name"
+    with CaptureQueriesContext(connection) as queries:
+        schema.save()
+    # No SELECT to compare published_at against
+    assert [query["sql"].split()[0] for query in queries] == ["UPDATE"]
+    assert '"name"' in queries[0]["sql"]
+    assert '"description"' not in queries[0]["sql"]
+    schema.refresh_from_db()
+    assert schema.name == "New name"
+
+
+@pytest.mark.django_db
+def test_reference_item_save_tracks_changes_in_memory():
+    documentation_item = DocumentationItem.objects.get(
+        id=DocumentationItemFactory.create().id
+    )
+    documentation_item.name = "New name"
+    with CaptureQueriesContext(connection) as queries:
+        documentation_item.save()
+    # The URL is compared in memory, and names don't affect the schema summary
+    assert not any(query["sql"].startswith("SELECT") for query in queries)
+    documentation_item.refresh_from_db()
+    assert documentation_item.name == "New name"
+
+
+@pytest.mark.django_db
+def test_save_returns_the_fields_written():
+    schema_ref = SchemaRef.objects.get(id=SchemaRefFactory.create().id)
+    assert schema_ref.save() == []
+    schema_ref.name = "New name"
+    assert set(schema_ref.save()) == {"name", "updated_at"}
+    assert SchemaRefFactory.create().save(update_fields=["name"]) == ["name"]
+
+
 @pytest.mark.django_db
 @override_settings(TRUSTED_CONTENT_DOMAINS=["example.com"])
 def test_schema_ref_get_content_fetches_from_trusted_domain():
@@ -482,3 +1216,60 @@ def test_schema_ref_get_content_ignores_untrusted_domain():
         schema_ref = SchemaRefFactory.create(url=mock_url)
         content = schema_ref.get_content()
         assert content == ""
+
+
+@pytest.mark.django_db
+def test_schema_summary_tracks_reference_items_deleted_in_bulk():
+    schema = SchemaFactory.create()
+    SchemaRefFactory.create_batch(2, schema=schema)
+    DocumentationItemFactory.create(
+        schema=schema, role=DocumentationItem.DocumentationItemRole.RFC
+    )
+
+    SchemaRef.objects.filter(schema=schema).delete()
+    schema.documentationitem_set.all().delete()
+
+    schema.refresh_from_db()
+    assert schema.schema_ref_count == 0
+    assert schema.documentation_roles == []
+
+
+@pytest.mark.django_db
+def test_schema_summary_tracks_reference_items():
+    schema = SchemaFactory.create()
+    SchemaRefFactory.create(schema=schema, url="https://example.com/schema.xml")
+    DocumentationItemFactory.create(
+        schema=schema, role=DocumentationItem.DocumentationItemRole.RFC
+    )
+    ImplementationFactory.create(schema=schema, is_open_source=False)
+    open_source_implementation = ImplementationFactory.create(
+        schema=schema, is_open_source=True
+    )
+
+    schema = Schema.objects.get(id=schema.id)
+    assert schema.schema_ref_count == 1
+    assert schema.languages == ["xml"]
+    assert schema.documentation_roles == ["rfc"]
+    assert schema.has_rfc
+    assert not schema.has_w3c
+    assert schema.implementation_count == 2
+    assert schema.has_open_source_implementation
+
+    open_source_implementation.delete()
+    schema.refresh_from_db()
+    assert schema.implementation_count == 1
+    assert not schema.has_open_source_implementation
+
+
+@pytest.mark.django_db
+def test_saving_stale_schema_keeps_summary():
+    schema = SchemaFactory.create()
+    stale_schema = Schema.objects.get(id=schema.id)
+    ImplementationFactory.create(schema=schema)
+
+    stale_schema.name = "Renamed"
+    stale_schema.save()
+
+    schema.refresh_from_db()
+    assert schema.name == "Renamed"
+    assert schema.implementation_count == 1
@@ -1,7 +1,9 @@
 import pytest
+from django.test import override_settings
 
 from tests.factories import SchemaFactory
 from core.models import Schema
+from core.pagination import paginate_schemas
 
 
 @pytest.mark.django_db
@@ -73,3 +75,74 @@ def test_generated_vector_is_populated_on_insert():
     schema = SchemaFactory(name="Invoice Schema")
     schema.refresh_from_db()
     assert schema.search_vector is not None
+
+
+@pytest.mark.django_db
+def test_rankings_cached_until_a_schema_changes(django_assert_num_queries):
+    SchemaFactory(name="Invoice Schema")
+    assert [s.name for s in Schema.objects.public().search("invoice")] == [
+        "Invoice Schema"
+    ]
+    # Only the query narrowing the cached ranking down to public schemas runs,
+    # and extra whitespace doesn't count as a different query.
+    with django_assert_num_queries(1):
+        assert [s.name for s in Schema.objects.public().search(" invoice ")] == [
+            "Invoice Schema"
+        ]
+    SchemaFactory(name="Invoice Format")
+    assert Schema.objects.public().search("invoice").count() == 2
+
+
+@pytest.mark.django_db
+def test_cached_rankings_respect_the_callers_scope():
+    SchemaFactory(name="Public Invoice")
+    SchemaFactory(name="Private Invoice", published_at=None)
+    assert Schema.objects.search("invoice").count() == 2
+    assert Schema.objects.public().search("invoice").count() == 1
+
+
+@pytest.mark.django_db
+@override_settings(SEARCH_CACHE_MAX_RESULTS=1)
+def test_broad_queries_are_ranked_live():
+    SchemaFactory(name="Invoice Schema")
+    SchemaFactory(name="Invoice Format")
+    assert Schema.objects.public().search("invoice").count() == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("max_results", [100, 1])
+def test_ranked_pages_do_not_repeat_schemas_with_the_same_rank(max_results):
+    schemas = [SchemaFactory(name=f"Invoice {i}", description=None) for i in range(5)]
+    seen_ids = []
+    cursor = None
+    with override_settings(SEARCH_CACHE_MAX_RESULTS=max_results):
+        for _ in range(len(schemas)):
+            page, cursor = paginate_schemas(
+                Schema.objects.public().search("invoice"), 2, cursor
+            )
+            seen_ids += [schema.id for schema in page]
+            if cursor is None:
+                break
+    assert sorted(seen_ids) == sorted(schema.id for schema in schemas)
+
+
+@pytest.mark.django_db
+def test_suggest_matches_partial_words():
+    schema = SchemaFactory(name="Calendar Event")
+    decoy = SchemaFactory(name="Weather Report")
+    results = Schema.objects.public().suggest("calend")
+    assert schema in results
+    assert decoy not in results
+
+
+@pytest.mark.django_db
+def test_suggest_tolerates_typos_in_names():
+    schema = SchemaFactory(name="Invoice")
+    assert schema in Schema.objects.public().suggest("Invoise")
+
+
+@pytest.mark.django_db
+def test_suggest_ignores_query_syntax():
+    SchemaFactory(name="Invoice")
+    for junk in ("", "  ", "&|!:*()", "invoice & | !"):
+        assert Schema.objects.public().suggest(junk).count() >= 0
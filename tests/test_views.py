@@ -1,6 +1,6 @@
 from urllib.parse import urlparse
+import httpx
 import pytest
-import requests
 import requests_mock
 import json
 from tests.factories import (
@@ -13,9 +13,12 @@ from tests.factories import (
     PermanentURLFactory,
     ImplementationFactory,
 )
+from core import jobs
 from core.models import Schema, DocumentationItem, Profile
 from core.forms import PermanentURLForm
+from django.db import connection
 from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from pytest_django.asserts import assertRedirects
 from unittest.mock import patch
 from utils import assert_schema_matches_manifest
@@ -88,6 +91,51 @@ def test_published_schemas_filterable_by_language():
     assert xml_schema.name in str(xml_filtered_response.content)
 
 
+@pytest.mark.django_db
+def test_filtered_schemas_listed_once():
+    schema = SchemaFactory()
+    SchemaRefFactory(url="http://example.com/one.json", schema=schema)
+    SchemaRefFactory(url="http://example.com/two.json", schema=schema)
+    DocumentationItemFactory.create_batch(
+        2, schema=schema, role=DocumentationItem.DocumentationItemRole.RFC
+    )
+    response = Client().get(
+        "/?specification_file_type=json"
+        + f"&documentation_role={DocumentationItem.DocumentationItemRole.RFC.value}"
+    )
+    assert list(response.context["schemas"]) == [schema]
+
+
+@pytest.mark.django_db
+@patch("core.views.MAX_SCHEMA_RESULT_COUNT", 2)
+def test_index_pages_through_schemas():
+    for name in ["Charlie", "Alpha", "Bravo"]:
+        SchemaRefFactory(schema=SchemaFactory(name=name))
+    client = Client()
+    first_response = client.get("/")
+    assert [schema.name for schema in first_response.context["schemas"]] == [
+        "Alpha",
+        "Bravo",
+    ]
+    next_page_query = first_response.context["next_page_query"]
+    assert next_page_query
+    second_response = client.get(f"/?{next_page_query}")
+    assert [schema.name for schema in second_response.context["schemas"]] == ["Charlie"]
+    assert second_response.context["next_page_query"] is None
+
+
+@pytest.mark.django_db
+def test_schema_suggestions_list_public_schema_names():
+    schema = SchemaFactory(name="Calendar Event")
+    SchemaFactory(name="Calendar Draft", published_at=None)
+    response = Client().get("/schemas/suggestions?q=calend")
+    assert response.status_code == 200
+    assert response.json() == {
+        "suggestions": [{"id": schema.id, "name": "Calendar Event"}]
+    }
+    assert "public" in response["Cache-Control"]
+
+
 @pytest.mark.django_db
 def test_published_schemas_filterable_by_documentation_item_role():
     rfc_schema = SchemaFactory()
@@ -160,6 +208,7 @@ def test_private_schemas_with_published_id_values_cannot_be_published():
         m.get(private_schema_ref_url, text=f'{{"$id": "{mock_id_value}"}}')
         SchemaRefFactory(schema=public_schema, url=public_schema_ref_url)
         SchemaRefFactory(schema=private_schema, url=private_schema_ref_url)
+        jobs.run_pending_jobs()
 
     client = Client()
     client.force_login(private_schema.created_by)
@@ -361,50 +410,81 @@ def test_api_key_shown_to_user():
 
 
 @pytest.mark.django_db
-def test_schema_ref_detail_shows_error_when_content_fetch_fails():
+def test_schema_ref_detail_shows_error_when_content_fetch_fails(async_http_mock):
     schema_ref = SchemaRefFactory()
     client = Client()
-    with requests_mock.Mocker() as m:
-        m.get(schema_ref.url, exc=requests.exceptions.ConnectionError)
-        response = client.get(
-            f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
-            follow=True,
-        )
+    async_http_mock.get(schema_ref.url, exc=httpx.ConnectError)
+    response = client.get(
+        f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
+        follow=True,
+    )
     assert response.status_code == 200
     assert b"content-fetch-error" in response.content
 
 
 @pytest.mark.django_db
-def test_schema_ref_detail_renders_content_on_successful_fetch():
+def test_schema_ref_detail_renders_content_on_successful_fetch(async_http_mock):
     schema_ref = SchemaRefFactory(url="http://example.com/schema.json")
+    schema_ref.delete_cached_content()
     client = Client()
-    with requests_mock.Mocker() as m:
-        m.get(schema_ref.url, text='{"type": "object"}')
-        response = client.get(
-            f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
-            follow=True,
-        )
+    async_http_mock.get(schema_ref.url, text='{"type": "object"}')
+    response = client.get(
+        f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
+        follow=True,
+    )
     assert response.status_code == 200
     assert b"content-fetch-error" not in response.content
 
 
 @pytest.mark.django_db
-def test_schema_detail_shows_error_when_readme_content_fetch_fails():
+def test_schema_ref_detail_highlights_content(async_http_mock):
+    schema_ref = SchemaRefFactory(url="http://example.com/schema.json")
+    schema_ref.delete_cached_content()
+    client = Client()
+    async_http_mock.get(schema_ref.url, text='{"type": "object", "x": "<em>"}')
+    response = client.get(
+        f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
+        follow=True,
+    )
+    assert response.status_code == 200
+    # JSON Schema keywords are highlighted as keywords, other keys aren't
+    assert b'<span class="k">&quot;type&quot;</span>' in response.content
+    assert b'<span class="nt">&quot;x&quot;</span>' in response.content
+    assert b"&lt;em&gt;" in response.content
+    assert b"<em>" not in response.content
+
+
+@pytest.mark.django_db
+@override_settings(CONTENT_HIGHLIGHT_MAX_BYTES=10)
+def test_schema_ref_detail_does_not_highlight_long_content(async_http_mock):
+    schema_ref = SchemaRefFactory(url="http://example.com/schema.json")
+    schema_ref.delete_cached_content()
+    client = Client()
+    async_http_mock.get(schema_ref.url, text='{"type": "object"}')
+    response = client.get(
+        f"/schemas/{schema_ref.schema.id}/definition/{schema_ref.id}",
+        follow=True,
+    )
+    assert response.status_code == 200
+    assert b"<code>{&quot;type&quot;: &quot;object&quot;}</code>" in response.content
+
+
+@pytest.mark.django_db
+def test_schema_detail_shows_error_when_readme_content_fetch_fails(async_http_mock):
     schema = SchemaFactory()
     readme = DocumentationItemFactory(
         schema=schema,
         role=DocumentationItem.DocumentationItemRole.README,
     )
     client = Client()
-    with requests_mock.Mocker() as m:
-        m.get(readme.url, exc=requests.exceptions.ConnectionError)
-        response = client.get(f"/schemas/{schema.id}", follow=True)
+    async_http_mock.get(readme.url, exc=httpx.ConnectError)
+    response = client.get(f"/schemas/{schema.id}", follow=True)
     assert response.status_code == 200
     assert b"content-fetch-error" in response.content
 
 
 @pytest.mark.django_db
-def test_schema_detail_renders_readme_on_successful_fetch():
+def test_schema_detail_renders_readme_on_successful_fetch(async_http_mock):
     schema = SchemaFactory()
     readme = DocumentationItemFactory(
         schema=schema,
@@ -413,14 +493,73 @@ def test_schema_detail_renders_readme_on_successful_fetch():
         url="https://example.com/readme",
     )
     client = Client()
-    with requests_mock.Mocker() as m:
-        m.get(readme.url, text="Hello readme")
-        response = client.get(f"/schemas/{schema.id}", follow=True)
+    async_http_mock.get(readme.url, text="Hello readme")
+    response = client.get(f"/schemas/{schema.id}", follow=True)
     assert response.status_code == 200
     assert b"content-fetch-error" not in response.content
     assert b"Hello readme" in response.content
 
 
+@pytest.mark.django_db
+def test_schema_detail_highlights_readme_code_blocks(async_http_mock):
+    schema = SchemaFactory()
+    readme = DocumentationItemFactory(
+        schema=schema,
+        role=DocumentationItem.DocumentationItemRole.README,
+        format=DocumentationItem.DocumentationItemFormat.Markdown,
+        url="https://example.com/readme.md",
+    )
+    client = Client()
+    async_http_mock.get(
+        readme.url, text='```json\n{"type": "<em>"}\n```\n\n```\nplain\n```\n'
+    )
+    response = client.get(f"/schemas/{schema.id}", follow=True)
+    assert response.status_code == 200
+    assert b'<code class="highlight">' in response.content
+    assert b'<span class="k">&quot;type&quot;</span>' in response.content
+    assert b"&lt;em&gt;" in response.content
+    assert b"<em>" not in response.content
+    # Blocks without a language are left as they are
+    assert b"<pre><code>plain\n</code></pre>" in response.content
+
+
+@pytest.mark.django_db
+def test_schema_detail_query_count_does_not_grow_with_reference_items(
+    async_http_mock,
+):
+    async_http_mock.get(async_http_mock.ANY, text="Hello readme")
+
+    def count_detail_page_queries(schema):
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(f"/schemas/{schema.id}")
+        assert response.status_code == 200
+        return len(queries)
+
+    def create_schema(reference_item_count):
+        schema = SchemaFactory()
+        DocumentationItemFactory(
+            schema=schema,
+            role=DocumentationItem.DocumentationItemRole.README,
+            format=DocumentationItem.DocumentationItemFormat.PlainText,
+        )
+        for role in DocumentationItem.DocumentationItemRole.values:
+            DocumentationItemFactory.create_batch(
+                reference_item_count, schema=schema, role=role
+            )
+        SchemaRefFactory.create_batch(reference_item_count, schema=schema)
+        ImplementationFactory.create_batch(reference_item_count, schema=schema)
+        return schema
+
+    with requests_mock.Mocker() as m:
+        m.get(requests_mock.ANY, text="{}")
+        small_schema = create_schema(1)
+        large_schema = create_schema(5)
+
+    assert count_detail_page_queries(small_schema) == count_detail_page_queries(
+        large_schema
+    )
+
+
 @pytest.mark.django_db
 def test_schema_export_sends_manifest():
     schema = SchemaFactory()